@@ -0,0 +1,125 @@
+# anem.py
+# Command-line entry point: runs the monitoring cycle without the GUI.
+#   python -m anem monitor --data members_data.json
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import threading
+
+from logger_setup import setup_logging
+from member_store import MemberStore
+from persistence import WriteBehindWorker
+from transition_journal import TransitionJournal
+from api_client import configure_rate_governor, configure_session_pool
+from monitoring_engine import MonitoringEngine, MonitoringEngineListener
+from config import (
+    DATA_FILE, DB_FILE, SETTINGS_FILE, DEFAULT_SETTINGS, PERSIST_DEBOUNCE_SECONDS,
+    JOURNAL_FILE, JOURNAL_SNAPSHOT_FILE, JOURNAL_ARCHIVE_DIR, JOURNAL_COMPACT_AFTER_RECORDS, JOURNAL_ARCHIVE_KEEP_SEGMENTS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_settings(settings_path):
+    settings = DEFAULT_SETTINGS.copy()
+    if os.path.exists(settings_path):
+        try:
+            with open(settings_path, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+            logger.info(f"تم تحميل الإعدادات من {settings_path}")
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"خطأ في قراءة ملف الإعدادات {settings_path}: {e}. تم استخدام الإعدادات الافتراضية.")
+    else:
+        logger.info("ملف الإعدادات غير موجود، تم استخدام الإعدادات الافتراضية.")
+    return settings
+
+
+class ConsoleListener(MonitoringEngineListener):
+    """Logs engine events and queues a save whenever a member finishes processing."""
+
+    def __init__(self, members, persistence_worker):
+        self.members = members
+        self.persistence_worker = persistence_worker
+
+    def global_log(self, message, is_general, member_obj):
+        if is_general or member_obj is None:
+            logger.info(message)
+        else:
+            name = member_obj.get_full_name_ar() or member_obj.nin
+            logger.info(f"{name}: {message}")
+
+    def member_processing(self, member_id, is_processing):
+        if not is_processing:
+            self.persistence_worker.request_save()
+
+
+def run_monitor(args):
+    member_store = MemberStore(args.db)
+    try:
+        member_store.migrate_from_json(args.data)
+    except (json.JSONDecodeError, KeyError) as e:
+        logger.error(f"خطأ في قراءة ملف البيانات {args.data}: {e}")
+        member_store.close()
+        return 1
+    members = member_store.load_members()
+    if not members:
+        logger.error("لا يوجد أعضاء للمراقبة.")
+        member_store.close()
+        return 1
+
+    settings = load_settings(args.settings)
+    configure_rate_governor(settings)
+    configure_session_pool(settings)
+
+    persistence_worker = WriteBehindWorker(lambda: member_store.sync_members(members), PERSIST_DEBOUNCE_SECONDS)
+    persistence_worker.start()
+    listener = ConsoleListener(members, persistence_worker)
+    journal = TransitionJournal(JOURNAL_FILE, JOURNAL_SNAPSHOT_FILE, JOURNAL_ARCHIVE_DIR, JOURNAL_COMPACT_AFTER_RECORDS, JOURNAL_ARCHIVE_KEEP_SEGMENTS)
+    engine = MonitoringEngine(members, settings, listener=listener, output_base_dir=args.output_dir, journal=journal)
+
+    def _request_stop(signum, frame):
+        logger.info("تم استلام إشارة الإيقاف.")
+        engine.stop()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _request_stop)
+
+    logger.info(f"بدء المراقبة بدون واجهة لـ {len(members)} عضو من {args.db}")
+    # The engine runs in a worker thread so the main thread stays free to receive signals.
+    engine_thread = threading.Thread(target=engine.run, name="monitoring-engine")
+    engine_thread.start()
+    while engine_thread.is_alive():
+        engine_thread.join(0.5)
+
+    persistence_worker.flush()
+    member_store.close()
+    journal.close()
+    logger.info("تم إيقاف المراقبة.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="anem", description="مراقبة مواعيد منحة البطالة بدون واجهة رسومية.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    monitor_parser = subparsers.add_parser("monitor", help="تشغيل دورة المراقبة بدون واجهة.")
+    monitor_parser.add_argument("--data", default=DATA_FILE, help="ملف بيانات الأعضاء (JSON)، يُرحَّل مرة واحدة إلى مخزن الأعضاء.")
+    monitor_parser.add_argument("--db", default=DB_FILE, help="مخزن الأعضاء (SQLite).")
+    monitor_parser.add_argument("--settings", default=SETTINGS_FILE, help="ملف الإعدادات (JSON).")
+    monitor_parser.add_argument("--output-dir", default=None, help="المجلد الأساسي لحفظ ملفات PDF.")
+
+    args = parser.parse_args(argv)
+    if args.command != "monitor":
+        parser.print_help()
+        return 2
+
+    setup_logging()
+    return run_monitor(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
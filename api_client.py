@@ -1,32 +1,415 @@
 # api_client.py
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 import logging
+import threading
+import contextvars
+import collections
 import urllib3
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
-from config import BASE_API_URL, MAIN_SITE_CHECK_URL, MAX_RETRIES, MAX_BACKOFF_DELAY, SESSION
+from config import (
+    BASE_API_URL, MAIN_SITE_CHECK_URL, MAX_RETRIES, MAX_BACKOFF_DELAY, SESSION,
+    DEFAULT_SETTINGS, SETTING_MAX_REQUESTS_PER_SECOND, SETTING_REQUEST_BURST,
+    SETTING_ADAPTIVE_RATE, SETTING_POOL_CONNECTIONS, SETTING_POOL_MAXSIZE, MIN_REQUESTS_PER_SECOND,
+    WARMUP_TIMEOUT_SECONDS,
+    AIMD_DECREASE_FACTOR, AIMD_INCREASE_STEP, AIMD_HEALTHY_WINDOW, AIMD_DECREASE_COOLDOWN_SECONDS,
+    AIMD_LATENCY_SAMPLES, AIMD_MIN_LATENCY_SAMPLES, AIMD_LATENCY_RISE_FACTOR, AIMD_MIN_LATENCY_THRESHOLD,
+    AIMD_BASELINE_WINDOWS
+)
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__) 
 
 
-class AnemAPIClient:
-    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout):
-        self.session = SESSION 
+class RequestRateGovernor:
+    """
+    Token bucket shared by every AnemAPIClient in the process.
+    Tokens may go negative: each caller reserves its slot and sleeps until it is due,
+    so concurrent threads are served in arrival order without busy-waiting.
+    """
+    def __init__(self, requests_per_second, burst):
+        self._lock = threading.Lock()
+        self._rate = max(float(requests_per_second), MIN_REQUESTS_PER_SECOND)
+        self._burst = max(float(burst), 1.0)
+        self._tokens = self._burst
+        self._last_refill = time.monotonic()
+
+    def configure(self, requests_per_second, burst):
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self._rate = max(float(requests_per_second), MIN_REQUESTS_PER_SECOND)
+            self._burst = max(float(burst), 1.0)
+            self._tokens = min(self._tokens, self._burst)
+        logger.debug(f"تم ضبط محدد معدل الطلبات: {self._rate:.2f} طلب/ثانية، الدفعة القصوى {self._burst:.0f}.") # Every AIMD step comes through here
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def burst(self):
+        return self._burst
+
+    def _refill_locked(self, now):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+            self._last_refill = now
+
+    def reserve(self):
+        """Takes one token and returns the number of seconds to wait before sending."""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def acquire(self):
+        wait_seconds = self.reserve()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+
+class AdaptiveRateController:
+    """
+    AIMD congestion control on top of a RequestRateGovernor.
+    The configured rate is the ceiling; a 429 or a p95 latency spike cuts the
+    governor's rate multiplicatively, and each window of healthy responses adds
+    a fixed step back until the ceiling is reached again. A spike is judged against
+    the lowest p95 of the last AIMD_BASELINE_WINDOWS windows, so the baseline
+    follows the server when its normal latency moves in either direction.
+    """
+    def __init__(self, governor, ceiling, enabled=True):
+        self._lock = threading.Lock()
+        self.governor = governor
+        self.enabled = enabled
+        self._ceiling = max(float(ceiling), MIN_REQUESTS_PER_SECOND)
+        self._latencies = collections.deque(maxlen=AIMD_LATENCY_SAMPLES)
+        self._window_p95s = collections.deque(maxlen=AIMD_BASELINE_WINDOWS)
+        self._samples_in_window = 0
+        self._healthy_streak = 0
+        self._last_decrease_at = 0.0
+
+    def configure(self, ceiling, burst, enabled=True):
+        with self._lock:
+            new_ceiling = max(float(ceiling), MIN_REQUESTS_PER_SECOND)
+            changed = new_ceiling != self._ceiling or enabled != self.enabled or float(burst) != self.governor.burst
+            self._ceiling = new_ceiling
+            self.enabled = enabled
+            new_rate = min(self.governor.rate, self._ceiling) if enabled else self._ceiling
+            self._healthy_streak = 0
+        self.governor.configure(new_rate, burst)
+        if changed:
+            logger.info(f"تم ضبط محدد معدل الطلبات: الحد الأقصى {self._ceiling:.2f} طلب/ثانية، الدفعة القصوى {self.governor.burst:.0f}، التحكم التكيفي {'مفعل' if enabled else 'معطل'}.")
+
+    @property
+    def ceiling(self):
+        return self._ceiling
+
+    def current_rate(self):
+        return self.governor.rate
+
+    def _set_rate_locked(self, new_rate, reason):
+        new_rate = min(max(new_rate, MIN_REQUESTS_PER_SECOND), self._ceiling)
+        old_rate = self.governor.rate
+        if abs(new_rate - old_rate) < 1e-9:
+            return
+        self.governor.configure(new_rate, self.governor.burst)
+        logger.info(f"التحكم التكيفي في المعدل: {old_rate:.2f} -> {new_rate:.2f} طلب/ثانية ({reason}).")
+
+    def _decrease_locked(self, reason):
+        now = time.monotonic()
+        self._healthy_streak = 0
+        if now - self._last_decrease_at < AIMD_DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease_at = now
+        self._latencies.clear()
+        self._set_rate_locked(self.governor.rate * AIMD_DECREASE_FACTOR, reason)
+
+    def _p95_locked(self):
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def on_throttled(self, reason="استجابة 429"):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._decrease_locked(reason)
+
+    def on_response(self, latency_seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._latencies.append(latency_seconds)
+            self._samples_in_window += 1
+            if len(self._latencies) >= AIMD_MIN_LATENCY_SAMPLES:
+                p95 = self._p95_locked()
+                baseline_p95 = min(self._window_p95s) if self._window_p95s else None
+                if self._samples_in_window >= AIMD_HEALTHY_WINDOW:
+                    self._samples_in_window = 0
+                    self._window_p95s.append(p95)
+                if baseline_p95 is not None and p95 > AIMD_MIN_LATENCY_THRESHOLD and p95 > baseline_p95 * AIMD_LATENCY_RISE_FACTOR:
+                    self._decrease_locked(f"ارتفاع زمن الاستجابة p95={p95:.2f} ثانية (الأساس {baseline_p95:.2f})")
+                    return
+            self._healthy_streak += 1
+            if self._healthy_streak >= AIMD_HEALTHY_WINDOW:
+                self._healthy_streak = 0
+                self._set_rate_locked(self.governor.rate + AIMD_INCREASE_STEP, "استجابات سليمة")
+
+
+RATE_GOVERNOR = RequestRateGovernor(
+    DEFAULT_SETTINGS[SETTING_MAX_REQUESTS_PER_SECOND],
+    DEFAULT_SETTINGS[SETTING_REQUEST_BURST]
+)
+RATE_CONTROLLER = AdaptiveRateController(
+    RATE_GOVERNOR,
+    DEFAULT_SETTINGS[SETTING_MAX_REQUESTS_PER_SECOND],
+    DEFAULT_SETTINGS[SETTING_ADAPTIVE_RATE]
+)
+
+
+def configure_rate_governor(settings):
+    RATE_CONTROLLER.configure(
+        settings.get(SETTING_MAX_REQUESTS_PER_SECOND, DEFAULT_SETTINGS[SETTING_MAX_REQUESTS_PER_SECOND]),
+        settings.get(SETTING_REQUEST_BURST, DEFAULT_SETTINGS[SETTING_REQUEST_BURST]),
+        settings.get(SETTING_ADAPTIVE_RATE, DEFAULT_SETTINGS[SETTING_ADAPTIVE_RATE])
+    )
+
+
+def get_current_request_rate():
+    return RATE_CONTROLLER.current_rate()
+
+
+class ConnectionStats:
+    """Counts TCP/TLS connections opened versus requests sent, across every pooled session."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self.last_request_at = None
+
+    def record_connection_opened(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_request_sent(self):
+        with self._lock:
+            self.requests_sent += 1
+            self.last_request_at = time.monotonic()
+
+    def seconds_since_last_request(self):
+        with self._lock:
+            if self.last_request_at is None:
+                return None
+            return time.monotonic() - self.last_request_at
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "requests_sent": self.requests_sent,
+                "connections_reused": max(self.requests_sent - self.connections_opened, 0)
+            }
+
+
+CONNECTION_STATS = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        CONNECTION_STATS.record_connection_opened()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        CONNECTION_STATS.record_connection_opened()
+        return super()._new_conn()
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    # Requests are counted here rather than in the pools' urlopen, which urllib3 re-enters
+    # for its own retries and redirects.
+    def send(self, request, *args, **kwargs):
+        CONNECTION_STATS.record_request_sent()
+        return super().send(request, *args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class SessionProvider:
+    """
+    Hands every thread its own requests.Session (Session objects are not thread-safe),
+    while all of them mount one shared HTTPAdapter. The adapter's urllib3 pool is
+    thread-safe, so keep-alive connections are reused across threads, including
+    short-lived per-member QThreads.
+    """
+    def __init__(self, pool_connections, pool_maxsize):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._adapter = self._create_adapter()
+
+    def _create_adapter(self):
+        return _CountingHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+
+    def configure(self, pool_connections, pool_maxsize):
+        with self._lock:
+            if pool_connections == self.pool_connections and pool_maxsize == self.pool_maxsize:
+                return
+            self.pool_connections = pool_connections
+            self.pool_maxsize = pool_maxsize
+            old_adapter = self._adapter
+            self._adapter = self._create_adapter()
+            self._generation += 1
+        # Threads still holding a session on the old adapter remount the new one on their
+        # next get_session(); a request already in flight on a closed pool just opens a
+        # fresh connection that is discarded afterwards.
+        old_adapter.close()
+        logger.info(f"تم ضبط مجمع الاتصالات: pool_connections={pool_connections}, pool_maxsize={pool_maxsize}.")
+
+    def get_session(self):
+        session = getattr(self._local, "session", None)
+        if session is None or self._local.generation != self._generation:
+            with self._lock:
+                adapter = self._adapter
+                generation = self._generation
+            if session is None:
+                session = requests.Session()
+                session.headers.update(SESSION.headers)
+            session.mount("https://", adapter) # Replaces the closed adapter; cookies and headers stay
+            session.mount("http://", adapter)
+            self._local.session = session
+            self._local.generation = generation
+        return session
+
+
+SESSION_PROVIDER = SessionProvider(
+    DEFAULT_SETTINGS[SETTING_POOL_CONNECTIONS],
+    DEFAULT_SETTINGS[SETTING_POOL_MAXSIZE]
+)
+
+
+def configure_session_pool(settings):
+    SESSION_PROVIDER.configure(
+        settings.get(SETTING_POOL_CONNECTIONS, DEFAULT_SETTINGS[SETTING_POOL_CONNECTIONS]),
+        settings.get(SETTING_POOL_MAXSIZE, DEFAULT_SETTINGS[SETTING_POOL_MAXSIZE])
+    )
+
+
+def get_connection_stats():
+    return CONNECTION_STATS.snapshot()
+
+
+def get_seconds_since_last_request():
+    return CONNECTION_STATS.seconds_since_last_request()
+
+
+# Endpoint and latency of the last API call made on each thread (or asyncio task), for the
+# transition journal. Every thread and every task starts with its own context.
+_LAST_CALL = contextvars.ContextVar("anem_last_call", default=None)
+
+
+def take_last_call_info():
+    """Returns (endpoint, latency_seconds) of this thread's last API call and forgets it; (None, None) if none."""
+    info = _LAST_CALL.get()
+    _LAST_CALL.set(None)
+    return info or (None, None)
+
+
+def record_last_call(endpoint, is_site_check, started_at):
+    # Latency as the caller saw it, retries and backoff included.
+    _LAST_CALL.set(("site_check" if is_site_check else endpoint, time.monotonic() - started_at))
+
+
+class HttpReply:
+    """What the retry loop needs from a response, whichever HTTP library produced it."""
+    def __init__(self, status_code, text, reason=""):
+        self.status_code = status_code
+        self.reason = reason
+        self._text = text
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self._text
+
+    def json(self):
+        return json.loads(self._text)
+
+
+class _RequestsReply(HttpReply):
+    # Leaves decoding to requests: json() reads the raw bytes, so a large PDF body is
+    # never run through charset detection unless its text is actually logged.
+    def __init__(self, response):
+        super().__init__(response.status_code, None, response.reason)
+        self._response = response
+
+    @property
+    def text(self):
+        return self._response.text
+
+    def json(self):
+        return self._response.json()
+
+
+class TransportError(Exception):
+    """A request that got no HTTP response; kind is one of the TRANSPORT_* values."""
+    def __init__(self, kind, detail):
+        super().__init__(detail)
+        self.kind = kind
+
+
+TRANSPORT_SSL = "ssl"
+TRANSPORT_CONNECT_TIMEOUT = "connect_timeout"
+TRANSPORT_READ_TIMEOUT = "read_timeout"
+TRANSPORT_TIMEOUT = "timeout"
+TRANSPORT_CONNECTION = "connection"
+TRANSPORT_OTHER = "other"
+
+
+class AnemAPIClientBase:
+    """
+    Endpoints and the retry/backoff policy shared by the threaded and the asyncio client.
+    _request_steps() is the retry loop written once as a generator: it yields
+    ('sleep', seconds) and ('send', method, url, params, data, headers, timeout) steps and
+    returns the (result, error) pair; a subclass's _make_request() runs the steps with its
+    own HTTP library, so the endpoint methods below return whatever that _make_request
+    returns (a coroutine for the asyncio client).
+    """
+    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout, rate_governor=None, rate_controller=None):
         self.base_url = BASE_API_URL
         self.initial_backoff_general = initial_backoff_general
         self.initial_backoff_429 = initial_backoff_429
         self.request_timeout = request_timeout
-
+        self.rate_governor = rate_governor or RATE_GOVERNOR
+        self.rate_controller = rate_controller or RATE_CONTROLLER
 
     def _make_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False):
+        raise NotImplementedError
+
+    def _request_steps(self, method, endpoint, params, data, extra_headers, is_site_check):
         url = f"{self.base_url}/{endpoint}" if not is_site_check else MAIN_SITE_CHECK_URL
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
 
-        headers = self.session.headers.copy()
-        if extra_headers:
-            headers.update(extra_headers)
+        headers = dict(extra_headers) if extra_headers else {}
 
         current_retry = 0
         max_retries_for_this_call = 0 if is_site_check else MAX_RETRIES 
@@ -42,131 +425,138 @@ class AnemAPIClient:
                 log_prefix = f"فحص توفر الموقع: {url}"
             
             logger.debug(f"{log_prefix} (محاولة {current_retry + 1}/{max_retries_for_this_call + 1}) مع البيانات: {params or data}")
+
+            waited_for_budget = self.rate_governor.reserve()
+            if waited_for_budget > 0:
+                yield ('sleep', waited_for_budget)
+                logger.debug(f"{log_prefix}: انتظار {waited_for_budget:.2f} ثانية لاحترام الحد العام لمعدل الطلبات.")
             
-            try:
-                response = None
-                request_timeout_val = 5 if is_site_check else self.request_timeout
-
-                if method.upper() == 'GET':
-                    response = self.session.get(url, params=params, headers=headers, timeout=request_timeout_val, verify=False)
-                elif method.upper() == 'POST':
-                    headers['Content-Type'] = 'application/json' 
-                    response = self.session.post(url, json=data, headers=headers, timeout=request_timeout_val, verify=False)
+            request_timeout_val = 5 if is_site_check else self.request_timeout
+            if method.upper() == 'POST':
+                headers['Content-Type'] = 'application/json' 
+            elif method.upper() != 'GET':
+                unsupported_method_error = f"الطريقة {method} غير مدعومة لـ {url}"
+                logger.error(unsupported_method_error)
+                return None, unsupported_method_error
+
+            request_started_at = time.monotonic()
+            response = yield ('send', method.upper(), url, params, data, headers, request_timeout_val)
+
+            if isinstance(response, TransportError):
+                if response.kind == TRANSPORT_SSL:
+                    error_message = f"خطأ SSL عند الاتصال بـ {url}: {response}"
+                    if is_site_check: return False, error_message
+                    logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
+                elif response.kind == TRANSPORT_CONNECT_TIMEOUT:
+                    error_message = f"انتهت مهلة الاتصال بالخادم ({url}): {response}"
+                    if is_site_check: return False, error_message
+                    logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
+                elif response.kind == TRANSPORT_READ_TIMEOUT:
+                    error_message = f"انتهت مهلة القراءة من الخادم ({url}): {response}"
+                    if is_site_check: return False, error_message
+                    self.rate_controller.on_response(time.monotonic() - request_started_at) # A timeout is the slowest latency sample
+                    logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
+                elif response.kind == TRANSPORT_TIMEOUT:
+                    error_message = f"انتهت مهلة الطلب لـ {url}: {response}"
+                    if is_site_check: return False, error_message
+                    logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
+                elif response.kind == TRANSPORT_CONNECTION:
+                    error_message = f"خطأ في الاتصال بالخادم ({url}): {response}"
+                    if is_site_check: return False, error_message
+                    logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
                 else:
-                    unsupported_method_error = f"الطريقة {method} غير مدعومة لـ {url}"
-                    logger.error(unsupported_method_error)
-                    return None, unsupported_method_error
+                    error_message = f"خطأ عام في الطلب لـ {url}: {response}"
+                    if is_site_check: return False, error_message
+                    logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
+                    generic_request_error_msg = "حدث خطأ عام أثناء محاولة الاتصال بالخادم."
+                    logger.error(f"الطلب إلى {url} فشل بخطأ عام. الرسالة المُعادة: {generic_request_error_msg}")
+                    return None, generic_request_error_msg 
+                last_error_message_for_request = error_message
 
+            else:
                 logger.debug(f"استجابة الخادم لـ {url}: {response.status_code}")
 
                 if response.status_code == 429: 
+                    self.rate_controller.on_throttled()
                     actual_delay_to_use = current_delay_429
                     logger.warning(f"خطأ 429 (طلبات كثيرة جدًا) من الخادم لـ {url}. الانتظار {actual_delay_to_use} ثانية.")
                     if current_retry >= max_retries_for_this_call:
                         final_429_error = "طلبات كثيرة جدًا للخادم (429). يرجى الانتظار والمحاولة لاحقًا."
                         logger.error(f"تم تجاوز الحد الأقصى لإعادة المحاولة (429) لـ {url}. الرسالة المُعادة: {final_429_error}")
                         return None, final_429_error
-                    time.sleep(actual_delay_to_use)
+                    yield ('sleep', actual_delay_to_use)
                     current_delay_429 = min(current_delay_429 * 2, MAX_BACKOFF_DELAY) 
                     current_retry += 1
                     last_error_message_for_request = "طلبات كثيرة جدًا (429)" # تحديث رسالة الخطأ الأخيرة
                     continue
                 
+                # Only successes are healthy samples; a 5xx means the server is struggling
+                # just like a 429, and other 4xx say nothing about its load.
+                if response.status_code >= 500:
+                    self.rate_controller.on_throttled(f"خطأ خادم {response.status_code}")
+                elif response.ok:
+                    self.rate_controller.on_response(time.monotonic() - request_started_at)
                 actual_delay_to_use = current_delay_general # إعادة التعيين إلى التأخير العام إذا لم يكن الخطأ 429
-                response.raise_for_status() 
-                
-                if is_site_check: 
-                    return True, None 
-                
-                try:
-                    json_response = response.json()
-                    if endpoint == 'RendezVous/Create' and isinstance(json_response, dict) and json_response.get("Eligible") is False:
-                        logger.warning(f"استجابة JSON من {url} تشير إلى Eligible:false. الاستجابة: {json_response}")
-                        return json_response, None 
-                    return json_response, None
-                except json.JSONDecodeError:
-                    json_decode_error_msg_short = "خطأ في تحليل البيانات المستلمة من الخادم (ليست JSON)."
-                    json_decode_error_msg_full = f"خطأ في تحليل استجابة JSON من {url}. الاستجابة (أول 200 حرف): {response.text[:200] if response else 'No response object'}"
-                    logger.error(json_decode_error_msg_full)
-                    
-                    if endpoint == 'RendezVous/Create' and response and response.text:
-                        logger.warning(f"استجابة نصية غير JSON من {url} ولكنها تحتوي على نص: {response.text[:200]}")
-                        if "\"Eligible\":false" in response.text.lower():
-                             message_from_text = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائكم لأحد شروط الأهلية اللازمة." 
-                             constructed_response = {"Eligible": False, "message": message_from_text, "raw_text": True}
-                             logger.info(f"تم بناء استجابة Eligible:false من النص الخام لـ {url}: {constructed_response}")
-                             return constructed_response, None
-
-                        # إذا لم يكن Eligible:false، أرجع خطأ تحليل مع النص الخام
-                        raw_text_error_detail = "استجابة نصية غير متوقعة من الخادم."
-                        logger.error(f"الطلب إلى {url} فشل بسبب استجابة نصية غير متوقعة. الرسالة المُعادة: {raw_text_error_detail}")
-                        return {"raw_text": response.text, "is_non_json_success_heuristic": "Eligible" in response.text}, raw_text_error_detail
+
+                if not response.ok:
+                    status_code = response.status_code
+                    error_message = f"خطأ HTTP {status_code} من الخادم لـ {url}: {status_code} {response.reason}"
+                    if is_site_check: return False, error_message
+                    logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}. الاستجابة: {response.text[:200]}")
+                    last_error_message_for_request = error_message
                     
-                    logger.error(f"الطلب إلى {url} فشل بسبب خطأ في تحليل JSON. الرسالة المُعادة: {json_decode_error_msg_short}")
-                    return None, json_decode_error_msg_short
+                    if endpoint == 'RendezVous/Create':
+                        try:
+                            parsed_error_json = response.json()
+                            if isinstance(parsed_error_json, dict) and parsed_error_json.get("Eligible") is False:
+                                logger.warning(f"استجابة خطأ HTTP من {url} ولكنها JSON مع Eligible:false. الاستجابة: {parsed_error_json}")
+                                return parsed_error_json, None 
+                            
+                            # إذا لم يكن Eligible:false، فهو خطأ حقيقي
+                            http_json_error_detail = f"خطأ من الخادم ({status_code}) مع تفاصيل JSON."
+                            logger.error(f"الطلب إلى {url} فشل بخطأ HTTP مع تفاصيل JSON. الرسالة المُعادة: {http_json_error_detail}")
+                            return parsed_error_json, http_json_error_detail
+                        except json.JSONDecodeError: 
+                            http_text_error_detail = f"خطأ من الخادم ({status_code}) مع استجابة نصية."
+                            logger.warning(f"استجابة نصية غير JSON لخطأ HTTP من {url}: {response.text[:200]}")
+                            logger.error(f"الطلب إلى {url} فشل بخطأ HTTP مع استجابة نصية. الرسالة المُعادة: {http_text_error_detail}")
+                            return {"raw_text": response.text, "http_status_code": status_code}, http_text_error_detail
 
-            except requests.exceptions.SSLError as e:
-                error_message = f"خطأ SSL عند الاتصال بـ {url}: {str(e)}"
-                if is_site_check: return False, error_message
-                logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                last_error_message_for_request = error_message
-            except requests.exceptions.ConnectTimeout as e: 
-                error_message = f"انتهت مهلة الاتصال بالخادم ({url}): {str(e)}"
-                if is_site_check: return False, error_message
-                logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                last_error_message_for_request = error_message
-            except requests.exceptions.ReadTimeout as e: 
-                error_message = f"انتهت مهلة القراءة من الخادم ({url}): {str(e)}"
-                if is_site_check: return False, error_message
-                logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                last_error_message_for_request = error_message
-            except requests.exceptions.Timeout as e: # هذا يشمل ConnectTimeout و ReadTimeout بشكل عام
-                error_message = f"انتهت مهلة الطلب لـ {url}: {str(e)}"
-                if is_site_check: return False, error_message
-                logger.warning(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                last_error_message_for_request = error_message
-            except requests.exceptions.ConnectionError as e:
-                error_message = f"خطأ في الاتصال بالخادم ({url}): {str(e)}"
-                if is_site_check: return False, error_message
-                logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                last_error_message_for_request = error_message
-            except requests.exceptions.HTTPError as e: 
-                status_code = response.status_code if response else "N/A"
-                error_message = f"خطأ HTTP {status_code} من الخادم لـ {url}: {str(e)}"
-                if is_site_check: return False, error_message
-                logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}. الاستجابة: {response.text[:200] if response else 'N/A'}")
-                last_error_message_for_request = error_message
-                
-                if endpoint == 'RendezVous/Create' and response is not None:
+                else:
+                    if is_site_check: 
+                        return True, None 
+                    
                     try:
-                        parsed_error_json = response.json()
-                        if isinstance(parsed_error_json, dict) and parsed_error_json.get("Eligible") is False:
-                            logger.warning(f"استجابة خطأ HTTP من {url} ولكنها JSON مع Eligible:false. الاستجابة: {parsed_error_json}")
-                            return parsed_error_json, None 
+                        json_response = response.json()
+                        if endpoint == 'RendezVous/Create' and isinstance(json_response, dict) and json_response.get("Eligible") is False:
+                            logger.warning(f"استجابة JSON من {url} تشير إلى Eligible:false. الاستجابة: {json_response}")
+                        return json_response, None
+                    except json.JSONDecodeError:
+                        json_decode_error_msg_short = "خطأ في تحليل البيانات المستلمة من الخادم (ليست JSON)."
+                        logger.error(f"خطأ في تحليل استجابة JSON من {url}. الاستجابة (أول 200 حرف): {response.text[:200]}")
+                        
+                        if endpoint == 'RendezVous/Create' and response.text:
+                            logger.warning(f"استجابة نصية غير JSON من {url} ولكنها تحتوي على نص: {response.text[:200]}")
+                            if "\"Eligible\":false" in response.text.lower():
+                                 message_from_text = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائكم لأحد شروط الأهلية اللازمة." 
+                                 constructed_response = {"Eligible": False, "message": message_from_text, "raw_text": True}
+                                 logger.info(f"تم بناء استجابة Eligible:false من النص الخام لـ {url}: {constructed_response}")
+                                 return constructed_response, None
+
+                            # إذا لم يكن Eligible:false، أرجع خطأ تحليل مع النص الخام
+                            raw_text_error_detail = "استجابة نصية غير متوقعة من الخادم."
+                            logger.error(f"الطلب إلى {url} فشل بسبب استجابة نصية غير متوقعة. الرسالة المُعادة: {raw_text_error_detail}")
+                            return {"raw_text": response.text, "is_non_json_success_heuristic": "Eligible" in response.text}, raw_text_error_detail
                         
-                        # إذا لم يكن Eligible:false، فهو خطأ حقيقي
-                        http_json_error_detail = f"خطأ من الخادم ({status_code}) مع تفاصيل JSON."
-                        logger.error(f"الطلب إلى {url} فشل بخطأ HTTP مع تفاصيل JSON. الرسالة المُعادة: {http_json_error_detail}")
-                        return parsed_error_json, http_json_error_detail
-                    except json.JSONDecodeError: 
-                        http_text_error_detail = f"خطأ من الخادم ({status_code}) مع استجابة نصية."
-                        logger.warning(f"استجابة نصية غير JSON لخطأ HTTP من {url}: {response.text[:200]}")
-                        logger.error(f"الطلب إلى {url} فشل بخطأ HTTP مع استجابة نصية. الرسالة المُعادة: {http_text_error_detail}")
-                        return {"raw_text": response.text, "http_status_code": status_code}, http_text_error_detail
-            except requests.exceptions.RequestException as e: 
-                error_message = f"خطأ عام في الطلب لـ {url}: {str(e)}"
-                if is_site_check: return False, error_message
-                logger.error(f"{log_prefix} (محاولة {current_retry + 1}): {error_message}")
-                generic_request_error_msg = "حدث خطأ عام أثناء محاولة الاتصال بالخادم."
-                logger.error(f"الطلب إلى {url} فشل بخطأ عام. الرسالة المُعادة: {generic_request_error_msg}")
-                return None, generic_request_error_msg 
+                        logger.error(f"الطلب إلى {url} فشل بسبب خطأ في تحليل JSON. الرسالة المُعادة: {json_decode_error_msg_short}")
+                        return None, json_decode_error_msg_short
 
             if current_retry >= max_retries_for_this_call:
                 final_error_message_after_retries = f"فشل الاتصال بالخادم بعد عدة محاولات. ({last_error_message_for_request.split(':')[0].strip()})" 
                 logger.error(f"تم تجاوز الحد الأقصى لإعادة المحاولة لـ {url} بعد خطأ: {last_error_message_for_request}. الرسالة المُعادة: {final_error_message_after_retries}")
                 return None, final_error_message_after_retries
             
-            time.sleep(actual_delay_to_use)
+            yield ('sleep', actual_delay_to_use)
             current_delay_general = min(current_delay_general * 2, MAX_BACKOFF_DELAY) 
             current_retry += 1
         
@@ -176,17 +566,6 @@ class AnemAPIClient:
         return None, ultimate_fallback_error
 
 
-    def check_main_site_availability(self):
-        logger.info(f"بدء فحص توفر الموقع الرئيسي: {MAIN_SITE_CHECK_URL}")
-        # يتم التعامل مع is_site_check داخل _make_request لتعطيل إعادة المحاولة
-        available, error_msg = self._make_request('GET', '', is_site_check=True) 
-        if error_msg: 
-            # لا نسجل كـ error هنا لأن هذا الفحص دوري، والخطأ متوقع أحيانًا
-            logger.warning(f"فحص توفر الموقع فشل: {error_msg}")
-            return False, error_msg # إرجاع رسالة الخطأ للمستهلك (MonitoringThread)
-        return available, None
-
-
     def validate_candidate(self, wassit_number, identity_doc_number):
         params = {
             "wassitNumber": wassit_number,
@@ -227,3 +606,85 @@ class AnemAPIClient:
         # حاليًا، الكود يفترض أن استجابة PDF الناجحة ستكون JSON مع حقل "base64Pdf".
         return self._make_request('GET', endpoint, params=params)
 
+
+class AnemAPIClient(AnemAPIClientBase):
+    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout, rate_governor=None, rate_controller=None, session_provider=None):
+        super().__init__(initial_backoff_general, initial_backoff_429, request_timeout, rate_governor, rate_controller)
+        self.session_provider = session_provider or SESSION_PROVIDER
+
+    @property
+    def session(self):
+        # The client instance may be shared by several QThreads; each gets its own session.
+        return self.session_provider.get_session()
+
+
+    def _make_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False):
+        started_at = time.monotonic()
+        try:
+            return self._make_request_with_retries(method, endpoint, params, data, extra_headers, is_site_check)
+        finally:
+            record_last_call(endpoint, is_site_check, started_at)
+
+    def _make_request_with_retries(self, method, endpoint, params, data, extra_headers, is_site_check):
+        session = self.session
+        steps = self._request_steps(method, endpoint, params, data, extra_headers, is_site_check)
+        outcome = None
+        while True:
+            try:
+                step = steps.send(outcome)
+            except StopIteration as finished:
+                return finished.value
+            if step[0] == 'sleep':
+                time.sleep(step[1])
+                outcome = None
+            else:
+                outcome = self._send(session, *step[1:])
+
+    @staticmethod
+    def _send(session, method, url, params, data, headers, timeout):
+        try:
+            if method == 'GET':
+                response = session.get(url, params=params, headers=headers, timeout=timeout, verify=False)
+            else:
+                response = session.post(url, json=data, headers=headers, timeout=timeout, verify=False)
+        except requests.exceptions.SSLError as e:
+            return TransportError(TRANSPORT_SSL, str(e))
+        except requests.exceptions.ConnectTimeout as e: 
+            return TransportError(TRANSPORT_CONNECT_TIMEOUT, str(e))
+        except requests.exceptions.ReadTimeout as e: 
+            return TransportError(TRANSPORT_READ_TIMEOUT, str(e))
+        except requests.exceptions.Timeout as e:
+            return TransportError(TRANSPORT_TIMEOUT, str(e))
+        except requests.exceptions.ConnectionError as e:
+            return TransportError(TRANSPORT_CONNECTION, str(e))
+        except requests.exceptions.RequestException as e: 
+            return TransportError(TRANSPORT_OTHER, str(e))
+        return _RequestsReply(response)
+
+
+    def warm_up(self, reason="تسخين الاتصال"):
+        """
+        Sends a lightweight HEAD to the API host so DNS, TCP and TLS are already paid
+        for when the next real request (e.g. create_rendezvous) goes out. The connection
+        goes back to the shared pool and is reused by whichever thread asks next.
+        """
+        self.rate_governor.acquire()
+        started_at = time.monotonic()
+        try:
+            self.session.head(MAIN_SITE_CHECK_URL, timeout=WARMUP_TIMEOUT_SECONDS, verify=False, allow_redirects=False)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"{reason}: فشل الطلب الخفيف إلى {MAIN_SITE_CHECK_URL}: {e}")
+            return False
+        logger.debug(f"{reason}: الاتصال بـ {MAIN_SITE_CHECK_URL} جاهز ({time.monotonic() - started_at:.2f} ثانية).")
+        return True
+
+
+    def check_main_site_availability(self):
+        logger.info(f"بدء فحص توفر الموقع الرئيسي: {MAIN_SITE_CHECK_URL}")
+        # يتم التعامل مع is_site_check داخل _make_request لتعطيل إعادة المحاولة
+        available, error_msg = self._make_request('GET', '', is_site_check=True) 
+        if error_msg: 
+            # لا نسجل كـ error هنا لأن هذا الفحص دوري، والخطأ متوقع أحيانًا
+            logger.warning(f"فحص توفر الموقع فشل: {error_msg}")
+            return False, error_msg # إرجاع رسالة الخطأ للمستهلك (MonitoringThread)
+        return available, None
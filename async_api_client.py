@@ -0,0 +1,134 @@
+# async_api_client.py
+import asyncio
+import time
+import logging
+import threading
+
+try:
+    import aiohttp
+except ImportError: # aiohttp is only needed when the async client is actually used
+    aiohttp = None
+
+from config import MAIN_SITE_CHECK_URL, SESSION
+from api_client import (
+    AnemAPIClientBase, HttpReply, TransportError, SESSION_PROVIDER, record_last_call,
+    TRANSPORT_SSL, TRANSPORT_CONNECT_TIMEOUT, TRANSPORT_READ_TIMEOUT, TRANSPORT_CONNECTION, TRANSPORT_OTHER
+)
+
+logger = logging.getLogger(__name__)
+
+# aiohttp only tells a connect timeout apart from a read timeout since 3.10.
+_CONNECT_TIMEOUT_ERRORS = (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, "ConnectionTimeoutError") else ()
+
+
+class AsyncAnemAPIClient(AnemAPIClientBase):
+    """
+    asyncio variant of AnemAPIClient with the same method surface: every endpoint method
+    returns a coroutine. Retries, backoff, 429/5xx handling, the shared rate governor and
+    AIMD controller and the last-call record all come from AnemAPIClientBase; only the
+    sending and sleeping happen on the event loop, over one aiohttp session.
+    """
+    def __init__(self, initial_backoff_general, initial_backoff_429, request_timeout, rate_governor=None, rate_controller=None):
+        if aiohttp is None:
+            raise RuntimeError("مكتبة aiohttp غير مثبتة. يرجى تثبيتها لاستخدام العميل غير المتزامن (pip install aiohttp).")
+        super().__init__(initial_backoff_general, initial_backoff_429, request_timeout, rate_governor, rate_controller)
+        self.default_headers = dict(SESSION.headers)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=SESSION_PROVIDER.pool_maxsize * SESSION_PROVIDER.pool_connections,
+                limit_per_host=SESSION_PROVIDER.pool_maxsize
+            )
+            self._session = aiohttp.ClientSession(headers=self.default_headers, connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _make_request(self, method, endpoint, params=None, data=None, extra_headers=None, is_site_check=False):
+        started_at = time.monotonic()
+        try:
+            session = self._get_session()
+            steps = self._request_steps(method, endpoint, params, data, extra_headers, is_site_check)
+            outcome = None
+            while True:
+                try:
+                    step = steps.send(outcome)
+                except StopIteration as finished:
+                    return finished.value
+                if step[0] == 'sleep':
+                    await asyncio.sleep(step[1])
+                    outcome = None
+                else:
+                    outcome = await self._send(session, *step[1:])
+        finally:
+            record_last_call(endpoint, is_site_check, started_at)
+
+    @staticmethod
+    async def _send(session, method, url, params, data, headers, timeout):
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        try:
+            if method == 'GET':
+                request_context = session.get(url, params=params, headers=headers, timeout=client_timeout, ssl=False)
+            else:
+                request_context = session.post(url, json=data, headers=headers, timeout=client_timeout, ssl=False)
+            async with request_context as response:
+                return HttpReply(response.status, await response.text(), response.reason or "")
+        except aiohttp.ClientSSLError as e:
+            return TransportError(TRANSPORT_SSL, str(e))
+        except asyncio.TimeoutError as e: # aiohttp's own timeout errors derive from it
+            kind = TRANSPORT_CONNECT_TIMEOUT if isinstance(e, _CONNECT_TIMEOUT_ERRORS) else TRANSPORT_READ_TIMEOUT
+            return TransportError(kind, str(e) or "Timeout")
+        except aiohttp.ClientConnectionError as e:
+            return TransportError(TRANSPORT_CONNECTION, str(e))
+        except aiohttp.ClientError as e:
+            return TransportError(TRANSPORT_OTHER, str(e))
+
+    async def check_main_site_availability(self):
+        logger.info(f"بدء فحص توفر الموقع الرئيسي: {MAIN_SITE_CHECK_URL}")
+        available, error_msg = await self._make_request('GET', '', is_site_check=True)
+        if error_msg:
+            logger.warning(f"فحص توفر الموقع فشل: {error_msg}")
+            return False, error_msg
+        return available, None
+
+
+class AsyncClientLoop:
+    """
+    Runs a single asyncio event loop on one background thread so Qt code can
+    submit coroutines (e.g. hundreds of AsyncAnemAPIClient calls) without a
+    QThread per operation. submit() returns a concurrent.futures.Future; use
+    add_done_callback + a queued Qt signal to get the result back on the GUI thread.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="AsyncClientLoop", daemon=True)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stop(self, timeout=5):
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+        if not self.loop.is_running() and not self.loop.is_closed():
+            self.loop.close()
@@ -0,0 +1,53 @@
+# booking_strategy.py
+import datetime
+import logging
+
+from config import (
+    SETTING_DATE_PREFERENCE, SETTING_ALLOWED_WEEKDAYS, SETTING_MAX_DATE_ATTEMPTS, DEFAULT_SETTINGS,
+    DATE_PREFERENCE_EARLIEST, DATE_PREFERENCE_LATEST
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BookingDateStrategy:
+    """Decides which of the dates offered by GetAvailableDates are tried, and in what order."""
+
+    def __init__(self, preference, allowed_weekdays=None, max_attempts=1):
+        self.preference = preference
+        self.allowed_weekdays = set(allowed_weekdays or [])
+        self.max_attempts = max(1, int(max_attempts))
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings.get(SETTING_DATE_PREFERENCE, DEFAULT_SETTINGS[SETTING_DATE_PREFERENCE]),
+            settings.get(SETTING_ALLOWED_WEEKDAYS, DEFAULT_SETTINGS[SETTING_ALLOWED_WEEKDAYS]),
+            settings.get(SETTING_MAX_DATE_ATTEMPTS, DEFAULT_SETTINGS[SETTING_MAX_DATE_ATTEMPTS])
+        )
+
+    def candidate_dates(self, raw_dates):
+        """
+        Returns (candidates, invalid_dates). candidates is a list of 'YYYY-MM-DD' strings
+        (the format RendezVous/Create expects), already filtered and ordered, capped at
+        max_attempts. invalid_dates holds the server strings that could not be parsed.
+        """
+        parsed = []
+        invalid_dates = []
+        for raw_date in raw_dates:
+            try:
+                day, month, year = str(raw_date).split('/')
+                parsed.append(datetime.date(int(year), int(month), int(day)))
+            except ValueError:
+                invalid_dates.append(raw_date)
+
+        if self.allowed_weekdays:
+            parsed = [d for d in parsed if d.weekday() in self.allowed_weekdays]
+        if self.preference == DATE_PREFERENCE_EARLIEST:
+            parsed.sort()
+        elif self.preference == DATE_PREFERENCE_LATEST:
+            parsed.sort(reverse=True)
+
+        if invalid_dates:
+            logger.warning(f"تم تجاهل تواريخ بتنسيق غير صالح من الخادم: {invalid_dates}")
+        return [d.isoformat() for d in parsed[:self.max_attempts]], invalid_dates
@@ -4,7 +4,11 @@ import logging # ### Added import logging ###
 
 # --- File Names and Paths ---
 LOG_FILE = "anem_app.log"
-DATA_FILE = "members_data.json"
+DATA_FILE = "members_data.json" # Legacy JSON store, imported once into DB_FILE
+DB_FILE = "members_data.db" # SQLite member store
+JOURNAL_FILE = "member_transitions.jsonl" # Append-only log of member status transitions
+JOURNAL_SNAPSHOT_FILE = "member_transitions_snapshot.json" # Latest transition per member as of the last compaction
+JOURNAL_ARCHIVE_DIR = "member_transitions_archive" # Compacted journal segments, kept for analysis
 STYLESHEET_FILE = "styles_dark.txt"
 SETTINGS_FILE = "app_settings.json" # File to store settings
 
@@ -12,7 +16,9 @@ SETTINGS_FILE = "app_settings.json" # File to store settings
 BASE_API_URL = "https://ac-controle.anem.dz/AllocationChomage/api"
 MAIN_SITE_CHECK_URL = "https://ac-controle.anem.dz/" # For checking general site availability
 
-# --- Session Object (shared across API clients if needed) ---
+# --- Session Object ---
+# Holds the default headers only. Requests are sent through per-thread sessions
+# created by api_client.SessionProvider, which share one tunable connection pool.
 SESSION = requests.Session()
 SESSION.headers.update({
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
@@ -24,7 +30,8 @@ SESSION.headers.update({
     'Sec-Fetch-Mode': 'cors',
     'Sec-Fetch-Site': 'same-site',
     'Cache-Control': 'no-cache', # Ensure fresh data
-    'Pragma': 'no-cache' # For older HTTP/1.0 servers
+    'Pragma': 'no-cache', # For older HTTP/1.0 servers
+    'Connection': 'keep-alive' # Reuse TLS connections across requests
 })
 
 # --- Settings Keys (used for consistency in accessing settings dict) ---
@@ -34,23 +41,98 @@ SETTING_MONITORING_INTERVAL = "monitoring_interval"
 SETTING_BACKOFF_429 = "backoff_429"           # Delay after HTTP 429
 SETTING_BACKOFF_GENERAL = "backoff_general"   # General retry delay
 SETTING_REQUEST_TIMEOUT = "request_timeout"   # Timeout for API requests
+SETTING_MAX_REQUESTS_PER_SECOND = "max_requests_per_second" # Global request rate ceiling (all threads)
+SETTING_REQUEST_BURST = "request_burst"       # Requests allowed back-to-back before the ceiling applies
+SETTING_ADAPTIVE_RATE = "adaptive_rate"       # Let the AIMD controller move the rate below the ceiling
+SETTING_POOL_CONNECTIONS = "pool_connections" # Number of per-host connection pools to cache
+SETTING_POOL_MAXSIZE = "pool_maxsize"         # Max keep-alive connections kept per host
+SETTING_DATE_PREFERENCE = "date_preference"   # Order in which offered dates are tried (see DATE_PREFERENCE_*)
+SETTING_ALLOWED_WEEKDAYS = "allowed_weekdays" # Weekdays (Monday=0) a booking may fall on; empty = any day
+SETTING_MAX_DATE_ATTEMPTS = "max_date_attempts" # Dates tried within one booking call before giving up
+SETTING_MAX_POLL_INTERVAL = "max_poll_interval" # Ceiling for a member's adaptive poll interval (the monitoring interval is the floor)
 
 # --- Default Settings (if settings file is missing or corrupted) ---
 DEFAULT_SETTINGS = {
-    SETTING_MIN_MEMBER_DELAY: 30,      # seconds (e.g., 30 seconds)
-    SETTING_MAX_MEMBER_DELAY: 60,     # seconds (e.g., 60 seconds)
+    SETTING_MIN_MEMBER_DELAY: 0,       # seconds (0 = paced by the global rate governor only)
+    SETTING_MAX_MEMBER_DELAY: 0,      # seconds (0 = paced by the global rate governor only)
     SETTING_MONITORING_INTERVAL: 1,  # minutes (e.g., 1 minute)
     SETTING_BACKOFF_429: 60,          # seconds (e.g., 60 seconds)
     SETTING_BACKOFF_GENERAL: 5,       # seconds (e.g., 5 seconds)
-    SETTING_REQUEST_TIMEOUT: 30       # seconds (e.g., 30 seconds)
+    SETTING_REQUEST_TIMEOUT: 30,      # seconds (e.g., 30 seconds)
+    SETTING_MAX_REQUESTS_PER_SECOND: 1.0, # requests per second, shared by every thread
+    SETTING_REQUEST_BURST: 3,         # requests
+    SETTING_ADAPTIVE_RATE: True,      # AIMD on 429s / rising latency
+    SETTING_POOL_CONNECTIONS: 4,      # hosts
+    SETTING_POOL_MAXSIZE: 10,         # connections per host
+    SETTING_DATE_PREFERENCE: "server_order",
+    SETTING_ALLOWED_WEEKDAYS: [],     # any day
+    SETTING_MAX_DATE_ATTEMPTS: 3,     # dates
+    SETTING_MAX_POLL_INTERVAL: 30     # minutes
 }
 
+# --- Booking Date Preferences ---
+DATE_PREFERENCE_SERVER_ORDER = "server_order" # Try dates in the order the server listed them
+DATE_PREFERENCE_EARLIEST = "earliest"         # Try the earliest date first
+DATE_PREFERENCE_LATEST = "latest"             # Try the latest date first
+
 # --- Retry Mechanism Constants (used by AnemAPIClient) ---
 MAX_RETRIES = 3  # Max number of retries for a single API call (excluding initial attempt)
 MAX_BACKOFF_DELAY = 120  # Maximum delay (in seconds) for exponential backoff
+MIN_REQUESTS_PER_SECOND = 0.05  # Floor for the rate governor so a bad setting can't stall every thread
+KEEPALIVE_INTERVAL_SECONDS = 25  # Ping the API host after this much idle time while members can book
+WARMUP_TIMEOUT_SECONDS = 5       # Timeout for connection pre-warm / keep-alive requests
+
+# --- Adaptive (AIMD) Rate Control Constants ---
+AIMD_DECREASE_FACTOR = 0.5          # Multiply the rate by this on a 429 or a p95 latency spike
+AIMD_INCREASE_STEP = 0.05           # Requests/second added after each healthy window
+AIMD_HEALTHY_WINDOW = 10            # Consecutive healthy responses needed before increasing
+AIMD_DECREASE_COOLDOWN_SECONDS = 10 # Ignore further decrease signals for this long after a decrease
+AIMD_LATENCY_SAMPLES = 50           # Size of the sliding window used for p95
+AIMD_MIN_LATENCY_SAMPLES = 20       # Don't judge p95 before this many samples
+AIMD_LATENCY_RISE_FACTOR = 2.0      # p95 above baseline * factor counts as congestion
+AIMD_BASELINE_WINDOWS = 12          # Baseline = lowest p95 seen over this many recent windows of AIMD_HEALTHY_WINDOW responses
+AIMD_MIN_LATENCY_THRESHOLD = 2.0    # seconds; p95 below this is never treated as congestion
+
+# --- Slot Watching Constants ---
+STRUCTURE_POLL_INTERVAL_SECONDS = 60 # A structure's available dates are fetched at most once per this period
+
+# --- Member Scheduling Constants ---
+SCHEDULER_AGING_SECONDS = 300 # Each period a member stays overdue promotes it by one priority class
+# Recheck period per status after a visit; statuses not listed use the monitoring interval.
+STATUS_RECHECK_SECONDS = {
+    "مكتمل": 24 * 3600,
+    "لديه موعد مسبق": 6 * 3600,
+    "غير مؤهل مبدئيًا": 24 * 3600,
+    "تم الحجز": 60,            # Soon, to fetch the PDFs
+}
+RECHECK_ON_EDIT_ONLY_STATUSES = ["بيانات الإدخال خاطئة"] # Not rechecked again until the member is edited
+POLL_BACKOFF_FACTOR = 2.0 # A member's poll interval is multiplied by this each time its outcome repeats
+
+# --- Monitoring Pipeline Constants ---
+# Worker threads per stage. Booking has its own workers so it never waits behind PDF downloads;
+# total request rate is still capped by the shared rate governor.
+PIPELINE_STAGE_WORKERS = {
+    "validation": 2,
+    "info": 1,
+    "booking": 2,
+    "pdf": 1,
+}
+SHUTDOWN_GRACE_SECONDS = 10 # On close, how long workers get to finish before the final save goes ahead without them
+
+# --- Persistence Constants ---
+PERSIST_DEBOUNCE_SECONDS = 0.5 # Save requests within this window are coalesced into one write
+JOURNAL_COMPACT_AFTER_RECORDS = 5000 # Journal records appended before it is compacted into the snapshot
+JOURNAL_ARCHIVE_KEEP_SEGMENTS = 20 # Newest compacted segments kept in JOURNAL_ARCHIVE_DIR; older ones are deleted
 
 # --- Other Application Constants ---
 MAX_ERROR_DISPLAY_LENGTH = 70 # Max length for truncated error messages in the table
+SEARCH_DEBOUNCE_MS = 250 # Typing pause before the member search is applied
+GUI_UPDATE_INTERVAL_MS = 100 # Worker updates are applied to the table at most this often (10 per second)
+GUI_GENERAL_LOGS_PER_FLUSH = 20 # Older general status-bar messages within one flush are dropped
+MAX_VISIBLE_TOASTS = 3 # Further toasts wait in a queue
+MAX_QUEUED_TOASTS = 20 # Beyond this the oldest waiting toast is dropped
+TOAST_AGGREGATION_MS = 1000 # Member toasts with the same text within this window become one ("N أعضاء: ...")
+TOAST_MAX_LENGTH = 150
 APP_ID_FALLBACK = 'anem-booking-app-pyqt14-refactored' # Fallback if __app_id is not defined
 
 # Attempt to get __app_id, provide a fallback if not defined (e.g., when running outside specific env)
@@ -2,16 +2,25 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QDialog, QFormLayout, QDialogButtonBox,
-    QSpinBox, QStyle, QApplication, QDesktopWidget, QTextEdit,
-    QScrollArea # Added QScrollArea
+    QSpinBox, QDoubleSpinBox, QCheckBox, QStyle, QApplication, QDesktopWidget, QTextEdit,
+    QScrollArea, # Added QScrollArea
+    QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer, QPoint, QEasingCurve, QPropertyAnimation, QRegularExpression
+import logging
+from collections import deque
+
+from PyQt5.QtCore import Qt, QObject, QTimer, QPoint, QEasingCurve, QPropertyAnimation, QRegularExpression, pyqtSignal
 from PyQt5.QtGui import QIcon, QRegularExpressionValidator, QColor
 
 from utils import QColorConstants
+from config import MAX_VISIBLE_TOASTS, MAX_QUEUED_TOASTS, TOAST_AGGREGATION_MS, TOAST_MAX_LENGTH
+
+logger = logging.getLogger(__name__)
 
 
 class ToastNotification(QWidget):
+    closed = pyqtSignal(object) # Emitted with the toast once it has faded out
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.ToolTip | Qt.WindowStaysOnTopHint)
@@ -51,13 +60,14 @@ class ToastNotification(QWidget):
     def _on_animation_finished(self):
         if self.windowOpacity() == 0: 
             self.hide()
+            self.closed.emit(self)
 
     def _start_fade_out(self):
         self.animation.setStartValue(1.0)
         self.animation.setEndValue(0.0)
         self.animation.start()
 
-    def showMessage(self, message, type="info", duration=4000, parent_window=None):
+    def showMessage(self, message, type="info", duration=4000, parent_window=None, stack_offset=0):
         self.message_label.setText(message)
         self.setWindowOpacity(0.0) 
 
@@ -85,7 +95,16 @@ class ToastNotification(QWidget):
         self.icon_label.setPixmap(icon.pixmap(24, 24)) 
 
         self.adjustSize() 
+        self.place(parent_window, stack_offset)
+
+        self.show()
+        self.animation.setStartValue(0.0) 
+        self.animation.setEndValue(1.0)   
+        self.animation.start() 
+        self.timer.start(duration)
 
+    def place(self, parent_window=None, stack_offset=0):
+        """Moves the toast to the bottom corner, raised by stack_offset pixels above the toasts below it."""
         if parent_window:
             parent_geo = parent_window.geometry()
             screen_geo = QApplication.desktop().availableGeometry(parent_window)
@@ -104,16 +123,108 @@ class ToastNotification(QWidget):
                      pos_x = screen_geo.right() - self.width() - 20
                 pos_y = screen_geo.bottom() - self.height() - 50 
             
-            self.move(QPoint(int(pos_x), int(pos_y))) 
+            self.move(QPoint(int(pos_x), int(pos_y - stack_offset))) 
         else:
             screen_geo = QApplication.desktop().availableGeometry()
-            self.move(screen_geo.width() - self.width() - 20, screen_geo.height() - self.height() - 50)
-
-        self.show()
-        self.animation.setStartValue(0.0) 
-        self.animation.setEndValue(1.0)   
-        self.animation.start() 
-        self.timer.start(duration)
+            self.move(screen_geo.width() - self.width() - 20, screen_geo.height() - self.height() - 50 - stack_offset)
+
+
+class ToastManager(QObject):
+    """
+    Shows toasts stacked, at most MAX_VISIBLE_TOASTS at a time; the rest wait in a bounded
+    queue and identical waiting toasts are merged. Toasts about members are held for
+    TOAST_AGGREGATION_MS and grouped by type and text, so a burst of the same failure
+    becomes one "N أعضاء: ..." toast instead of one window per member.
+
+    It also remembers, per member id, which status toasts were already shown
+    (member_flags), so a member is not notified twice for the same state.
+    """
+    STACK_SPACING = 8
+
+    def __init__(self, parent_window):
+        super().__init__(parent_window)
+        self._parent_window = parent_window
+        self._visible = [] # Bottom to top
+        self._queue = deque() # (message, type, duration)
+        self._pending_member_toasts = {} # (type, message) -> [member display names, duration]
+        self._member_flags = {} # member_id -> set of toast keys already shown for it
+        self._aggregation_timer = QTimer(self)
+        self._aggregation_timer.setSingleShot(True)
+        self._aggregation_timer.setInterval(TOAST_AGGREGATION_MS)
+        self._aggregation_timer.timeout.connect(self._flush_member_toasts)
+
+    def show(self, message, type="info", duration=4000):
+        if len(message) > TOAST_MAX_LENGTH:
+            logger.debug(f"Toast message (general) truncated. Original: {message}")
+            message = message[:TOAST_MAX_LENGTH] + "..."
+        if any(queued[0] == message and queued[1] == type for queued in self._queue) or \
+           any(toast.message_label.text() == message for toast in self._visible):
+            return
+        if len(self._queue) >= MAX_QUEUED_TOASTS:
+            dropped = self._queue.popleft()
+            logger.debug(f"Toast queue full, dropped: {dropped[0]}")
+        self._queue.append((message, type, duration))
+        self._show_queued()
+
+    def show_for_member(self, member_display, message, type="info", duration=4000):
+        pending = self._pending_member_toasts.get((type, message))
+        if pending is None:
+            self._pending_member_toasts[(type, message)] = [[member_display], duration]
+        else:
+            pending[0].append(member_display)
+            pending[1] = max(pending[1], duration)
+        if not self._aggregation_timer.isActive():
+            self._aggregation_timer.start()
+
+    def member_flags(self, member_id):
+        """The mutable set of toast keys already shown for the member."""
+        flags = self._member_flags.get(member_id)
+        if flags is None:
+            flags = self._member_flags[member_id] = set()
+        return flags
+
+    def forget_member(self, member_id):
+        self._member_flags.pop(member_id, None)
+
+    def _flush_member_toasts(self):
+        pending, self._pending_member_toasts = self._pending_member_toasts, {}
+        for (type, message), (member_displays, duration) in pending.items():
+            if len(member_displays) == 1:
+                self.show(self._member_text(member_displays[0], message), type, duration)
+            else:
+                self.show(self._member_text(f"{len(member_displays)} أعضاء", message), type, duration)
+
+    @staticmethod
+    def _member_text(intro, message):
+        text = f"{intro}: {message}"
+        if len(text) <= TOAST_MAX_LENGTH:
+            return text
+        logger.debug(f"Toast message (with member) truncated. Original: {message}")
+        remaining_len = TOAST_MAX_LENGTH - len(intro) - 5
+        if remaining_len > 10:
+            return f"{intro}: {message[:remaining_len]}..."
+        return f"{intro}..."
+
+    def _show_queued(self):
+        while self._queue and len(self._visible) < MAX_VISIBLE_TOASTS:
+            message, type, duration = self._queue.popleft()
+            toast = ToastNotification(self._parent_window)
+            toast.closed.connect(self._on_toast_closed)
+            toast.showMessage(message, type, duration, parent_window=self._parent_window, stack_offset=self._stack_height())
+            self._visible.append(toast)
+
+    def _stack_height(self):
+        return sum(toast.height() + self.STACK_SPACING for toast in self._visible)
+
+    def _on_toast_closed(self, toast):
+        if toast in self._visible:
+            self._visible.remove(toast)
+        toast.deleteLater()
+        offset = 0
+        for remaining in self._visible:
+            remaining.place(self._parent_window, offset)
+            offset += remaining.height() + self.STACK_SPACING
+        self._show_queued()
 
 
 class AddMemberDialog(QDialog):
@@ -253,20 +364,25 @@ class SettingsDialog(QDialog):
         from config import (
             SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
             SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429,
-            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS
+            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, SETTING_MAX_REQUESTS_PER_SECOND,
+            SETTING_REQUEST_BURST, SETTING_ADAPTIVE_RATE, SETTING_POOL_CONNECTIONS,
+            SETTING_POOL_MAXSIZE, SETTING_DATE_PREFERENCE, SETTING_ALLOWED_WEEKDAYS, SETTING_MAX_DATE_ATTEMPTS,
+            DATE_PREFERENCE_SERVER_ORDER, DATE_PREFERENCE_EARLIEST, DATE_PREFERENCE_LATEST, SETTING_MAX_POLL_INTERVAL,
+            DEFAULT_SETTINGS
         )
+        from api_client import get_current_request_rate
 
         self.current_settings = current_settings
         layout = QFormLayout(self)
         layout.setLabelAlignment(Qt.AlignRight)
 
         self.min_delay_spin = QSpinBox(self)
-        self.min_delay_spin.setRange(1, 300) 
+        self.min_delay_spin.setRange(0, 300) 
         self.min_delay_spin.setValue(self.current_settings.get(SETTING_MIN_MEMBER_DELAY, DEFAULT_SETTINGS[SETTING_MIN_MEMBER_DELAY]))
         self.min_delay_spin.setSuffix(" ثانية")
 
         self.max_delay_spin = QSpinBox(self)
-        self.max_delay_spin.setRange(1, 600) 
+        self.max_delay_spin.setRange(0, 600) 
         self.max_delay_spin.setValue(self.current_settings.get(SETTING_MAX_MEMBER_DELAY, DEFAULT_SETTINGS[SETTING_MAX_MEMBER_DELAY]))
         self.max_delay_spin.setSuffix(" ثانية")
 
@@ -275,6 +391,11 @@ class SettingsDialog(QDialog):
         self.monitoring_interval_spin.setValue(self.current_settings.get(SETTING_MONITORING_INTERVAL, DEFAULT_SETTINGS[SETTING_MONITORING_INTERVAL]))
         self.monitoring_interval_spin.setSuffix(" دقيقة")
 
+        self.max_poll_interval_spin = QSpinBox(self)
+        self.max_poll_interval_spin.setRange(1, 24 * 60)
+        self.max_poll_interval_spin.setValue(self.current_settings.get(SETTING_MAX_POLL_INTERVAL, DEFAULT_SETTINGS[SETTING_MAX_POLL_INTERVAL]))
+        self.max_poll_interval_spin.setSuffix(" دقيقة")
+
         self.backoff_429_spin = QSpinBox(self)
         self.backoff_429_spin.setRange(10, 3600) 
         self.backoff_429_spin.setValue(self.current_settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]))
@@ -290,13 +411,72 @@ class SettingsDialog(QDialog):
         self.request_timeout_spin.setValue(self.current_settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT]))
         self.request_timeout_spin.setSuffix(" ثانية")
 
+        self.max_rps_spin = QDoubleSpinBox(self)
+        self.max_rps_spin.setRange(0.05, 20.0)
+        self.max_rps_spin.setSingleStep(0.1)
+        self.max_rps_spin.setDecimals(2)
+        self.max_rps_spin.setValue(self.current_settings.get(SETTING_MAX_REQUESTS_PER_SECOND, DEFAULT_SETTINGS[SETTING_MAX_REQUESTS_PER_SECOND]))
+        self.max_rps_spin.setSuffix(" طلب/ثانية")
+
+        self.request_burst_spin = QSpinBox(self)
+        self.request_burst_spin.setRange(1, 50)
+        self.request_burst_spin.setValue(self.current_settings.get(SETTING_REQUEST_BURST, DEFAULT_SETTINGS[SETTING_REQUEST_BURST]))
+        self.request_burst_spin.setSuffix(" طلب")
+
+        self.adaptive_rate_checkbox = QCheckBox("خفض المعدل تلقائيًا عند خطأ 429 أو بطء الخادم", self)
+        self.adaptive_rate_checkbox.setChecked(bool(self.current_settings.get(SETTING_ADAPTIVE_RATE, DEFAULT_SETTINGS[SETTING_ADAPTIVE_RATE])))
+
+        self.current_rate_label = QLabel(f"{get_current_request_rate():.2f} طلب/ثانية", self)
+
+        self.pool_connections_spin = QSpinBox(self)
+        self.pool_connections_spin.setRange(1, 20)
+        self.pool_connections_spin.setValue(self.current_settings.get(SETTING_POOL_CONNECTIONS, DEFAULT_SETTINGS[SETTING_POOL_CONNECTIONS]))
+
+        self.pool_maxsize_spin = QSpinBox(self)
+        self.pool_maxsize_spin.setRange(1, 100)
+        self.pool_maxsize_spin.setValue(self.current_settings.get(SETTING_POOL_MAXSIZE, DEFAULT_SETTINGS[SETTING_POOL_MAXSIZE]))
+        self.pool_maxsize_spin.setSuffix(" اتصال")
+
+        self.date_preference_combo = QComboBox(self)
+        self.date_preference_combo.addItem("حسب ترتيب الخادم", DATE_PREFERENCE_SERVER_ORDER)
+        self.date_preference_combo.addItem("الأقرب أولاً", DATE_PREFERENCE_EARLIEST)
+        self.date_preference_combo.addItem("الأبعد أولاً", DATE_PREFERENCE_LATEST)
+        preference_index = self.date_preference_combo.findData(self.current_settings.get(SETTING_DATE_PREFERENCE, DEFAULT_SETTINGS[SETTING_DATE_PREFERENCE]))
+        self.date_preference_combo.setCurrentIndex(max(preference_index, 0))
+
+        # Python weekday numbers (Monday=0); none checked means any day is acceptable.
+        allowed_weekdays = self.current_settings.get(SETTING_ALLOWED_WEEKDAYS, DEFAULT_SETTINGS[SETTING_ALLOWED_WEEKDAYS]) or []
+        weekdays_widget = QWidget(self)
+        weekdays_layout = QHBoxLayout(weekdays_widget)
+        weekdays_layout.setContentsMargins(0, 0, 0, 0)
+        self.weekday_checkboxes = {}
+        for weekday, weekday_name in [(6, "الأحد"), (0, "الإثنين"), (1, "الثلاثاء"), (2, "الأربعاء"), (3, "الخميس"), (4, "الجمعة"), (5, "السبت")]:
+            checkbox = QCheckBox(weekday_name, weekdays_widget)
+            checkbox.setChecked(weekday in allowed_weekdays)
+            weekdays_layout.addWidget(checkbox)
+            self.weekday_checkboxes[weekday] = checkbox
+
+        self.max_date_attempts_spin = QSpinBox(self)
+        self.max_date_attempts_spin.setRange(1, 20)
+        self.max_date_attempts_spin.setValue(self.current_settings.get(SETTING_MAX_DATE_ATTEMPTS, DEFAULT_SETTINGS[SETTING_MAX_DATE_ATTEMPTS]))
+        self.max_date_attempts_spin.setSuffix(" تاريخ")
 
         layout.addRow("أقل تأخير بين الأعضاء:", self.min_delay_spin)
         layout.addRow("أقصى تأخير بين الأعضاء:", self.max_delay_spin)
         layout.addRow("الفاصل الزمني لدورة المراقبة:", self.monitoring_interval_spin)
+        layout.addRow("أقصى فاصل للعضو عند تكرار نفس النتيجة:", self.max_poll_interval_spin)
         layout.addRow("تأخير أولي لخطأ 429 (طلبات كثيرة):", self.backoff_429_spin)
         layout.addRow("تأخير أولي للأخطاء العامة:", self.backoff_general_spin)
         layout.addRow("مهلة الطلب للواجهة البرمجية (API):", self.request_timeout_spin)
+        layout.addRow("الحد الأقصى لمعدل الطلبات (لكل البرنامج):", self.max_rps_spin)
+        layout.addRow("عدد الطلبات المتتالية المسموح بها (دفعة):", self.request_burst_spin)
+        layout.addRow("التحكم التكيفي في المعدل:", self.adaptive_rate_checkbox)
+        layout.addRow("المعدل الفعلي الحالي:", self.current_rate_label)
+        layout.addRow("عدد مجمعات الاتصال (خوادم):", self.pool_connections_spin)
+        layout.addRow("أقصى عدد اتصالات مفتوحة لكل خادم:", self.pool_maxsize_spin)
+        layout.addRow("ترتيب تجربة المواعيد المتاحة:", self.date_preference_combo)
+        layout.addRow("أيام الحجز المسموح بها (لا شيء = الكل):", weekdays_widget)
+        layout.addRow("أقصى عدد تواريخ تجرب في كل محاولة حجز:", self.max_date_attempts_spin)
 
 
         self.buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel, Qt.Horizontal, self)
@@ -310,7 +490,9 @@ class SettingsDialog(QDialog):
         from config import (
             SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
             SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429,
-            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT
+            SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, SETTING_MAX_REQUESTS_PER_SECOND,
+            SETTING_REQUEST_BURST, SETTING_ADAPTIVE_RATE, SETTING_POOL_CONNECTIONS, SETTING_POOL_MAXSIZE,
+            SETTING_DATE_PREFERENCE, SETTING_ALLOWED_WEEKDAYS, SETTING_MAX_DATE_ATTEMPTS, SETTING_MAX_POLL_INTERVAL
         )
         min_val = self.min_delay_spin.value()
         max_val = self.max_delay_spin.value()
@@ -322,9 +504,18 @@ class SettingsDialog(QDialog):
             SETTING_MIN_MEMBER_DELAY: min_val,
             SETTING_MAX_MEMBER_DELAY: max_val,
             SETTING_MONITORING_INTERVAL: self.monitoring_interval_spin.value(),
+            SETTING_MAX_POLL_INTERVAL: max(self.max_poll_interval_spin.value(), self.monitoring_interval_spin.value()),
             SETTING_BACKOFF_429: self.backoff_429_spin.value(),
             SETTING_BACKOFF_GENERAL: self.backoff_general_spin.value(),
-            SETTING_REQUEST_TIMEOUT: self.request_timeout_spin.value()
+            SETTING_REQUEST_TIMEOUT: self.request_timeout_spin.value(),
+            SETTING_MAX_REQUESTS_PER_SECOND: self.max_rps_spin.value(),
+            SETTING_REQUEST_BURST: self.request_burst_spin.value(),
+            SETTING_ADAPTIVE_RATE: self.adaptive_rate_checkbox.isChecked(),
+            SETTING_POOL_CONNECTIONS: self.pool_connections_spin.value(),
+            SETTING_POOL_MAXSIZE: self.pool_maxsize_spin.value(),
+            SETTING_DATE_PREFERENCE: self.date_preference_combo.currentData(),
+            SETTING_ALLOWED_WEEKDAYS: sorted(weekday for weekday, checkbox in self.weekday_checkboxes.items() if checkbox.isChecked()),
+            SETTING_MAX_DATE_ATTEMPTS: self.max_date_attempts_spin.value()
         }
 
 class ViewMemberDialog(QDialog):
@@ -0,0 +1,124 @@
+# gui_update_bus.py
+import threading
+import itertools
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from config import GUI_GENERAL_LOGS_PER_FLUSH
+
+
+class GuiUpdateBus(QObject):
+    """
+    Collects what worker threads report about members and hands it to the GUI handlers at
+    most once per interval_ms. Member updates, fetched names and processing flags are kept
+    per member, last write wins. So are member log messages; general log messages are kept
+in order, up to max_general_logs per flush, and the two are handed over interleaved as
+they arrived. Worker signals reach the
+    post_* methods through direct connections, so an emit costs a dict write in the worker
+    and a burst of them puts a single event on the Qt event queue.
+    """
+    _flush_requested = pyqtSignal()
+
+    def __init__(self, interval_ms, on_member_update, on_member_name, on_member_processing, on_global_log,
+                 max_general_logs=GUI_GENERAL_LOGS_PER_FLUSH, parent=None):
+        super().__init__(parent)
+        self._on_member_update = on_member_update
+        self._on_member_name = on_member_name
+        self._on_member_processing = on_member_processing
+        self._on_global_log = on_global_log
+        self._lock = threading.Lock()
+        self._updates = {} # member_id -> (status_text, detail_text, icon_name)
+        self._names = {} # member_id -> (nom_ar, prenom_ar)
+        self._processing = {} # member_id -> is_processing
+        self._log_seq = itertools.count()
+        self._member_logs = {} # member_id -> (seq, message, is_general, member_obj)
+        self._general_logs = deque(maxlen=max_general_logs) # (seq, message, is_general, None)
+        self._flush_pending = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._flush_requested.connect(self._start_timer) # Queued when emitted from a worker thread
+
+    def connect_worker(self, thread, with_processing=True):
+        """
+        Routes the thread's member signals through the bus. with_processing=False leaves
+        its processing started/finished signals to the caller.
+        """
+        direct = Qt.DirectConnection
+        if hasattr(thread, 'update_member_gui_signal'):
+            thread.update_member_gui_signal.connect(self.post_member_update, direct)
+        if hasattr(thread, 'new_data_fetched_signal'):
+            thread.new_data_fetched_signal.connect(self.post_member_name, direct)
+        if hasattr(thread, 'global_log_signal'):
+            thread.global_log_signal.connect(self.post_global_log, direct)
+        if not with_processing:
+            return
+        if hasattr(thread, 'member_being_processed_signal'):
+            thread.member_being_processed_signal.connect(self.post_member_processing, direct)
+        if hasattr(thread, 'member_processing_started_signal'):
+            thread.member_processing_started_signal.connect(self.post_processing_started, direct)
+        if hasattr(thread, 'member_processing_finished_signal'):
+            thread.member_processing_finished_signal.connect(self.post_processing_finished, direct)
+
+    def post_member_update(self, member_id, status_text, detail_text, icon_name):
+        with self._lock:
+            self._updates[member_id] = (status_text, detail_text, icon_name)
+            self._request_flush_locked()
+
+    def post_member_name(self, member_id, nom_ar, prenom_ar):
+        with self._lock:
+            self._names[member_id] = (nom_ar, prenom_ar)
+            self._request_flush_locked()
+
+    def post_member_processing(self, member_id, is_processing):
+        with self._lock:
+            self._processing[member_id] = is_processing
+            self._request_flush_locked()
+
+    def post_processing_started(self, member_id):
+        self.post_member_processing(member_id, True)
+
+    def post_processing_finished(self, member_id):
+        self.post_member_processing(member_id, False)
+
+    def post_global_log(self, message, is_general, member_obj):
+        with self._lock:
+            entry = (next(self._log_seq), message, is_general, member_obj)
+            if member_obj is None:
+                self._general_logs.append(entry)
+            else:
+                self._member_logs[member_obj.member_id] = entry
+            self._request_flush_locked()
+
+    def flush(self):
+        """Hands everything collected so far to the handlers; runs on the GUI thread."""
+        self._timer.stop()
+        with self._lock:
+            names, self._names = self._names, {}
+            updates, self._updates = self._updates, {}
+            processing, self._processing = self._processing, {}
+            log_messages = sorted(itertools.chain(self._member_logs.values(), self._general_logs))
+            self._member_logs = {}
+            self._general_logs.clear()
+            self._flush_pending = False
+        # Names first so the rows and toasts below already show them; processing flags last
+        # so a visit that ended within this frame leaves its row unhighlighted.
+        for member_id, (nom_ar, prenom_ar) in names.items():
+            self._on_member_name(member_id, nom_ar, prenom_ar)
+        for member_id, (status_text, detail_text, icon_name) in updates.items():
+            self._on_member_update(member_id, status_text, detail_text, icon_name)
+        for member_id, is_processing in processing.items():
+            self._on_member_processing(member_id, is_processing)
+        for _seq, message, is_general, member_obj in log_messages:
+            self._on_global_log(message, is_general, member_obj)
+
+    def _request_flush_locked(self):
+        if not self._flush_pending:
+            self._flush_pending = True
+            self._flush_requested.emit()
+
+    def _start_timer(self):
+        if not self._timer.isActive():
+            self._timer.start()
@@ -9,25 +9,33 @@ import webbrowser
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton, QTableView,
     QMessageBox, QHeaderView, QStatusBar, QFrame, QAction, QStyle,
     QMenu, QLineEdit, QComboBox, QAbstractItemView, QDesktopWidget
 )
-from PyQt5.QtCore import QTimer, Qt, QDateTime, QLocale, QStandardPaths, QUrl
-from PyQt5.QtGui import QIcon, QColor, QPalette, QDesktopServices, QFontDatabase # Added QFontDatabase
+from PyQt5.QtCore import QTimer, Qt, QDateTime, QLocale, QStandardPaths, QUrl, pyqtSignal
+from PyQt5.QtGui import QIcon, QDesktopServices, QFontDatabase # Added QFontDatabase
 
-from gui_components import ToastNotification, AddMemberDialog, EditMemberDialog, SettingsDialog, ViewMemberDialog
-from api_client import AnemAPIClient
+from gui_components import ToastManager, AddMemberDialog, EditMemberDialog, SettingsDialog, ViewMemberDialog
+from api_client import AnemAPIClient, configure_rate_governor, configure_session_pool, get_current_request_rate
 from member import Member 
+from member_store import MemberStore
+from member_registry import MemberRegistry
+from member_filter import MemberFilter
+from search_index import SEARCHABLE_FIELDS
+from gui_update_bus import GuiUpdateBus
+from member_table_model import MemberTableModel
+from persistence import WriteBehindWorker, atomic_write_json
+from transition_journal import TransitionJournal
 from threads import FetchInitialInfoThread, MonitoringThread, SingleMemberCheckThread, DownloadAllPdfsThread 
 from config import (
-    LOG_FILE, DATA_FILE, STYLESHEET_FILE, SETTINGS_FILE,
+    LOG_FILE, DATA_FILE, DB_FILE, STYLESHEET_FILE, SETTINGS_FILE,
     DEFAULT_SETTINGS, SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
     SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429, SETTING_BACKOFF_GENERAL,
-    SETTING_REQUEST_TIMEOUT, MAX_ERROR_DISPLAY_LENGTH
+    SETTING_REQUEST_TIMEOUT, MAX_ERROR_DISPLAY_LENGTH, PERSIST_DEBOUNCE_SECONDS, SEARCH_DEBOUNCE_MS, GUI_UPDATE_INTERVAL_MS,
+    JOURNAL_FILE, JOURNAL_SNAPSHOT_FILE, JOURNAL_ARCHIVE_DIR, JOURNAL_COMPACT_AFTER_RECORDS, JOURNAL_ARCHIVE_KEEP_SEGMENTS, SHUTDOWN_GRACE_SECONDS
 )
 from logger_setup import setup_logging
-from utils import QColorConstants, get_icon_name_for_status 
 
 logger = setup_logging()
 
@@ -72,7 +80,7 @@ def load_custom_fonts():
 
 
 class AnemApp(QMainWindow):
-    COL_ICON, COL_FULL_NAME_AR, COL_NIN, COL_WASSIT, COL_CCP, COL_PHONE_NUMBER, COL_STATUS, COL_RDV_DATE, COL_DETAILS = range(9)
+    members_save_failed_signal = pyqtSignal(str) # Emitted from the persistence worker thread
 
     def __init__(self):
         super().__init__()
@@ -91,16 +99,27 @@ class AnemApp(QMainWindow):
 
         logger.info("بدء تشغيل التطبيق")
 
+        self.toast_manager = ToastManager(self) # Before anything that may report through _show_toast
         self.settings = {}
         self.load_app_settings() 
 
         self.suppress_initial_messages = True 
-        self.toast_notifications = [] 
 
-        self.members_list = [] 
+        self.member_registry = MemberRegistry()
+        self.members_list = self.member_registry.members # Same list object for the whole session; changed only through the registry
         self.filtered_members_list = [] 
         self.is_filter_active = False 
+        self.member_filter = MemberFilter()
+        self.member_store = MemberStore(DB_FILE)
+        self.members_persistence_enabled = True 
+        self.members_save_failed_signal.connect(self.handle_members_save_failed)
+        self.persistence_worker = WriteBehindWorker(self._write_members_data, PERSIST_DEBOUNCE_SECONDS,
+                                                    on_error=lambda e: self.members_save_failed_signal.emit(str(e)))
+        self.persistence_worker.start()
+        self.transition_journal = TransitionJournal(JOURNAL_FILE, JOURNAL_SNAPSHOT_FILE, JOURNAL_ARCHIVE_DIR, JOURNAL_COMPACT_AFTER_RECORDS, JOURNAL_ARCHIVE_KEEP_SEGMENTS)
         
+        configure_rate_governor(self.settings)
+        configure_session_pool(self.settings)
         self.api_client = AnemAPIClient(
             initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
             initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
@@ -118,12 +137,13 @@ class AnemApp(QMainWindow):
         self.row_spinner_timer.timeout.connect(self.update_active_row_spinner_display)
         self.row_spinner_timer_interval = 150 
 
-        self.monitoring_thread = MonitoringThread(self.members_list, self.settings.copy())
-        self.monitoring_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-        self.monitoring_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-        self.monitoring_thread.global_log_signal.connect(self.update_status_bar_message) 
-        self.monitoring_thread.member_being_processed_signal.connect(self.handle_member_processing_signal)
+        self.gui_update_bus = GuiUpdateBus(GUI_UPDATE_INTERVAL_MS, self.update_member_gui_in_table, self.update_member_name_in_table,
+                                           self.handle_member_processing_signal, self.update_status_bar_message, parent=self)
+
+        self.monitoring_thread = MonitoringThread(self.members_list, self.settings.copy(), journal=self.transition_journal)
+        self.gui_update_bus.connect_worker(self.monitoring_thread)
         self.monitoring_thread.countdown_update_signal.connect(self.update_countdown_timer_display) 
+        self.monitoring_thread.request_rate_signal.connect(self.update_request_rate_display) 
 
         self.init_ui() 
         self.load_stylesheet() 
@@ -182,7 +202,11 @@ class AnemApp(QMainWindow):
 
         self.search_input = QLineEdit(self)
         self.search_input.setPlaceholderText("بحث بالاسم, NIN, الوسيط...")
-        self.search_input.textChanged.connect(self.apply_filter_and_search) 
+        self.search_debounce_timer = QTimer(self)
+        self.search_debounce_timer.setSingleShot(True)
+        self.search_debounce_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_debounce_timer.timeout.connect(self.apply_filter_and_search)
+        self.search_input.textChanged.connect(lambda _text: self.search_debounce_timer.start()) 
         search_filter_layout.addWidget(self.search_input, 2) 
 
         self.filter_by_combo = QComboBox(self)
@@ -221,22 +245,21 @@ class AnemApp(QMainWindow):
         self.status_bar_label = QLabel("جاهز.")
         self.last_scan_label = QLabel("") 
         self.countdown_label = QLabel("") 
+        self.request_rate_label = QLabel("") 
         self.statusBar.addWidget(self.status_bar_label, 1) 
+        self.statusBar.addPermanentWidget(self.request_rate_label) 
         self.statusBar.addPermanentWidget(self.countdown_label) 
         self.statusBar.addPermanentWidget(self.last_scan_label) 
         # Update status bar message after its labels are created
         # self.update_status_bar_message("التطبيق جاهز.", is_general_message=True) # This can be called later if needed
 
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(self.COL_DETAILS + 1) 
-        self.table.setHorizontalHeaderLabels([
-            "أيقونة", "الاسم الكامل", "رقم التعريف", "رقم الوسيط",
-            "الحساب البريدي", "رقم الهاتف", "الحالة", "تاريخ الموعد", "آخر تحديث/خطأ" 
-        ])
+        self.table = QTableView(self)
+        self.table_model = MemberTableModel(self.style(), self.transition_journal, self)
+        self.table.setModel(self.table_model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Interactive) 
         self.table.setAlternatingRowColors(True) 
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers) 
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers) 
         self.table.setContextMenuPolicy(Qt.CustomContextMenu) 
         self.table.customContextMenuRequested.connect(self.show_table_context_menu)
 
@@ -245,17 +268,18 @@ class AnemApp(QMainWindow):
         self.toggle_column_visibility(self.toggle_details_action.isChecked())
 
 
-        header.setSectionResizeMode(self.COL_ICON, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(self.COL_FULL_NAME_AR, QHeaderView.ResizeToContents) 
-        header.setSectionResizeMode(self.COL_PHONE_NUMBER, QHeaderView.ResizeToContents) 
-        header.setSectionResizeMode(self.COL_STATUS, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(MemberTableModel.COL_ICON, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(MemberTableModel.COL_FULL_NAME_AR, QHeaderView.ResizeToContents) 
+        header.setSectionResizeMode(MemberTableModel.COL_PHONE_NUMBER, QHeaderView.ResizeToContents) 
+        header.setSectionResizeMode(MemberTableModel.COL_STATUS, QHeaderView.ResizeToContents)
         header.setMinimumSectionSize(150) 
-        header.setSectionResizeMode(self.COL_RDV_DATE, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(self.COL_DETAILS, QHeaderView.Stretch) 
+        header.setSectionResizeMode(MemberTableModel.COL_RDV_DATE, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(MemberTableModel.COL_POLL_INTERVAL, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(MemberTableModel.COL_DETAILS, QHeaderView.Stretch) 
 
-        self.table.setSelectionBehavior(QTableWidget.SelectRows) 
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows) 
         self.table.verticalHeader().setDefaultSectionSize(30) 
-        self.table.itemDoubleClicked.connect(self.edit_member_details)
+        self.table.doubleClicked.connect(self.edit_member_details)
         self.table.verticalHeader().setVisible(True) 
         main_layout.addWidget(self.table)
 
@@ -316,19 +340,19 @@ class AnemApp(QMainWindow):
         self.filter_by_combo.setCurrentIndex(0) 
         self.filter_value_combo.clear()
         self.filter_value_combo.setVisible(False)
+        self.search_debounce_timer.stop()
+        self.member_filter.set_criteria("", None, None)
         self.is_filter_active = False
         self.update_table() 
         self._show_toast("تم مسح الفلتر بنجاح.", type="info") 
         self.update_status_bar_message("تم مسح الفلتر.", is_general_message=True)
 
     def apply_filter_and_search(self):
-        search_term = self.search_input.text().lower().strip()
+        self.search_debounce_timer.stop() # A filter combo change applies any pending search text as well
         filter_key = self.filter_by_combo.itemData(self.filter_by_combo.currentIndex())
         filter_value_data = self.filter_value_combo.itemData(self.filter_value_combo.currentIndex())
-
-        current_list_to_filter = list(self.members_list) 
-        
-        self.is_filter_active = bool(search_term or (filter_key and filter_value_data is not None))
+        self.member_filter.set_criteria(self.search_input.text(), filter_key, filter_value_data)
+        self.is_filter_active = self.member_filter.is_active
 
         if not self.is_filter_active:
             self.filtered_members_list = list(self.members_list) 
@@ -338,52 +362,75 @@ class AnemApp(QMainWindow):
                 self._last_filter_applied = False
             return
 
-        temp_filtered_list = []
-
-        for member in current_list_to_filter:
-            match_search = True
-            if search_term:
-                match_search = (search_term in (member.nin or "").lower() or
-                                search_term in (member.wassit_no or "").lower() or
-                                search_term in (member.get_full_name_ar() or "").lower() or
-                                search_term in (member.nom_fr or "").lower() or
-                                search_term in (member.prenom_fr or "").lower() or
-                                search_term in (member.phone_number or "").lower() or
-                                search_term in (member.ccp or "").lower())
-            
-            match_filter = True
-            if filter_key and filter_value_data is not None:
-                if filter_key == "status":
-                    match_filter = member.status == filter_value_data
-                elif filter_key == "has_rdv":
-                    match_filter = member.already_has_rdv == filter_value_data
-                elif filter_key == "have_allocation":
-                    match_filter = member.have_allocation == filter_value_data
-                elif filter_key == "pdf_honneur":
-                    match_filter = bool(member.pdf_honneur_path) == filter_value_data
-                elif filter_key == "pdf_rdv":
-                    match_filter = bool(member.pdf_rdv_path) == filter_value_data
-            
-            if match_search and match_filter:
-                temp_filtered_list.append(member)
-        
-        self.filtered_members_list = temp_filtered_list
+        self.filtered_members_list = self.member_filter.filter(self.members_list, self.member_registry.index_of)
         self.update_table() 
         self.update_status_bar_message(f"تم تطبيق الفلتر. عدد النتائج: {len(self.filtered_members_list)}", is_general_message=True) 
         self._last_filter_applied = True 
 
+    def _sync_member_with_filter(self, member, changed_fields=None):
+        """
+        Re-checks one changed member against the active filter and inserts or drops its row
+        in place, so status changes during monitoring never recompute the whole filter.
+        changed_fields (from Member.take_unshown_fields) limits the search index refresh to
+        members whose searchable fields changed; None means they may have.
+        """
+        if not self.member_registry.contains(member):
+            return
+        if changed_fields is None or not SEARCHABLE_FIELDS.isdisjoint(changed_fields):
+            self.member_filter.refresh(member)
+        if not self.is_filter_active:
+            return
+        is_shown = self.member_registry.is_in_view(member)
+        if self.member_filter.matches(member) == is_shown:
+            return
+        if is_shown:
+            self._drop_view_row(member)
+            return
+        row = self._filtered_insert_row(member)
+        self.filtered_members_list.insert(row, member)
+        self.member_registry.insert_into_view(member, row)
+        self.table_model.insert_member(row, member)
+        if self.active_spinner_row_in_view >= row:
+            self.active_spinner_row_in_view += 1
+
+    def _filtered_insert_row(self, member):
+        # The filtered list keeps the member list's order: binary search on list positions.
+        position = self.member_registry.index_of(member)
+        low, high = 0, len(self.filtered_members_list)
+        while low < high:
+            middle = (low + high) // 2
+            if self.member_registry.index_of(self.filtered_members_list[middle]) < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _drop_view_row(self, member):
+        """Removes the member's row from the displayed table (and the filtered list) in place."""
+        row = self.member_registry.remove_from_view(member)
+        if row is None:
+            return
+        if self.is_filter_active:
+            del self.filtered_members_list[row]
+        self.table_model.remove_row(row)
+        if self.active_spinner_row_in_view == row:
+            self.row_spinner_timer.stop()
+            self.active_spinner_row_in_view = -1
+        elif self.active_spinner_row_in_view > row:
+            self.active_spinner_row_in_view -= 1
+
     def show_table_context_menu(self, position):
-        selected_items = self.table.selectedItems()
-        item_at_pos = self.table.itemAt(position) 
+        selected_rows = self.table.selectionModel().selectedRows()
+        index_at_pos = self.table.indexAt(position) 
 
-        if not item_at_pos and not selected_items: 
+        if not index_at_pos.isValid() and not selected_rows: 
             return
         
         row_index_in_table = -1 
-        if item_at_pos:
-            row_index_in_table = item_at_pos.row()
-        elif selected_items:
-            row_index_in_table = selected_items[0].row()
+        if index_at_pos.isValid():
+            row_index_in_table = index_at_pos.row()
+        elif selected_rows:
+            row_index_in_table = selected_rows[0].row()
 
         if row_index_in_table < 0: return
 
@@ -392,7 +439,7 @@ class AnemApp(QMainWindow):
             
         member = current_list_for_context[row_index_in_table]
         try:
-            original_member_index = self.members_list.index(member)
+            original_member_index = self.member_registry.index_of(member)
         except ValueError:
             logger.error(f"العضو {member.nin} من القائمة المفلترة غير موجود في القائمة الرئيسية.")
             self._show_toast(f"خطأ: العضو {self._get_member_display_name_with_index(member, original_member_index)} غير موجود بشكل صحيح.", type="error")
@@ -420,7 +467,7 @@ class AnemApp(QMainWindow):
         menu.addSeparator()
         
         edit_action = QAction(QIcon.fromTheme("document-edit"), f"تعديل بيانات {member_display_name_with_index}", self)
-        edit_action.triggered.connect(lambda: self.edit_member_details(self.table.item(row_index_in_table, 0))) 
+        edit_action.triggered.connect(lambda: self.edit_member_details(self.table_model.index(row_index_in_table, 0))) 
         menu.addAction(edit_action)
 
         delete_action = QAction(QIcon.fromTheme("edit-delete"), f"حذف {member_display_name_with_index}", self)
@@ -458,12 +505,8 @@ class AnemApp(QMainWindow):
             self.update_status_bar_message(f"بدء الفحص الفوري للعضو: {member_display_name}...", is_general_message=False) 
             self._show_toast(f"بدء الفحص الفوري للعضو: {member_display_name}", type="info")
             
-            self.single_check_thread = SingleMemberCheckThread(member, original_member_index, self.api_client, self.settings.copy())
-            self.single_check_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-            self.single_check_thread.new_data_fetched_signal.connect(self.update_member_name_in_table) 
-            self.single_check_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-            self.single_check_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
-            self.single_check_thread.global_log_signal.connect(self.update_status_bar_message) 
+            self.single_check_thread = SingleMemberCheckThread(member, self.api_client, self.settings.copy(), journal=self.transition_journal)
+            self.gui_update_bus.connect_worker(self.single_check_thread)
             self.single_check_thread.start()
         else:
             logger.warning(f"check_member_now: فهرس خاطئ {original_member_index}")
@@ -477,11 +520,11 @@ class AnemApp(QMainWindow):
         member = self.members_list[original_member_index]
         member_display_name = self._get_member_display_name_with_index(member, original_member_index)
 
-        if member.is_processing and self.active_download_all_pdfs_threads.get(original_member_index):
+        if member.is_processing and self.active_download_all_pdfs_threads.get(member.member_id):
             self._show_toast(f"تحميل شهادات العضو '{member_display_name}' قيد التنفيذ بالفعل.", type="warning")
             return
         
-        if self.active_download_all_pdfs_threads.get(original_member_index) and self.active_download_all_pdfs_threads[original_member_index].isRunning():
+        if self.active_download_all_pdfs_threads.get(member.member_id) and self.active_download_all_pdfs_threads[member.member_id].isRunning():
             self._show_toast(f"تحميل شهادات العضو '{member_display_name}' قيد التنفيذ بالفعل.", type="warning")
             return
 
@@ -493,30 +536,30 @@ class AnemApp(QMainWindow):
         self.update_status_bar_message(f"بدء تحميل جميع الشهادات لـ {member_display_name}...", is_general_message=False) 
         self._show_toast(f"بدء تحميل جميع الشهادات لـ {member_display_name}", type="info")
 
-        all_pdfs_thread = DownloadAllPdfsThread(member, original_member_index, self.api_client)
+        all_pdfs_thread = DownloadAllPdfsThread(member, self.api_client)
         all_pdfs_thread.all_pdfs_download_finished_signal.connect(self.handle_all_pdfs_download_finished)
         all_pdfs_thread.individual_pdf_status_signal.connect(self.handle_individual_pdf_status) 
-        all_pdfs_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-        all_pdfs_thread.member_processing_finished_signal.connect(lambda idx, ri=original_member_index: self._clear_active_download_thread(ri))
-        all_pdfs_thread.global_log_signal.connect(self.update_status_bar_message) 
+        all_pdfs_thread.member_processing_started_signal.connect(lambda member_id: self.handle_member_processing_signal(member_id, True))
+        all_pdfs_thread.member_processing_finished_signal.connect(self._clear_active_download_thread)
+        self.gui_update_bus.connect_worker(all_pdfs_thread, with_processing=False) # Started/finished stay ordered with the PDF results above
         
-        self.active_download_all_pdfs_threads[original_member_index] = all_pdfs_thread
+        self.active_download_all_pdfs_threads[member.member_id] = all_pdfs_thread
         all_pdfs_thread.start()
 
-    def _clear_active_download_thread(self, original_member_index): 
-        if original_member_index in self.active_download_all_pdfs_threads:
-            del self.active_download_all_pdfs_threads[original_member_index]
-        self.handle_member_processing_signal(original_member_index, False)
-        if 0 <= original_member_index < len(self.members_list):
-            member = self.members_list[original_member_index]
-            member_display_name = self._get_member_display_name_with_index(member, original_member_index)
+    def _clear_active_download_thread(self, member_id): 
+        if member_id in self.active_download_all_pdfs_threads:
+            del self.active_download_all_pdfs_threads[member_id]
+        self.handle_member_processing_signal(member_id, False)
+        member = self.member_registry.get(member_id)
+        if member is not None:
+            member_display_name = self._get_member_display_name_with_index(member, self.member_registry.index_of(member))
             self.update_status_bar_message(f"انتهت معالجة تحميل الشهادات للعضو: {member_display_name}", is_general_message=True)
 
 
-    def handle_individual_pdf_status(self, original_member_index, pdf_type, file_path_or_status_msg_from_thread, success, error_msg_for_toast_from_thread):
-        if not (0 <= original_member_index < len(self.members_list)):
+    def handle_individual_pdf_status(self, member_id, pdf_type, file_path_or_status_msg_from_thread, success, error_msg_for_toast_from_thread):
+        member, original_member_index = self._resolve_member_id(member_id, "handle_individual_pdf_status")
+        if member is None:
             return
-        member = self.members_list[original_member_index]
         
         pdf_type_ar = "التعهد" if pdf_type == "HonneurEngagementReport" else "الموعد"
         member_name_display = self._get_member_display_name_with_index(member, original_member_index)
@@ -540,15 +583,14 @@ class AnemApp(QMainWindow):
             self._show_toast(toast_msg, type="error", duration=6000) 
             self.update_status_bar_message(f"فشل تحميل شهادة {pdf_type_ar} للعضو {member_name_display}.", is_general_message=True) 
         
-        self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
+        self.update_member_gui_in_table(member.member_id, member.status, member.last_activity_detail, member.status_info.icon_name)
         self.save_members_data() 
 
-    def handle_all_pdfs_download_finished(self, original_member_index, honneur_path, rdv_path, overall_status_msg, all_success, first_error_msg):
-        if not (0 <= original_member_index < len(self.members_list)):
-            logger.warning(f"handle_all_pdfs_download_finished: فهرس خاطئ {original_member_index}")
+    def handle_all_pdfs_download_finished(self, member_id, honneur_path, rdv_path, overall_status_msg, all_success, first_error_msg):
+        member, original_member_index = self._resolve_member_id(member_id, "handle_all_pdfs_download_finished")
+        if member is None:
             return
 
-        member = self.members_list[original_member_index]
         member_name_display = self._get_member_display_name_with_index(member, original_member_index)
         
         if honneur_path: member.pdf_honneur_path = honneur_path 
@@ -602,7 +644,7 @@ class AnemApp(QMainWindow):
             self._show_toast(final_toast_msg, type="error", duration=7000)
             self.update_status_bar_message(f"فشل تحميل بعض شهادات العضو {member_name_display}.", is_general_message=True) 
 
-        self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
+        self.update_member_gui_in_table(member.member_id, member.status, member.last_activity_detail, member.status_info.icon_name)
         self.save_members_data() 
 
 
@@ -619,20 +661,12 @@ class AnemApp(QMainWindow):
         if confirm_delete == QMessageBox.No:
             return
         
-        removed_member_info = self.members_list.pop(original_member_index)
-        
-        if self.is_filter_active:
-            self.apply_filter_and_search() 
-        else:
-            self.update_table()
+        self._remove_members([member_to_remove])
 
         logger.info(f"تم حذف العضو: {member_display_name}")
         self.update_status_bar_message(f"تم حذف العضو: {member_display_name}", is_general_message=True) 
         self._show_toast(f"تم حذف العضو: {member_display_name}", type="info") 
         self.save_members_data() 
-        
-        if self.monitoring_thread and self.monitoring_thread.current_member_index_to_process >= len(self.members_list):
-            self.monitoring_thread.current_member_index_to_process = 0
 
     def load_app_settings(self):
         try:
@@ -658,8 +692,7 @@ class AnemApp(QMainWindow):
 
     def save_app_settings(self):
         try:
-            with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=4)
+            atomic_write_json(SETTINGS_FILE, self.settings)
             logger.info(f"تم حفظ الإعدادات في {SETTINGS_FILE}")
         except Exception as e:
             logger.exception(f"خطأ عند حفظ الإعدادات: {e}")
@@ -677,12 +710,15 @@ class AnemApp(QMainWindow):
             self.update_status_bar_message("تم تحديث الإعدادات.", is_general_message=True)
 
     def apply_app_settings(self):
+        configure_rate_governor(self.settings)
+        configure_session_pool(self.settings)
         self.api_client = AnemAPIClient(
             initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
             initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
             request_timeout=self.settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT])
         )
         logger.info("تم تحديث AnemAPIClient الرئيسي بالإعدادات الجديدة.")
+        self.update_request_rate_display(get_current_request_rate())
 
         if self.monitoring_thread.isRunning():
             logger.info("المراقبة جارية، سيتم تحديث إعدادات خيط المراقبة.")
@@ -690,12 +726,19 @@ class AnemApp(QMainWindow):
             monitoring_interval_minutes = self.settings.get(SETTING_MONITORING_INTERVAL, DEFAULT_SETTINGS[SETTING_MONITORING_INTERVAL])
             self.update_status_bar_message(f"المراقبة جارية (الدورة كل {monitoring_interval_minutes} دقيقة)...", is_general_message=False)
         else:
-            self.monitoring_thread.settings = self.settings.copy() 
-            self.monitoring_thread._apply_settings() 
+            self.monitoring_thread.update_thread_settings(self.settings.copy()) 
 
         logger.info(f"MonitoringThread settings applied from main app: Interval={self.settings.get(SETTING_MONITORING_INTERVAL)}min, MemberDelay=[{self.settings.get(SETTING_MIN_MEMBER_DELAY)}-{self.settings.get(SETTING_MAX_MEMBER_DELAY)}]s")
         logger.info("تم تطبيق الإعدادات الجديدة على مكونات التطبيق.")
 
+    def _resolve_member_id(self, member_id, context):
+        """(member, index in the member list) for a member_id carried by a thread signal, or (None, -1) once the member was deleted."""
+        member = self.member_registry.get(member_id)
+        if member is None:
+            logger.debug(f"{context}: العضو {member_id} لم يعد في القائمة (ربما حُذف أثناء المعالجة).")
+            return None, -1
+        return member, self.member_registry.index_of(member)
+
     def _get_member_display_name_with_index(self, member, original_index):
         name_part = member.get_full_name_ar()
         if not name_part or name_part.isspace():
@@ -703,33 +746,11 @@ class AnemApp(QMainWindow):
         return f"{name_part} (رقم {original_index + 1})"
 
     def _show_toast(self, message, type="info", duration=4000, member_obj=None, original_idx_if_member=None):
-        max_toast_len = 150 
-        display_message = message
-        
         if member_obj is not None and original_idx_if_member is not None:
             member_display_intro = self._get_member_display_name_with_index(member_obj, original_idx_if_member)
-            full_message_with_member = f"{member_display_intro}: {message}"
-            if len(full_message_with_member) > max_toast_len:
-                remaining_len = max_toast_len - len(member_display_intro) - 5 
-                if remaining_len > 10 : 
-                     display_message = f"{member_display_intro}: {message[:remaining_len]}..."
-                else: 
-                     display_message = f"{member_display_intro}..."
-                logger.debug(f"Toast message (with member) truncated. Original: {message}")
-            else:
-                display_message = full_message_with_member
-        elif len(message) > max_toast_len:
-            display_message = message[:max_toast_len] + "..."
-            logger.debug(f"Toast message (general) truncated. Original: {message}")
-
-        toast = ToastNotification(self)
-        self.toast_notifications.append(toast)
-        toast.showMessage(display_message, type, duration, parent_window=self)
-        toast.timer.timeout.connect(lambda t=toast: self._remove_toast_reference(t))
-
-    def _remove_toast_reference(self, toast_instance):
-        if toast_instance in self.toast_notifications:
-            self.toast_notifications.remove(toast_instance)
+            self.toast_manager.show_for_member(member_display_intro, message, type, duration)
+        else:
+            self.toast_manager.show(message, type, duration)
 
     def load_stylesheet(self):
         try:
@@ -751,15 +772,15 @@ class AnemApp(QMainWindow):
 
     def toggle_column_visibility(self, checked):
         logger.info(f"تبديل إظهار التفاصيل: {'إظهار' if checked else 'إخفاء'}")
-        self.table.setColumnHidden(self.COL_NIN, not checked)
-        self.table.setColumnHidden(self.COL_WASSIT, not checked)
-        self.table.setColumnHidden(self.COL_CCP, not checked)
-        self.table.setColumnHidden(self.COL_PHONE_NUMBER, not checked) 
+        self.table.setColumnHidden(MemberTableModel.COL_NIN, not checked)
+        self.table.setColumnHidden(MemberTableModel.COL_WASSIT, not checked)
+        self.table.setColumnHidden(MemberTableModel.COL_CCP, not checked)
+        self.table.setColumnHidden(MemberTableModel.COL_PHONE_NUMBER, not checked) 
         self.toggle_details_action.setText("إخفاء التفاصيل" if checked else "إظهار التفاصيل")
         self.update_status_bar_message(f"تم {'إظهار' if checked else 'إخفاء'} الأعمدة التفصيلية.", is_general_message=True) 
 
     def update_active_row_spinner_display(self):
-        if self.active_spinner_row_in_view == -1 or not (0 <= self.active_spinner_row_in_view < self.table.rowCount()):
+        if self.active_spinner_row_in_view == -1 or not (0 <= self.active_spinner_row_in_view < self.table_model.rowCount()):
             return
         
         current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
@@ -770,55 +791,53 @@ class AnemApp(QMainWindow):
             return
 
         member = current_list_displayed[self.active_spinner_row_in_view]
-        try:
-            original_member_index = self.members_list.index(member)
-        except ValueError: 
+        if not self.member_registry.contains(member): 
             self.row_spinner_timer.stop()
             self.active_spinner_row_in_view = -1
             return
 
         if not member.is_processing: 
-            is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(original_member_index) and \
-                                       self.active_download_all_pdfs_threads[original_member_index].isRunning()
+            is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(member.member_id) and \
+                                       self.active_download_all_pdfs_threads[member.member_id].isRunning()
             is_still_single_checking = self.single_check_thread and \
                                        self.single_check_thread.isRunning() and \
-                                       self.single_check_thread.index == original_member_index
+                                       self.single_check_thread.member is member
             
             if not is_still_pdf_downloading and not is_still_single_checking:
                 self.row_spinner_timer.stop()
                 self.active_spinner_row_in_view = -1
-            self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
+            self.update_member_gui_in_table(member.member_id, member.status, member.last_activity_detail, member.status_info.icon_name)
             return
         
         self.spinner_char_idx = (self.spinner_char_idx + 1) % len(self.spinner_chars)
         char = self.spinner_chars[self.spinner_char_idx]
         
-        icon_item_in_table = self.table.item(self.active_spinner_row_in_view, self.COL_ICON)
-        if icon_item_in_table:
-            icon_item_in_table.setText(char) 
-            icon_item_in_table.setIcon(QIcon()) 
+        self.table_model.set_spinner(self.active_spinner_row_in_view, member.member_id, char)
 
-    def handle_member_processing_signal(self, original_member_index, is_processing_now):
-        logger.debug(f"HMP Signal RECEIVED: original_idx={original_member_index}, is_processing={is_processing_now}")
-        if not (0 <= original_member_index < len(self.members_list)):
-            logger.warning(f"HMP Signal: فهرس العضو الأصلي غير صالح {original_member_index}")
+    def handle_member_processing_signal(self, member_id, is_processing_now):
+        logger.debug(f"HMP Signal RECEIVED: member_id={member_id}, is_processing={is_processing_now}")
+        member, original_member_index = self._resolve_member_id(member_id, "HMP Signal")
+        if member is None:
             return
         
-        member = self.members_list[original_member_index]
         member.is_processing = is_processing_now 
         logger.debug(f"HMP Signal: Member {member.nin} is_processing set to {member.is_processing}")
+        if not is_processing_now:
+            self.save_members_data() # Persists this visit's outcome; only changed rows are written
+            if self.monitoring_thread.isRunning():
+                self.monitoring_thread.wake() # The member may have become due while it was busy
 
         row_in_table_to_update = -1
         current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
         try:
-            row_in_table_to_update = current_list_displayed.index(member)
+            row_in_table_to_update = self.member_registry.view_row_of(member)
             logger.debug(f"HMP Signal: Member {member.nin} found at row {row_in_table_to_update} in current_list_displayed.")
         except ValueError:
             logger.debug(f"HMP Signal: العضو {member.nin} ليس في القائمة المعروضة حاليًا. لا يمكن تحديث الصف أو تحديد المؤشر.")
             return 
 
-        if not (0 <= row_in_table_to_update < self.table.rowCount()):
-            logger.warning(f"HMP Signal: فهرس الجدول المحسوب {row_in_table_to_update} خارج الحدود لـ {self.table.rowCount()} صفوف.")
+        if not (0 <= row_in_table_to_update < self.table_model.rowCount()):
+            logger.warning(f"HMP Signal: فهرس الجدول المحسوب {row_in_table_to_update} خارج الحدود لـ {self.table_model.rowCount()} صفوف.")
             return
 
         member_display_name = self._get_member_display_name_with_index(member, original_member_index)
@@ -829,20 +848,11 @@ class AnemApp(QMainWindow):
             
             self.table.selectRow(row_in_table_to_update)
             logger.debug(f"HMP Signal: Row {row_in_table_to_update} selected for {member_display_name}")
-            first_column_item = self.table.item(row_in_table_to_update, 0)
-            if first_column_item:
-                self.table.scrollToItem(first_column_item, QAbstractItemView.EnsureVisible)
-                logger.debug(f"HMP Signal: Scrolled to row {row_in_table_to_update} for {member_display_name}")
-            else:
-                logger.warning(f"HMP Signal: No item at ({row_in_table_to_update}, 0) to scroll to for {member_display_name}.")
-
-            icon_item = self.table.item(row_in_table_to_update, self.COL_ICON)
-            if icon_item:
-                icon_item.setText(self.spinner_chars[self.spinner_char_idx])
-                icon_item.setIcon(QIcon()) 
-                logger.debug(f"HMP Signal: Initial spinner char set for row {row_in_table_to_update}")
+            self.table.scrollTo(self.table_model.index(row_in_table_to_update, 0), QAbstractItemView.EnsureVisible)
+            logger.debug(f"HMP Signal: Scrolled to row {row_in_table_to_update} for {member_display_name}")
 
-            self.highlight_processing_row(row_in_table_to_update, force_processing_display=True)
+            self.table_model.set_spinner(row_in_table_to_update, member.member_id, self.spinner_chars[self.spinner_char_idx])
+            self.table_model.refresh_row(row_in_table_to_update)
             
             if not self.row_spinner_timer.isActive():
                 self.row_spinner_timer.start(self.row_spinner_timer_interval)
@@ -852,83 +862,20 @@ class AnemApp(QMainWindow):
 
         else: 
             logger.debug(f"HMP Signal: Processing FINISHED for member {member_display_name} at table row {row_in_table_to_update}")
-            is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(original_member_index) and \
-                                       self.active_download_all_pdfs_threads[original_member_index].isRunning()
+            is_still_pdf_downloading = self.active_download_all_pdfs_threads.get(member.member_id) and \
+                                       self.active_download_all_pdfs_threads[member.member_id].isRunning()
             is_still_single_checking = self.single_check_thread and \
                                        self.single_check_thread.isRunning() and \
-                                       self.single_check_thread.index == original_member_index
+                                       self.single_check_thread.member is member
             
             if not is_still_pdf_downloading and not is_still_single_checking:
                 if self.active_spinner_row_in_view == row_in_table_to_update: 
                     self.row_spinner_timer.stop()
                     self.active_spinner_row_in_view = -1
                     logger.debug(f"HMP Signal: Spinner timer stopped for row {row_in_table_to_update}")
-                    icon_item = self.table.item(row_in_table_to_update, self.COL_ICON)
-                    if icon_item: 
-                        icon_item.setText("") 
+                    self.table_model.set_spinner(row_in_table_to_update, None)
             
-            self.highlight_processing_row(row_in_table_to_update, force_processing_display=False)
-
-
-    def highlight_processing_row(self, row_index_in_table, force_processing_display=None):
-        logger.debug(f"Highlight CALLED: row_in_table={row_index_in_table}, force_processing_display={force_processing_display}")
-        if not (0 <= row_index_in_table < self.table.rowCount()):
-            logger.warning(f"Highlight: فهرس الصف {row_index_in_table} خارج الحدود.")
-            return
-        
-        current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
-        if row_index_in_table >= len(current_list_displayed): 
-            logger.warning(f"Highlight: فهرس الصف {row_index_in_table} خارج حدود القائمة المعروضة (len={len(current_list_displayed)}).")
-            return
-            
-        member = current_list_displayed[row_index_in_table]
-        is_processing_flag = force_processing_display if force_processing_display is not None else member.is_processing
-        
-        item_for_selection_check = self.table.item(row_index_in_table, 0) 
-        is_row_selected_by_user_or_code = False
-        if item_for_selection_check:
-            is_row_selected_by_user_or_code = item_for_selection_check.isSelected()
-
-        logger.debug(f"Highlight: row={row_index_in_table}, member_nin={member.nin}, effective_is_processing={is_processing_flag}, is_row_selected={is_row_selected_by_user_or_code}")
-
-        default_bg_color = self.table.palette().color(QPalette.Base) 
-        alternate_bg_color = QColor(self.table.palette().color(QPalette.AlternateBase)) if self.table.alternatingRowColors() else default_bg_color
-        processing_bg_color = QColorConstants.PROCESSING_ROW_DARK_THEME 
-        selection_bg_color_from_qss = QColor("#0078d7") 
-
-        for col in range(self.table.columnCount()):
-            item = self.table.item(row_index_in_table, col)
-            if item:
-                if is_processing_flag:
-                    logger.debug(f"Highlight: Applying processing_bg_color to row {row_index_in_table}, col {col}")
-                    item.setBackground(processing_bg_color)
-                    item.setForeground(Qt.white) 
-                elif is_row_selected_by_user_or_code: 
-                    logger.debug(f"Highlight: Row {row_index_in_table}, col {col} is selected. Applying QSS selection color.")
-                    if item.background() != selection_bg_color_from_qss:
-                         item.setBackground(selection_bg_color_from_qss)
-                    if item.foreground().color() != Qt.white: 
-                         item.setForeground(Qt.white)
-                else: 
-                    status_text_for_color = member.status
-                    specific_color = None
-                    if status_text_for_color == "مستفيد حاليًا من المنحة": specific_color = QColorConstants.BENEFITING_GREEN_DARK_THEME
-                    elif status_text_for_color == "بيانات الإدخال خاطئة": specific_color = QColorConstants.PINK_DARK_THEME
-                    elif status_text_for_color == "لديه موعد مسبق": specific_color = QColorConstants.LIGHT_BLUE_DARK_THEME
-                    elif status_text_for_color == "غير مؤهل للحجز": specific_color = QColorConstants.ORANGE_RED_DARK_THEME
-                    elif status_text_for_color == "مكتمل": specific_color = QColorConstants.LIGHT_GREEN_DARK_THEME
-                    elif "فشل" in status_text_for_color or "غير مؤهل" in status_text_for_color or "خطأ" in status_text_for_color:
-                        specific_color = QColorConstants.LIGHT_PINK_DARK_THEME
-                    elif "يتطلب تسجيل مسبق" in status_text_for_color: specific_color = QColorConstants.LIGHT_YELLOW_DARK_THEME
-                    
-                    if specific_color:
-                        item.setBackground(specific_color)
-                    else:
-                        if self.table.alternatingRowColors() and row_index_in_table % 2 != 0 :
-                            item.setBackground(alternate_bg_color)
-                        else:
-                            item.setBackground(default_bg_color)
-                    item.setForeground(self.table.palette().color(QPalette.Text))
+            self.table_model.refresh_row(row_in_table_to_update)
 
 
     def add_member(self):
@@ -944,50 +891,50 @@ class AnemApp(QMainWindow):
             if len(data["ccp"]) != 12: 
                 self._show_toast("رقم الحساب البريدي يجب أن يتكون من 12 رقمًا (10 للحساب + 2 للمفتاح).", type="error")
                 return
-            for idx, m in enumerate(self.members_list):
-                if m.nin == data["nin"] or m.wassit_no == data["wassit_no"]:
-                    member_name_display = self._get_member_display_name_with_index(m, idx)
-                    msg = f"العضو '{member_name_display}' موجود بالفعل ببيانات مشابهة." 
-                    self._show_toast(msg, type="warning")
-                    logger.warning(f"محاولة إضافة عضو مكرر: {data['nin']}/{data['wassit_no']} - {msg}")
-                    return
+            existing_member = self.member_registry.find_conflict(data["nin"], data["wassit_no"])
+            if existing_member:
+                member_name_display = self._get_member_display_name_with_index(existing_member, self.member_registry.index_of(existing_member))
+                msg = f"العضو '{member_name_display}' موجود بالفعل ببيانات مشابهة." 
+                self._show_toast(msg, type="warning")
+                logger.warning(f"محاولة إضافة عضو مكرر: {data['nin']}/{data['wassit_no']} - {msg}")
+                return
             member = Member(data["nin"], data["wassit_no"], data["ccp"], data["phone_number"])
-            self.members_list.append(member) 
+            self.member_registry.add(member) 
             
             if self.is_filter_active:
-                self.apply_filter_and_search()
+                self._sync_member_with_filter(member)
             else:
-                self.update_table() 
+                self.member_filter.refresh(member)
+                self.member_registry.append_to_view(member)
+                self.table_model.append_member(member)
+            self.save_members_data()
 
-            current_original_index = self.members_list.index(member) 
+            current_original_index = self.member_registry.index_of(member) 
             member_display_name_add = self._get_member_display_name_with_index(member, current_original_index)
             logger.info(f"تمت إضافة العضو: {member_display_name_add}, Phone={data['phone_number']}")
             self.update_status_bar_message(f"تمت إضافة العضو: {member_display_name_add}. جاري جلب المعلومات الأولية...", is_general_message=False) 
             self._show_toast(f"تمت إضافة العضو: {member_display_name_add}. جاري جلب المعلومات الأولية...", type="info") 
             
-            fetch_thread = FetchInitialInfoThread(member, current_original_index, self.api_client, self.settings.copy())
-            fetch_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-            fetch_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-            fetch_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-            fetch_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
+            fetch_thread = FetchInitialInfoThread(member, self.api_client, self.settings.copy())
+            self.gui_update_bus.connect_worker(fetch_thread)
             self.initial_fetch_threads.append(fetch_thread)
             fetch_thread.start()
 
-    def edit_member_details(self, item): 
+    def edit_member_details(self, model_index=None): 
         row_in_table = -1
-        if not item: 
+        if model_index is None or not model_index.isValid(): 
             selected_rows = self.table.selectionModel().selectedRows()
             if not selected_rows: return
             row_in_table = selected_rows[0].row() 
         else:
-            row_in_table = item.row()
+            row_in_table = model_index.row()
 
         current_list_for_edit = self.filtered_members_list if self.is_filter_active else self.members_list
         if not (0 <= row_in_table < len(current_list_for_edit)): return
 
         member_to_edit_from_display = current_list_for_edit[row_in_table]
         try:
-            original_member_index = self.members_list.index(member_to_edit_from_display)
+            original_member_index = self.member_registry.index_of(member_to_edit_from_display)
             member_to_edit = self.members_list[original_member_index] 
         except ValueError:
             member_display_name_err = self._get_member_display_name_with_index(member_to_edit_from_display, -1) 
@@ -1014,20 +961,22 @@ class AnemApp(QMainWindow):
             wassit_changed = member_to_edit.wassit_no != new_data["wassit_no"]
             
             if nin_changed or wassit_changed:
-                for idx, m in enumerate(self.members_list):
-                    if idx == original_member_index: 
-                        continue
-                    if m.nin == new_data["nin"] or m.wassit_no == new_data["wassit_no"]:
-                        conflicting_member_display = self._get_member_display_name_with_index(m, idx)
-                        self._show_toast(f"البيانات الجديدة (NIN أو رقم الوسيط) تتعارض مع العضو '{conflicting_member_display}'. لم يتم الحفظ.", type="error") 
-                        logger.warning(f"فشل تعديل العضو {member_display_name_edit_title} بسبب تكرار مع {conflicting_member_display}")
-                        return
+                conflicting_member = self.member_registry.find_conflict(new_data["nin"], new_data["wassit_no"], exclude=member_to_edit)
+                if conflicting_member:
+                    conflicting_member_display = self._get_member_display_name_with_index(conflicting_member, self.member_registry.index_of(conflicting_member))
+                    self._show_toast(f"البيانات الجديدة (NIN أو رقم الوسيط) تتعارض مع العضو '{conflicting_member_display}'. لم يتم الحفظ.", type="error") 
+                    logger.warning(f"فشل تعديل العضو {member_display_name_edit_title} بسبب تكرار مع {conflicting_member_display}")
+                    return
                 
             logger.info(f"حفظ التعديلات للعضو: {member_display_name_edit_title} -> NIN={new_data['nin']}, Phone: {new_data['phone_number']}")
             member_to_edit.nin = new_data["nin"]
             member_to_edit.wassit_no = new_data["wassit_no"]
             member_to_edit.ccp = new_data["ccp"]
             member_to_edit.phone_number = new_data["phone_number"] 
+            self.member_registry.reindex(member_to_edit)
+            member_to_edit.next_due_at = None # Edited members are rechecked right away, whatever their status
+            member_to_edit.poll_interval_seconds = None
+            member_to_edit.last_outcome_signature = None
 
             member_display_after_edit = self._get_member_display_name_with_index(member_to_edit, original_member_index) 
 
@@ -1054,24 +1003,23 @@ class AnemApp(QMainWindow):
                 member_to_edit.have_allocation = False 
                 member_to_edit.allocation_details = {}
                 
-                if self.is_filter_active: self.apply_filter_and_search()
-                else: self.update_table_row(original_member_index, member_to_edit) 
+                self._sync_member_with_filter(member_to_edit)
+                self._refresh_member_row(member_to_edit) 
                 
                 self.update_status_bar_message(f"تم تعديل بيانات العضو {member_display_after_edit}. جاري إعادة جلب المعلومات...", is_general_message=False) 
                 self._show_toast(f"تم تعديل بيانات العضو {member_display_after_edit}. جاري إعادة جلب المعلومات...", type="info") 
                 
-                fetch_thread = FetchInitialInfoThread(member_to_edit, original_member_index, self.api_client, self.settings.copy())
-                fetch_thread.update_member_gui_signal.connect(self.update_member_gui_in_table)
-                fetch_thread.new_data_fetched_signal.connect(self.update_member_name_in_table)
-                fetch_thread.member_processing_started_signal.connect(lambda idx: self.handle_member_processing_signal(idx, True))
-                fetch_thread.member_processing_finished_signal.connect(lambda idx: self.handle_member_processing_signal(idx, False))
+                fetch_thread = FetchInitialInfoThread(member_to_edit, self.api_client, self.settings.copy())
+                self.gui_update_bus.connect_worker(fetch_thread)
                 self.initial_fetch_threads.append(fetch_thread)
                 fetch_thread.start()
             else:
-                if self.is_filter_active: self.apply_filter_and_search()
-                else: self.update_table_row(original_member_index, member_to_edit) 
+                self._sync_member_with_filter(member_to_edit)
+                self._refresh_member_row(member_to_edit) 
                 self.update_status_bar_message(f"تم تعديل بيانات العضو: {member_display_after_edit}", is_general_message=True) 
                 self._show_toast(f"تم تعديل بيانات العضو: {member_display_after_edit}", type="success") 
+                if self.monitoring_thread.isRunning():
+                    self.monitoring_thread.wake()
             
             self.save_members_data()
 
@@ -1090,7 +1038,7 @@ class AnemApp(QMainWindow):
                 member_to_remove_display_obj = current_list_for_display[row_in_table]
                 original_idx_for_display_remove = -1
                 try:
-                    original_idx_for_display_remove = self.members_list.index(member_to_remove_display_obj)
+                    original_idx_for_display_remove = self.member_registry.index_of(member_to_remove_display_obj)
                 except ValueError:
                     pass 
                 member_to_remove_display_name = self._get_member_display_name_with_index(member_to_remove_display_obj, original_idx_for_display_remove)
@@ -1108,199 +1056,106 @@ class AnemApp(QMainWindow):
                 members_to_delete_from_display.append(current_list_for_display[row_in_table])
 
         deleted_count = 0 
-        for member_to_delete in members_to_delete_from_display:
-            if member_to_delete in self.members_list:
-                original_idx_before_delete = self.members_list.index(member_to_delete) 
-                deleted_member_display_name = self._get_member_display_name_with_index(member_to_delete, original_idx_before_delete)
-                self.members_list.remove(member_to_delete)
-                logger.info(f"تم حذف العضو: {deleted_member_display_name}")
-                deleted_count +=1
-            else:
-                logger.warning(f"محاولة حذف عضو {member_to_delete.nin} غير موجود في القائمة الرئيسية.")
-
-        if self.is_filter_active:
-            self.apply_filter_and_search()
-        else:
-            self.update_table()
+        for deleted_member_display_name in self._remove_members(members_to_delete_from_display):
+            logger.info(f"تم حذف العضو: {deleted_member_display_name}")
+            deleted_count +=1
         
         if deleted_count > 0: 
             self.update_status_bar_message(f"تم حذف {deleted_count} عضو/أعضاء.", is_general_message=True)
             self._show_toast(f"تم حذف {deleted_count} عضو/أعضاء بنجاح.", type="info")
         
         self.save_members_data() 
-        if self.monitoring_thread and self.monitoring_thread.current_member_index_to_process >= len(self.members_list):
-            self.monitoring_thread.current_member_index_to_process = 0
 
 
+    def _remove_members(self, members):
+        """
+        Deletes members from the registry and drops their rows from the table in place, so
+        this is safe while monitoring runs: the monitoring thread is told to skip them.
+        Returns the display names of the deleted members.
+        """
+        deleted_display_names = []
+        for member in members:
+            if not self.member_registry.contains(member):
+                logger.warning(f"محاولة حذف عضو {member.nin} غير موجود في القائمة الرئيسية.")
+                continue
+            deleted_display_names.append(self._get_member_display_name_with_index(member, self.member_registry.index_of(member)))
+            self._drop_view_row(member)
+            self.member_registry.remove(member)
+            self.member_filter.forget(member)
+            self.monitoring_thread.member_removed(member.member_id)
+            self.toast_manager.forget_member(member.member_id)
+        return deleted_display_names
+
     def update_table(self):
-        self.table.setRowCount(0) 
-        
         list_to_display = self.filtered_members_list if self.is_filter_active else self.members_list
-        
-        for row_idx, member_obj in enumerate(list_to_display):
-            self.table.insertRow(row_idx)
-            self.update_table_row(row_idx, member_obj) 
+        self.member_registry.set_view(list_to_display)
+        self.table_model.set_members(list_to_display)
         
         if not self.is_filter_active: 
             self.save_members_data() 
 
-    def update_table_row(self, row_in_table, member): 
-        item_icon = QTableWidgetItem()
-        item_icon.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row_in_table, self.COL_ICON, item_icon) 
-
-        item_full_name_ar = QTableWidgetItem(member.get_full_name_ar())
-        item_full_name_ar.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_FULL_NAME_AR, item_full_name_ar)
-
-        item_nin = QTableWidgetItem(member.nin)
-        item_nin.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_NIN, item_nin)
-
-        item_wassit = QTableWidgetItem(member.wassit_no)
-        item_wassit.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_WASSIT, item_wassit)
-
-        ccp_display = member.ccp
-        if len(member.ccp) == 12: 
-             ccp_display = f"{member.ccp[:10]} {member.ccp[10:]}"
-        item_ccp = QTableWidgetItem(ccp_display)
-        item_ccp.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_CCP, item_ccp)
-
-        item_phone = QTableWidgetItem(member.phone_number or "") 
-        item_phone.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_PHONE_NUMBER, item_phone)
-
-        item_status = QTableWidgetItem() 
-        item_status.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_STATUS, item_status) 
-
-        rdv_date_display_text = member.rdv_date if member.rdv_date else ""
-        if member.rdv_date:
-            if member.rdv_source == "system":
-                rdv_date_display_text += " (نظام)"
-            elif member.rdv_source == "discovered":
-                rdv_date_display_text += " (مكتشف)"
-        item_rdv = QTableWidgetItem(rdv_date_display_text)
-        item_rdv.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_RDV_DATE, item_rdv)
-        
-        detail_to_show = member.last_activity_detail 
-        item_details = QTableWidgetItem(detail_to_show)
-        item_details.setToolTip(member.full_last_activity_detail) 
-        item_details.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row_in_table, self.COL_DETAILS, item_details)
-
+    def _refresh_member_row(self, member):
+        member.take_unshown_fields() # The whole row is redrawn below
         try:
-            original_member_index = self.members_list.index(member)
-            self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
+            self.table_model.refresh_row(self.member_registry.view_row_of(member))
         except ValueError:
-            logger.error(f"خطأ: العضو {member.nin} غير موجود في القائمة الرئيسية عند تحديث الصف.")
-            status_item = self.table.item(row_in_table, self.COL_STATUS)
-            if status_item: status_item.setText(member.status)
-            icon_item = self.table.item(row_in_table, self.COL_ICON)
-            if icon_item:
-                qt_icon = self.style().standardIcon(getattr(QStyle, get_icon_name_for_status(member.status), QStyle.SP_CustomBase))
-                icon_item.setIcon(qt_icon)
-                icon_item.setText("")
-        
-    def update_member_gui_in_table(self, original_member_index, status_text, detail_text, icon_name_str):
-        if not (0 <= original_member_index < len(self.members_list)):
-            logger.warning(f"update_member_gui_in_table: فهرس أصلي غير صالح {original_member_index}")
+            pass # Not in the displayed (filtered) view
+
+    def update_member_gui_in_table(self, member_id, status_text, detail_text, icon_name_str):
+        member, original_member_index = self._resolve_member_id(member_id, "update_member_gui_in_table")
+        if member is None:
             return
-        
-        member = self.members_list[original_member_index]
+        unshown_fields = member.take_unshown_fields()
+        self._sync_member_with_filter(member, unshown_fields)
         
         row_in_table_to_update = -1
         current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
         try:
-            row_in_table_to_update = current_list_displayed.index(member)
+            row_in_table_to_update = self.member_registry.view_row_of(member)
         except ValueError:
             logger.debug(f"العضو {self._get_member_display_name_with_index(member, original_member_index)} ليس في القائمة المعروضة حاليًا، لا يتم تحديث واجهة المستخدم للجدول مباشرة.")
             return
 
-        if not (0 <= row_in_table_to_update < self.table.rowCount()):
+        if not (0 <= row_in_table_to_update < self.table_model.rowCount()):
              logger.warning(f"update_member_gui_in_table: فهرس الجدول المحسوب غير صالح {row_in_table_to_update}")
              return
 
-        self.table.item(row_in_table_to_update, self.COL_FULL_NAME_AR).setText(member.get_full_name_ar())
-        self.table.item(row_in_table_to_update, self.COL_NIN).setText(member.nin)
-        self.table.item(row_in_table_to_update, self.COL_WASSIT).setText(member.wassit_no)
-        ccp_display = member.ccp
-        if len(member.ccp) == 12: ccp_display = f"{member.ccp[:10]} {member.ccp[10:]}"
-        self.table.item(row_in_table_to_update, self.COL_CCP).setText(ccp_display)
-        self.table.item(row_in_table_to_update, self.COL_PHONE_NUMBER).setText(member.phone_number or "") 
-        
-        rdv_date_display_text = member.rdv_date if member.rdv_date else ""
-        if member.rdv_date:
-            if member.rdv_source == "system":
-                rdv_date_display_text += " (نظام)"
-            elif member.rdv_source == "discovered":
-                rdv_date_display_text += " (مكتشف)"
-        self.table.item(row_in_table_to_update, self.COL_RDV_DATE).setText(rdv_date_display_text)
-
-
-        detail_to_show_gui = member.last_activity_detail 
-        self.table.item(row_in_table_to_update, self.COL_DETAILS).setText(detail_to_show_gui)
-        self.table.item(row_in_table_to_update, self.COL_DETAILS).setToolTip(member.full_last_activity_detail) 
-
-        icon_item = self.table.item(row_in_table_to_update, self.COL_ICON)
-        status_text_item = self.table.item(row_in_table_to_update, self.COL_STATUS)
-        status_text_item.setText(status_text) 
-
-        if icon_item:
-            if self.active_spinner_row_in_view == row_in_table_to_update and member.is_processing:
-                icon_item.setIcon(QIcon()) 
-            else:
-                qt_icon = self.style().standardIcon(getattr(QStyle, icon_name_str, QStyle.SP_CustomBase))
-                icon_item.setIcon(qt_icon)
-                icon_item.setText("") 
-        
-        self.highlight_processing_row(row_in_table_to_update, force_processing_display=None) 
+        self.table_model.refresh_fields(row_in_table_to_update, unshown_fields)
 
-        msg_attr_prefix = f"_toast_shown_{original_member_index}_" 
         if not self.suppress_initial_messages: 
-            member_display_for_toast = self._get_member_display_name_with_index(member, original_member_index)
-            current_status_for_toast = status_text 
+            # An error status is announced once per member and status; success again after
+            # the member went through any other status.
+            toast_flags = self.toast_manager.member_flags(member_id)
+            status_info = member.status_info
             
-            if "فشل" in current_status_for_toast or "خطأ" in current_status_for_toast or "غير مؤهل" in current_status_for_toast:
-                error_attr = msg_attr_prefix + current_status_for_toast.replace(" ", "_") 
-                if not hasattr(self, error_attr) or not getattr(self, error_attr):
+            if status_info.is_error:
+                if status_text not in toast_flags:
                     self._show_toast(f"{member.full_last_activity_detail}", type="error", duration=5000, member_obj=member, original_idx_if_member=original_member_index)
-                    setattr(self, error_attr, True)
-                    for attr_suffix in ["input_error", "has_rdv", "booking_ineligible", "completed_or_benefiting", "success_generic"]:
-                        if hasattr(self, msg_attr_prefix + attr_suffix):
-                            delattr(self, msg_attr_prefix + attr_suffix)
-            elif current_status_for_toast == "مكتمل" or current_status_for_toast == "مستفيد حاليًا من المنحة" or current_status_for_toast == "تم الحجز":
-                success_attr = msg_attr_prefix + "success_generic"
-                if not hasattr(self, success_attr) or not getattr(self, success_attr):
+                    toast_flags.add(status_text)
+                    toast_flags.discard("success")
+            elif status_info.is_success:
+                if "success" not in toast_flags:
                     self._show_toast(f"{detail_text}", type="success", duration=5000, member_obj=member, original_idx_if_member=original_member_index)
-                    setattr(self, success_attr, True)
-                    for attr_suffix in ["input_error", "has_rdv", "booking_ineligible", "error_generic"]:
-                         if hasattr(self, msg_attr_prefix + attr_suffix):
-                            delattr(self, msg_attr_prefix + attr_suffix)
+                    toast_flags.add("success")
             else: 
-                for attr_suffix in ["input_error", "has_rdv", "booking_ineligible", "completed_or_benefiting", "success_generic", "error_generic"] + [current_status_for_toast.replace(" ", "_")]:
-                    if hasattr(self, msg_attr_prefix + attr_suffix):
-                        delattr(self, msg_attr_prefix + attr_suffix)
+                toast_flags.discard("success")
         
-    def update_member_name_in_table(self, original_member_index, nom_ar, prenom_ar): 
-        if 0 <= original_member_index < len(self.members_list):
-            member = self.members_list[original_member_index]
+    def update_member_name_in_table(self, member_id, nom_ar, prenom_ar): 
+        member, original_member_index = self._resolve_member_id(member_id, "update_member_name_in_table")
+        if member is not None:
             member.nom_ar = nom_ar
             member.prenom_ar = prenom_ar
+            unshown_fields = member.take_unshown_fields()
+            self._sync_member_with_filter(member, unshown_fields)
             member_display_name = self._get_member_display_name_with_index(member, original_member_index)
             logger.info(f"تحديث اسم ولقب العضو (عربي) {member_display_name}")
             
             row_in_table_to_update = -1
             current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
             try:
-                row_in_table_to_update = current_list_displayed.index(member)
-                if 0 <= row_in_table_to_update < self.table.rowCount():
-                    full_name_item = self.table.item(row_in_table_to_update, self.COL_FULL_NAME_AR)
-                    if full_name_item: 
-                        full_name_item.setText(member.get_full_name_ar())
+                row_in_table_to_update = self.member_registry.view_row_of(member)
+                if 0 <= row_in_table_to_update < self.table_model.rowCount():
+                    self.table_model.refresh_fields(row_in_table_to_update, unshown_fields)
                     if not self.suppress_initial_messages:
                         self._show_toast(f"تم تحديث اسم العضو.", type="info", member_obj=member, original_idx_if_member=original_member_index)
             except ValueError:
@@ -1310,6 +1165,8 @@ class AnemApp(QMainWindow):
 
     def update_status_bar_message(self, message, is_general_message=True, member_obj=None, original_idx_if_member=None):
         final_message = message
+        if member_obj is not None and original_idx_if_member is None and self.member_registry.contains(member_obj):
+            original_idx_if_member = self.member_registry.index_of(member_obj)
         if member_obj and original_idx_if_member is not None and original_idx_if_member >= 0: 
             member_display = self._get_member_display_name_with_index(member_obj, original_idx_if_member)
             final_message = f"{member_display}: {message}"
@@ -1336,6 +1193,10 @@ class AnemApp(QMainWindow):
             self.countdown_label.setText(time_remaining_str)
 
 
+    def update_request_rate_display(self, requests_per_second):
+        if hasattr(self, 'request_rate_label'):
+            self.request_rate_label.setText(f"معدل الطلبات: {requests_per_second:.2f}/ث")
+
     def start_monitoring(self):
         if not self.members_list:
             self._show_toast("يرجى إضافة أعضاء أولاً لبدء المراقبة.", type="warning") 
@@ -1345,14 +1206,11 @@ class AnemApp(QMainWindow):
             self.monitoring_thread.members_list_ref = self.members_list 
             self.monitoring_thread.is_running = True
             self.monitoring_thread.is_connection_lost_mode = False 
-            self.monitoring_thread.current_member_index_to_process = 0 
             self.monitoring_thread.consecutive_network_error_trigger_count = 0 
             self.monitoring_thread.update_thread_settings(self.settings.copy()) 
             self.monitoring_thread.start()
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
-            self.add_member_button.setEnabled(False) 
-            self.remove_member_button.setEnabled(False)
             monitoring_interval_minutes = self.settings.get(SETTING_MONITORING_INTERVAL, DEFAULT_SETTINGS[SETTING_MONITORING_INTERVAL])
             self.update_status_bar_message(f"بدأت المراقبة (الدورة كل {monitoring_interval_minutes} دقيقة)...", is_general_message=False) 
             self._show_toast(f"بدأت المراقبة (الدورة كل {monitoring_interval_minutes} دقيقة).", type="info")
@@ -1367,17 +1225,14 @@ class AnemApp(QMainWindow):
             self.monitoring_thread.stop_monitoring() 
             if self.row_spinner_timer.isActive():
                 self.row_spinner_timer.stop()
-                if self.active_spinner_row_in_view != -1 and self.active_spinner_row_in_view < self.table.rowCount(): 
+                if self.active_spinner_row_in_view != -1 and self.active_spinner_row_in_view < self.table_model.rowCount(): 
                     current_list_displayed = self.filtered_members_list if self.is_filter_active else self.members_list
                     if self.active_spinner_row_in_view < len(current_list_displayed):
                         member_at_spinner = current_list_displayed[self.active_spinner_row_in_view]
-                        try:
-                            original_member_index = self.members_list.index(member_at_spinner)
-                            if 0 <= original_member_index < len(self.members_list):
-                                member = self.members_list[original_member_index]
-                                member.is_processing = False 
-                                self.update_member_gui_in_table(original_member_index, member.status, member.last_activity_detail, get_icon_name_for_status(member.status))
-                        except ValueError:
+                        if self.member_registry.contains(member_at_spinner):
+                            member_at_spinner.is_processing = False 
+                            self.update_member_gui_in_table(member_at_spinner.member_id, member_at_spinner.status, member_at_spinner.last_activity_detail, member_at_spinner.status_info.icon_name)
+                        else:
                              logger.warning(f"StopMonitoring: لم يتم العثور على العضو في active_spinner_row_in_view ({self.active_spinner_row_in_view}) في القائمة الرئيسية.")
                     else:
                         logger.warning(f"StopMonitoring: active_spinner_row_in_view ({self.active_spinner_row_in_view}) خارج حدود current_list_displayed.")
@@ -1385,15 +1240,13 @@ class AnemApp(QMainWindow):
 
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
-            self.add_member_button.setEnabled(True)
-            self.remove_member_button.setEnabled(True)
             self.update_status_bar_message("تم إيقاف المراقبة بنجاح.", is_general_message=True) 
             self._show_toast("تم إيقاف المراقبة.", type="info")
             self.update_countdown_timer_display("") # Clear countdown on stop
-            for i in range(len(self.members_list)):
-                if self.members_list[i].is_processing: 
-                    self.members_list[i].is_processing = False
-                    self.update_member_gui_in_table(i, self.members_list[i].status, self.members_list[i].last_activity_detail, get_icon_name_for_status(self.members_list[i].status))
+            for member in self.members_list:
+                if member.is_processing: 
+                    member.is_processing = False
+                    self.update_member_gui_in_table(member.member_id, member.status, member.last_activity_detail, member.status_info.icon_name)
         else:
             logger.info("المراقبة ليست جارية.")
             self._show_toast("المراقبة ليست جارية حاليًا.", type="info") 
@@ -1402,89 +1255,97 @@ class AnemApp(QMainWindow):
     def load_members_data(self):
         self.suppress_initial_messages = True 
         try:
-            if os.path.exists(DATA_FILE):
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    data_list = json.load(f)
-                    self.members_list = [Member.from_dict(data) for data in data_list]
-                    for member in self.members_list:
-                        member.is_processing = False
-                self.filtered_members_list = list(self.members_list) 
-                self.update_table() 
-                logger.info(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DATA_FILE}")
-                self.update_status_bar_message(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DATA_FILE}", is_general_message=True)
+            migrated_count = self.member_store.migrate_from_json(DATA_FILE)
+            if migrated_count:
+                self.update_status_bar_message(f"تم ترحيل بيانات {migrated_count} أعضاء من {DATA_FILE} إلى {DB_FILE}", is_general_message=True)
+            self.member_registry.reset(self.member_store.load_members())
+            self.member_filter.rebuild(self.members_list)
+            self.filtered_members_list = list(self.members_list) 
+            self.update_table() 
+            if self.members_list:
+                logger.info(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DB_FILE}")
+                self.update_status_bar_message(f"تم تحميل بيانات {len(self.members_list)} أعضاء من {DB_FILE}", is_general_message=True)
             else:
-                self.members_list = []
-                self.filtered_members_list = []
-                self.update_table() 
-                logger.info(f"ملف البيانات {DATA_FILE} غير موجود، سيبدأ البرنامج بقائمة فارغة.")
-                self.update_status_bar_message(f"ملف البيانات {DATA_FILE} غير موجود. يمكنك إضافة أعضاء جدد.", is_general_message=True) 
-        except json.JSONDecodeError:
-            logger.error(f"خطأ في قراءة ملف البيانات {DATA_FILE}. قد يكون الملف تالفًا.")
+                logger.info(f"لا يوجد أعضاء في {DB_FILE}، سيبدأ البرنامج بقائمة فارغة.")
+                self.update_status_bar_message(f"لا يوجد أعضاء محفوظون. يمكنك إضافة أعضاء جدد.", is_general_message=True) 
+        except (json.JSONDecodeError, KeyError):
+            logger.error(f"خطأ في قراءة ملف البيانات {DATA_FILE}. قد يكون الملف تالفًا. تم إيقاف الحفظ في هذه الجلسة وترك الملف كما هو.")
+            # Like any other load failure: saving members added now would mark the store as
+            # in use, and the legacy file would never be migrated once it is repaired.
+            self.members_persistence_enabled = False 
             self.update_status_bar_message(f"خطأ في قراءة ملف البيانات {DATA_FILE}. يرجى التحقق من الملف.", is_general_message=True) 
-            self._show_toast(f"خطأ في ملف البيانات {DATA_FILE}. قد يكون الملف تالفًا. تم بدء البرنامج بقائمة فارغة.", type="error", duration=6000) 
-            self.members_list = []
+            self._show_toast(f"خطأ في ملف البيانات {DATA_FILE}. قد يكون الملف تالفًا. تم بدء البرنامج بقائمة فارغة ولن يتم حفظ التغييرات في هذه الجلسة.", type="error", duration=6000) 
+            self.member_registry.reset([])
             self.filtered_members_list = []
             self.update_table()
         except Exception as e:
             logger.exception(f"خطأ غير متوقع عند تحميل البيانات: {e}")
+            # Saving the empty fallback list would delete the stored members.
+            self.members_persistence_enabled = False 
             self.update_status_bar_message(f"خطأ غير متوقع عند تحميل البيانات: {e}", is_general_message=True)
-            self._show_toast(f"خطأ غير متوقع عند تحميل البيانات: {e}", type="error", duration=6000) 
-            self.members_list = []
+            self._show_toast(f"خطأ غير متوقع عند تحميل البيانات: {e}. لن يتم حفظ التغييرات في هذه الجلسة.", type="error", duration=6000) 
+            self.member_registry.reset([])
             self.filtered_members_list = []
             self.update_table()
         finally:
             QTimer.singleShot(200, lambda: setattr(self, 'suppress_initial_messages', False)) 
 
     def save_members_data(self):
-        try:
-            data_to_save = []
-            for member in self.members_list: 
-                member_dict = member.to_dict()
-                member_dict['is_processing'] = False 
-                data_to_save.append(member_dict)
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
-            logger.debug(f"تم حفظ بيانات الأعضاء في {DATA_FILE}") 
-        except Exception as e:
-            logger.exception(f"خطأ عند حفظ البيانات: {e}")
-            self.update_status_bar_message(f"خطأ عند حفظ البيانات: {e}", is_general_message=True)
-            self._show_toast(f"فشل حفظ بيانات الأعضاء: {e}", type="error") 
+        # Queued to the persistence worker: bursts of changes become one write off the GUI thread.
+        if self.members_persistence_enabled:
+            self.persistence_worker.request_save()
+
+    def _write_members_data(self):
+        # Runs on the persistence worker thread; only changed members are written.
+        self.member_store.sync_members(self.members_list)
+
+    def handle_members_save_failed(self, error_message):
+        self.update_status_bar_message(f"خطأ عند حفظ البيانات: {error_message}", is_general_message=True)
+        self._show_toast(f"فشل حفظ بيانات الأعضاء: {error_message}", type="error") 
 
     def closeEvent(self, event):
         logger.info("إغلاق التطبيق...")
         self.update_status_bar_message("جاري إغلاق التطبيق...", is_general_message=True) 
+
+        # Ask every worker to stop first so they all wind down together, then join them
+        # against one shared deadline: a worker stuck in a retry backoff delays the
+        # close by SHUTDOWN_GRACE_SECONDS at most.
+        workers_to_join = [] # (thread, description)
         if self.monitoring_thread.isRunning():
             logger.info("إيقاف المراقبة قبل الإغلاق...")
             self.monitoring_thread.stop_monitoring() 
-            if not self.monitoring_thread.wait(3000): 
-                logger.warning("خيط المراقبة لم ينتهِ في الوقت المناسب.")
-        
-        self.save_members_data() 
-        self.save_app_settings() 
-        
-        logger.info("انتظار إنهاء خيوط الجلب الأولي...")
+            workers_to_join.append((self.monitoring_thread, "خيط المراقبة"))
         for thread in self.initial_fetch_threads:
             if thread.isRunning():
-                thread.quit() # Request thread to exit
-                if not thread.wait(2000): # Wait for 2 seconds
-                    logger.warning(f"الخيط {thread} لم ينتهِ في الوقت المناسب عند الإغلاق.")
-        
+                thread.stop()
+                workers_to_join.append((thread, f"خيط الجلب الأولي {thread}"))
         if self.single_check_thread and self.single_check_thread.isRunning():
             logger.info("إيقاف خيط الفحص الفردي قبل الإغلاق...")
-            self.single_check_thread.quit() # Request thread to exit
-            if not self.single_check_thread.wait(1000): # Wait for 1 second
-                 logger.warning("خيط الفحص الفردي لم ينته في الوقت المناسب.")
-        
-        active_pdf_dl_threads_copy = list(self.active_download_all_pdfs_threads.values())
+            self.single_check_thread.stop()
+            workers_to_join.append((self.single_check_thread, "خيط الفحص الفردي"))
+        active_pdf_dl_threads_copy = [thread for thread in self.active_download_all_pdfs_threads.values() if thread.isRunning()]
         if active_pdf_dl_threads_copy:
             logger.info(f"إيقاف {len(active_pdf_dl_threads_copy)} خيوط تحميل PDF نشطة...")
             for pdf_thread in active_pdf_dl_threads_copy:
-                if pdf_thread.isRunning():
-                    pdf_thread.stop() # Assuming DownloadAllPdfsThread has a stop() method
-                    if not pdf_thread.wait(2000): # Wait for 2 seconds
-                        logger.warning(f"خيط تحميل جميع ملفات PDF {pdf_thread} لم ينتهِ في الوقت المناسب.")
-            self.active_download_all_pdfs_threads.clear()
-
+                pdf_thread.stop()
+                workers_to_join.append((pdf_thread, f"خيط تحميل جميع ملفات PDF {pdf_thread}"))
+        self.active_download_all_pdfs_threads.clear()
+
+        logger.info(f"انتظار إنهاء {len(workers_to_join)} خيوط عاملة...")
+        deadline = time.monotonic() + SHUTDOWN_GRACE_SECONDS
+        for thread, description in workers_to_join:
+            if not thread.wait(max(0, int((deadline - time.monotonic()) * 1000))):
+                logger.warning(f"{description} لم ينتهِ في الوقت المناسب عند الإغلاق.")
+        # The stage pipeline's workers outlive the monitoring thread when it is cut short.
+        if not self.monitoring_thread.join_workers(max(0.0, deadline - time.monotonic())):
+            logger.warning("بعض عمال خط المعالجة لم ينتهوا في الوقت المناسب؛ قد لا تُحفظ آخر تغييراتهم.")
+
+        # Only after the workers: a member changed after the final flush would be lost.
+        if self.members_persistence_enabled:
+            self.persistence_worker.flush() # Writes whatever is still pending before the store closes
+        self.member_store.close()
+        self.transition_journal.close()
+        self.save_app_settings() 
 
         if self.datetime_timer.isActive(): self.datetime_timer.stop()
         if self.row_spinner_timer.isActive(): self.row_spinner_timer.stop() 
@@ -1,8 +1,48 @@
 # member.py
+import uuid
+import threading
 from config import MAX_ERROR_DISPLAY_LENGTH
+from statuses import STATUS_NEW, STATUS_INFOS, status_info_for_text
+
+# Attributes written by to_dict(); setting one of them records it as changed.
+PERSISTED_FIELDS = frozenset([
+    'member_id', 'nin', 'wassit_no', 'ccp', 'phone_number', 'nom_fr', 'prenom_fr', 'nom_ar', 'prenom_ar',
+    'pre_inscription_id', 'demandeur_id', 'structure_id', 'status', 'last_activity_detail',
+    'full_last_activity_detail', 'rdv_date', 'rdv_id', 'rdv_source', 'pdf_honneur_path', 'pdf_rdv_path',
+    'has_actual_pre_inscription', 'already_has_rdv', 'consecutive_failures', 'next_due_at',
+    'poll_interval_seconds', 'last_outcome_signature', 'have_allocation', 'allocation_details'
+])
+
+# Persisted attributes that from_dict() copies straight from the stored dict, with their defaults.
+_PLAIN_FIELD_DEFAULTS = (
+    ('phone_number', ""), ('nom_fr', ""), ('prenom_fr', ""), ('nom_ar', ""), ('prenom_ar', ""),
+    ('pre_inscription_id', None), ('demandeur_id', None), ('structure_id', None),
+    ('rdv_date', None), ('rdv_id', None), ('pdf_honneur_path', None), ('pdf_rdv_path', None),
+    ('has_actual_pre_inscription', False), ('already_has_rdv', False), ('consecutive_failures', 0),
+    ('next_due_at', None), ('poll_interval_seconds', None), ('last_outcome_signature', None),
+    ('have_allocation', False)
+)
+
+_NO_CHANGES = frozenset()
+_UNSET = object()
+# Guards the read-modify-write of every member's change sets; held only for a set union.
+_changes_lock = threading.Lock()
 
 class Member:
+    # Slots instead of a per-instance __dict__: large member lists are mostly these objects.
+    __slots__ = (
+        'member_id', 'nin', 'wassit_no', 'ccp', 'phone_number', 'nom_fr', 'prenom_fr', 'nom_ar', 'prenom_ar',
+        'pre_inscription_id', 'demandeur_id', 'structure_id', '_status_info', 'last_activity_detail',
+        'full_last_activity_detail', 'rdv_date', 'rdv_id', 'rdv_source', 'pdf_honneur_path', 'pdf_rdv_path',
+        'is_processing', 'has_actual_pre_inscription', 'already_has_rdv', 'consecutive_failures', 'next_due_at',
+        'poll_interval_seconds', 'last_outcome_signature', 'have_allocation', 'allocation_details',
+        '_changed_fields', '_unshown_fields'
+    )
+
     def __init__(self, nin, wassit_no, ccp, phone_number=""):
+        self._changed_fields = PERSISTED_FIELDS # New members have not been stored or shown yet
+        self._unshown_fields = PERSISTED_FIELDS
+        self.member_id = uuid.uuid4().hex # Stable key in the member store
         self.nin = nin
         self.wassit_no = wassit_no
         self.ccp = ccp
@@ -14,7 +54,7 @@ class Member:
         self.pre_inscription_id = None
         self.demandeur_id = None
         self.structure_id = None
-        self.status = "جديد"  # Default status for a new member
+        self._status_info = STATUS_INFOS[STATUS_NEW]  # Default status for a new member
         self.last_activity_detail = "" 
         self.full_last_activity_detail = "" 
         self.rdv_date = None
@@ -26,16 +66,98 @@ class Member:
         self.has_actual_pre_inscription = False 
         self.already_has_rdv = False 
         self.consecutive_failures = 0 
+        self.next_due_at = None # Wall-clock time of the next monitoring visit; None = due now
+        self.poll_interval_seconds = None # Current adaptive recheck period; None = not scheduled yet
+        self.last_outcome_signature = None # Status/detail of the last visit, to detect repeated outcomes
         
         self.have_allocation = False 
-        self.allocation_details = {} 
+        self.allocation_details = None # Only filled for current beneficiaries
+
+    def __setattr__(self, name, value):
+        if name not in PERSISTED_FIELDS:
+            object.__setattr__(self, name, value)
+            return
+        old_value = getattr(self, name, _UNSET)
+        object.__setattr__(self, name, value)
+        # Re-setting an equal value is not a change (dicts may have been edited in place).
+        if old_value == value and not isinstance(value, dict):
+            return
+        # Two independent change sets: fields not yet written to the store and fields the
+        # GUI has not redrawn yet. Worker threads and the consumers that take the sets run
+        # concurrently, so every update and take happens under _changes_lock.
+        with _changes_lock:
+            changed = self._changed_fields
+            if name not in changed:
+                object.__setattr__(self, '_changed_fields', changed | {name})
+            unshown = self._unshown_fields
+            if name not in unshown:
+                object.__setattr__(self, '_unshown_fields', unshown | {name})
+
+    # The status lives in one slot holding its StatusInfo: the shared catalog entry, or for
+    # a text outside the catalog a STATUS_OTHER entry that carries the text. One reference
+    # swap, so readers on other threads never see a code and a text that disagree.
+    @property
+    def status(self):
+        return self._status_info.text
+
+    @status.setter
+    def status(self, value):
+        object.__setattr__(self, '_status_info', status_info_for_text(value))
+
+    @property
+    def status_code(self):
+        """The status as a statuses.STATUS_* code; cheaper to compare than the text."""
+        return self._status_info.code
+
+    @property
+    def status_info(self):
+        """Icon, color and category flags of the current status (statuses.StatusInfo)."""
+        return self._status_info
+
+    @property
+    def is_dirty(self):
+        return bool(self._changed_fields)
+
+    @property
+    def changed_fields(self):
+        """Persisted fields set since the store last saved the member."""
+        return self._changed_fields
 
+    def mark_clean(self):
+        with _changes_lock:
+            object.__setattr__(self, '_changed_fields', _NO_CHANGES)
+
+    def take_changed_fields(self):
+        """Returns the fields changed since the last call (or mark_clean) and starts a new set."""
+        with _changes_lock:
+            changed = self._changed_fields
+            object.__setattr__(self, '_changed_fields', _NO_CHANGES)
+        return changed
+
+    def restore_changed_fields(self, fields):
+        """Gives back fields taken by take_changed_fields() whose write failed."""
+        with _changes_lock:
+            object.__setattr__(self, '_changed_fields', self._changed_fields | fields)
+
+    def take_unshown_fields(self):
+        """Like take_changed_fields, for the GUI: fields set since the table last drew them."""
+        with _changes_lock:
+            unshown = self._unshown_fields
+            object.__setattr__(self, '_unshown_fields', _NO_CHANGES)
+        return unshown
+
+    def persisted_value(self, name):
+        """The value to_dict() writes for one persisted field."""
+        if name == 'allocation_details':
+            return self.allocation_details or {}
+        return getattr(self, name)
 
     def get_full_name_ar(self):
         return f"{self.nom_ar or ''} {self.prenom_ar or ''}".strip()
 
     def to_dict(self):
         return {
+            'member_id': self.member_id,
             'nin': self.nin,
             'wassit_no': self.wassit_no,
             'ccp': self.ccp,
@@ -47,7 +169,7 @@ class Member:
             'pre_inscription_id': self.pre_inscription_id,
             'demandeur_id': self.demandeur_id,
             'structure_id': self.structure_id,
-            'status': self.status,
+            'status': self._status_info.text,
             'last_activity_detail': self.last_activity_detail,
             'full_last_activity_detail': self.full_last_activity_detail,
             'rdv_date': self.rdv_date,
@@ -58,45 +180,46 @@ class Member:
             'has_actual_pre_inscription': self.has_actual_pre_inscription,
             'already_has_rdv': self.already_has_rdv,
             'consecutive_failures': self.consecutive_failures,
+            'next_due_at': self.next_due_at,
+            'poll_interval_seconds': self.poll_interval_seconds,
+            'last_outcome_signature': self.last_outcome_signature,
             'have_allocation': self.have_allocation, 
-            'allocation_details': self.allocation_details 
+            'allocation_details': self.allocation_details or {}
         }
 
     @classmethod
     def from_dict(cls, data):
-        member = cls(data['nin'], data['wassit_no'], data['ccp'], data.get('phone_number', ""))
-        member.nom_fr = data.get('nom_fr', "")
-        member.prenom_fr = data.get('prenom_fr', "")
-        member.nom_ar = data.get('nom_ar', "")
-        member.prenom_ar = data.get('prenom_ar', "")
-        member.pre_inscription_id = data.get('pre_inscription_id')
-        member.demandeur_id = data.get('demandeur_id')
-        member.structure_id = data.get('structure_id')
-        member.status = data.get('status', "جديد")
-        member.full_last_activity_detail = data.get('full_last_activity_detail', data.get('last_activity_detail', "")) 
-        member.last_activity_detail = data.get('last_activity_detail', "")
-        if not member.last_activity_detail and member.full_last_activity_detail:
-            if len(member.full_last_activity_detail) > MAX_ERROR_DISPLAY_LENGTH:
-                member.last_activity_detail = member.full_last_activity_detail[:MAX_ERROR_DISPLAY_LENGTH] + "..."
+        # Fills the slots directly: no __init__ (and no throwaway uuid), no dirty tracking per field.
+        member = cls.__new__(cls)
+        set_slot = object.__setattr__
+        set_slot(member, 'member_id', data.get('member_id') or uuid.uuid4().hex)
+        set_slot(member, 'nin', data['nin'])
+        set_slot(member, 'wassit_no', data['wassit_no'])
+        set_slot(member, 'ccp', data['ccp'])
+        for name, default in _PLAIN_FIELD_DEFAULTS:
+            set_slot(member, name, data.get(name, default))
+        set_slot(member, '_status_info', status_info_for_text(data.get('status', "جديد")))
+
+        full_detail = data.get('full_last_activity_detail', data.get('last_activity_detail', ""))
+        detail = data.get('last_activity_detail', "")
+        if not detail and full_detail:
+            if len(full_detail) > MAX_ERROR_DISPLAY_LENGTH:
+                detail = full_detail[:MAX_ERROR_DISPLAY_LENGTH] + "..."
             else:
-                member.last_activity_detail = member.full_last_activity_detail
-        
-        member.rdv_date = data.get('rdv_date')
-        member.rdv_id = data.get('rdv_id')
-        
+                detail = full_detail
+        set_slot(member, 'full_last_activity_detail', full_detail)
+        set_slot(member, 'last_activity_detail', detail)
+
         # Logic for rdv_source during loading
-        member.rdv_source = data.get('rdv_source') 
-        if member.rdv_date and member.rdv_source is None: # If date exists but source wasn't in JSON
-            member.rdv_source = "discovered"
-
-        member.pdf_honneur_path = data.get('pdf_honneur_path')
-        member.pdf_rdv_path = data.get('pdf_rdv_path')
-        member.has_actual_pre_inscription = data.get('has_actual_pre_inscription', False)
-        member.already_has_rdv = data.get('already_has_rdv', False)
-        member.consecutive_failures = data.get('consecutive_failures', 0)
-        member.is_processing = False 
-        member.have_allocation = data.get('have_allocation', False)
-        member.allocation_details = data.get('allocation_details', {})
+        rdv_source = data.get('rdv_source') 
+        if member.rdv_date and rdv_source is None: # If date exists but source wasn't in JSON
+            rdv_source = "discovered"
+        set_slot(member, 'rdv_source', rdv_source)
+
+        set_slot(member, 'allocation_details', data.get('allocation_details') or None)
+        set_slot(member, 'is_processing', False)
+        set_slot(member, '_changed_fields', PERSISTED_FIELDS) # Like a new member until the store marks it clean
+        set_slot(member, '_unshown_fields', PERSISTED_FIELDS)
         return member
 
     def set_activity_detail(self, detail_message, is_error=False):
@@ -128,3 +251,4 @@ class Member:
                      self.last_activity_detail = self.full_last_activity_detail
         else:
             self.last_activity_detail = self.full_last_activity_detail
+
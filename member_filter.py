@@ -0,0 +1,70 @@
+# member_filter.py
+from search_index import MemberSearchIndex, normalize_search_text
+
+
+class MemberFilter:
+    """
+    The search/filter criteria of the members grid on top of a MemberSearchIndex. Search
+    text is normalized the same way as the indexed fields, so "احمد" finds "أحمد" and
+    "helene" finds "Hélène"; every word typed has to match one of the member's fields.
+    The index is kept current through refresh() and forget() as members change.
+    """
+
+    def __init__(self):
+        self.search_term = ""
+        self.search_words = []
+        self.filter_key = None
+        self.filter_value = None
+        self._index = MemberSearchIndex()
+
+    def set_criteria(self, search_term, filter_key, filter_value):
+        self.search_term = search_term.strip()
+        self.search_words = list(dict.fromkeys(normalize_search_text(self.search_term).split()))
+        self.filter_key = filter_key
+        self.filter_value = filter_value
+
+    @property
+    def is_active(self):
+        return bool(self.search_words or (self.filter_key and self.filter_value is not None))
+
+    def rebuild(self, members):
+        self._index.rebuild(members)
+
+    def refresh(self, member):
+        """Call after a member was added or its searchable fields may have changed."""
+        self._index.update(member)
+
+    def forget(self, member):
+        self._index.remove(member)
+
+    def matches(self, member):
+        if self.search_words and not self._index.matches(member, self.search_words):
+            return False
+        return self._matches_filter(member)
+
+    def filter(self, members, position_of=None):
+        """
+        Matching members in list order. With a search term and position_of (member ->
+        list position), only the index hits are visited instead of the whole list.
+        """
+        if not self.search_words:
+            return [member for member in members if self._matches_filter(member)]
+        if position_of is None:
+            return [member for member in members if self.matches(member)]
+        hits = [member for member in self._index.search(self.search_words) if self._matches_filter(member)]
+        hits.sort(key=position_of)
+        return hits
+
+    def _matches_filter(self, member):
+        if self.filter_key and self.filter_value is not None:
+            if self.filter_key == "status":
+                return member.status == self.filter_value
+            if self.filter_key == "has_rdv":
+                return member.already_has_rdv == self.filter_value
+            if self.filter_key == "have_allocation":
+                return member.have_allocation == self.filter_value
+            if self.filter_key == "pdf_honneur":
+                return bool(member.pdf_honneur_path) == self.filter_value
+            if self.filter_key == "pdf_rdv":
+                return bool(member.pdf_rdv_path) == self.filter_value
+        return True
@@ -0,0 +1,127 @@
+# member_registry.py
+
+
+class MemberRegistry:
+    """
+    The ordered member list plus hash indexes over it: by member_id, NIN and wassit
+    number, each member's position in the list, and its row in the currently displayed
+    (possibly filtered) view. Lookups that used to scan the list are O(1).
+
+    `members` is the list itself and is shared with the monitoring thread, so it is only
+    ever changed in place, through add(), remove() and reset().
+    """
+
+    def __init__(self):
+        self.members = []
+        self._by_id = {}
+        self._positions = {} # member_id -> index in self.members
+        self._ids_by_nin = {} # NIN -> set of member_ids (legacy data may hold duplicates)
+        self._ids_by_wassit = {}
+        self._keys_by_id = {} # member_id -> (nin, wassit_no) as currently indexed
+        self._view_rows = {} # member_id -> row in the displayed view
+
+    def reset(self, members):
+        self.members[:] = members
+        self._by_id.clear()
+        self._positions.clear()
+        self._ids_by_nin.clear()
+        self._ids_by_wassit.clear()
+        self._keys_by_id.clear()
+        self._view_rows.clear()
+        for position, member in enumerate(self.members):
+            self._by_id[member.member_id] = member
+            self._positions[member.member_id] = position
+            self._index_keys(member)
+
+    def add(self, member):
+        self._positions[member.member_id] = len(self.members)
+        self.members.append(member)
+        self._by_id[member.member_id] = member
+        self._index_keys(member)
+
+    def remove(self, member):
+        position = self.index_of(member)
+        del self.members[position]
+        del self._by_id[member.member_id]
+        del self._positions[member.member_id]
+        self._unindex_keys(member.member_id)
+        for later_position in range(position, len(self.members)):
+            self._positions[self.members[later_position].member_id] = later_position
+        self.remove_from_view(member)
+
+    def reindex(self, member):
+        """Call after a member's NIN or wassit number was edited."""
+        self._unindex_keys(member.member_id)
+        self._index_keys(member)
+
+    def get(self, member_id):
+        return self._by_id.get(member_id)
+
+    def contains(self, member):
+        return self._by_id.get(member.member_id) is member
+
+    def index_of(self, member):
+        """Position in the member list; raises ValueError like list.index when absent."""
+        if not self.contains(member):
+            raise ValueError(f"member {member.member_id} is not registered")
+        return self._positions[member.member_id]
+
+    def find_conflict(self, nin, wassit_no, exclude=None):
+        """A member other than exclude with the same NIN or wassit number, or None."""
+        for ids in (self._ids_by_nin.get(nin, ()), self._ids_by_wassit.get(wassit_no, ())):
+            for member_id in ids:
+                member = self._by_id[member_id]
+                if member is not exclude:
+                    return member
+        return None
+
+    def set_view(self, displayed_members):
+        """Records which row each member occupies in the table as just rebuilt."""
+        self._view_rows = {member.member_id: row for row, member in enumerate(displayed_members)}
+
+    def append_to_view(self, member):
+        """Records a row appended to the end of the displayed table; returns that row."""
+        row = len(self._view_rows)
+        self._view_rows[member.member_id] = row
+        return row
+
+    def insert_into_view(self, member, row):
+        """Records a row inserted into the displayed table; the rows from there on move down."""
+        self._shift_view_rows(row, 1)
+        self._view_rows[member.member_id] = row
+
+    def remove_from_view(self, member):
+        """Records a row dropped from the displayed table; returns the row it had, or None."""
+        row = self._view_rows.pop(member.member_id, None)
+        if row is not None:
+            self._shift_view_rows(row + 1, -1)
+        return row
+
+    def is_in_view(self, member):
+        return member.member_id in self._view_rows
+
+    def view_row_of(self, member):
+        """Row in the displayed view; raises ValueError when the member is not shown."""
+        row = self._view_rows.get(member.member_id)
+        if row is None:
+            raise ValueError(f"member {member.member_id} is not in the current view")
+        return row
+
+    def _shift_view_rows(self, from_row, delta):
+        for member_id, row in self._view_rows.items():
+            if row >= from_row:
+                self._view_rows[member_id] = row + delta
+
+    def _index_keys(self, member):
+        self._ids_by_nin.setdefault(member.nin, set()).add(member.member_id)
+        self._ids_by_wassit.setdefault(member.wassit_no, set()).add(member.member_id)
+        self._keys_by_id[member.member_id] = (member.nin, member.wassit_no)
+
+    def _unindex_keys(self, member_id):
+        nin, wassit_no = self._keys_by_id.pop(member_id, (None, None))
+        for index, key in ((self._ids_by_nin, nin), (self._ids_by_wassit, wassit_no)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(member_id)
+                if not ids:
+                    del index[key]
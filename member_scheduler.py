@@ -0,0 +1,122 @@
+# member_scheduler.py
+import time
+import logging
+
+from config import SCHEDULER_AGING_SECONDS, STATUS_RECHECK_SECONDS, RECHECK_ON_EDIT_ONLY_STATUSES, POLL_BACKOFF_FACTOR
+from statuses import status_code, BOOKABLE_STATUSES, PDF_ONLY_STATUSES, TERMINAL_STATUSES # lists re-exported for existing imports
+
+logger = logging.getLogger(__name__)
+
+REPEATED_FAILURE_STATUS = "فشل بشكل متكرر"
+
+# classify() runs for every member on every pass, so it reads the precomputed status flags.
+_RECHECK_ON_EDIT_ONLY_CODES = frozenset(status_code(s) for s in RECHECK_ON_EDIT_ONLY_STATUSES)
+_REPEATED_FAILURE_CODE = status_code(REPEATED_FAILURE_STATUS)
+
+PRIORITY_BOOKABLE = 0
+PRIORITY_NEEDS_INFO = 1
+PRIORITY_PDF_ONLY = 2
+
+
+def is_bookable(member):
+    return member.status_info.is_bookable and \
+           member.has_actual_pre_inscription and member.pre_inscription_id and \
+           member.demandeur_id and member.structure_id and \
+           not member.already_has_rdv and not member.have_allocation
+
+
+class MemberPriorityScheduler:
+    """
+    Decides which members are due for a visit and in what order.
+
+    Every member carries next_due_at (a wall-clock timestamp persisted with the
+    member; None means due now). After a visit the member is rescheduled using the
+    recheck period of its new status, so finished members are looked at daily. Other
+    members use an adaptive interval: it starts at the monitoring interval, grows by
+    POLL_BACKOFF_FACTOR each time a visit ends with the same status and detail as the
+    previous one, up to a ceiling, and snaps back as soon as the outcome changes.
+
+    Due members are visited bookable first, then members that still need
+    validation or their name, then PDF-only members. Overdue time ages a member up
+    by one class per aging_seconds so the lower classes cannot starve. Terminal
+    members are never scheduled, and edit-only statuses only once after an edit.
+    """
+
+    def __init__(self, max_consecutive_failures, aging_seconds=SCHEDULER_AGING_SECONDS):
+        self.max_consecutive_failures = max_consecutive_failures
+        self.aging_seconds = aging_seconds
+
+    def classify(self, member):
+        """Returns the member's priority class, or None if it should not be monitored."""
+        info = member.status_info
+        code = info.code
+        if info.is_terminal:
+            return None
+        if code == _REPEATED_FAILURE_CODE and member.consecutive_failures >= self.max_consecutive_failures:
+            return None
+        if code in _RECHECK_ON_EDIT_ONLY_CODES and member.next_due_at is not None:
+            return None
+        if info.is_pdf_only:
+            return PRIORITY_PDF_ONLY
+        if is_bookable(member):
+            return PRIORITY_BOOKABLE
+        return PRIORITY_NEEDS_INFO
+
+    def _schedulable(self, members):
+        for idx, member in enumerate(members):
+            if member.is_processing:
+                continue
+            priority_class = self.classify(member)
+            if priority_class is not None:
+                yield idx, member, priority_class
+
+    def due_members(self, members, now=None):
+        """Returns the indices (into members) due by now, highest priority first."""
+        now = time.time() if now is None else now
+        due = []
+        for idx, member, priority_class in self._schedulable(members):
+            due_at = member.next_due_at or 0
+            if due_at <= now:
+                due.append((self._aged_priority(priority_class, due_at, now), idx))
+        due.sort()
+        return [idx for _, idx in due]
+
+    def in_visit_order(self, members, now=None):
+        """
+        The given members in the order due_members() would visit them had they all been
+        due now: same class and aging, members scheduled later coming later. Members that
+        are not monitored at all go last.
+        """
+        now = time.time() if now is None else now
+        def visit_key(member):
+            priority_class = self.classify(member)
+            if priority_class is None:
+                return float('inf')
+            return self._aged_priority(priority_class, member.next_due_at or 0, now)
+        return sorted(members, key=visit_key)
+
+    def _aged_priority(self, priority_class, due_at, now):
+        return priority_class - (now - due_at) / self.aging_seconds
+
+    def seconds_until_next_due(self, members, now=None):
+        """Seconds until the earliest scheduled member is due (<= 0 if one is due), or None if nothing is scheduled."""
+        now = time.time() if now is None else now
+        earliest = min((member.next_due_at or 0 for _, member, _ in self._schedulable(members)), default=None)
+        return None if earliest is None else earliest - now
+
+    def schedule_next_visit(self, member, floor_seconds, ceiling_seconds, now=None):
+        now = time.time() if now is None else now
+        signature = f"{member.status}|{member.full_last_activity_detail}"
+        period = STATUS_RECHECK_SECONDS.get(member.status)
+        if period is None:
+            if signature == member.last_outcome_signature and member.poll_interval_seconds:
+                period = min(member.poll_interval_seconds * POLL_BACKOFF_FACTOR, ceiling_seconds)
+            else:
+                period = floor_seconds
+            period = max(period, floor_seconds)
+            if period != member.poll_interval_seconds:
+                logger.debug(f"فترة فحص العضو {member.nin}: {member.poll_interval_seconds} -> {period:.0f} ثانية.")
+        member.poll_interval_seconds = period
+        member.last_outcome_signature = signature
+        member.next_due_at = now + period
+        return member.next_due_at
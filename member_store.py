@@ -0,0 +1,169 @@
+# member_store.py
+import os
+import json
+import logging
+import sqlite3
+import threading
+
+from member import Member
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    member_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Existing rows keep their position, so list order is stable however often a member is saved.
+_UPSERT_SQL = """
+INSERT INTO members (member_id, position, data)
+VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM members), ?)
+ON CONFLICT(member_id) DO UPDATE SET data = excluded.data
+"""
+
+# A stored member with at most this many changed fields is patched in place with json_set
+# instead of being serialized whole.
+_PATCH_MAX_FIELDS = 8
+
+
+def _patch_sql(field_names):
+    assignments = ", ".join(f"'$.{name}', json(?)" for name in field_names)
+    return f"UPDATE members SET data = json_set(data, {assignments}) WHERE member_id = ?"
+
+
+def _restore_changes(taken):
+    for member, changed in taken:
+        member.restore_changed_fields(changed)
+
+
+class MemberStore:
+    """
+    Member repository on top of SQLite (WAL journal). Each member is one row holding its
+    to_dict() as JSON. Saving writes only members with changed fields (a stored member
+    with few changes gets just those fields patched into its row) and deletes rows for
+    members that left the list.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._stored_ids = set(row[0] for row in self._conn.execute("SELECT member_id FROM members"))
+        self._can_patch = self._probe_json_set()
+
+    def _probe_json_set(self):
+        # json_set is built into SQLite since 3.38; older builds may lack the JSON1 extension.
+        try:
+            self._conn.execute("SELECT json_set('{}', '$.a', json('1'))").fetchone()
+            return True
+        except sqlite3.OperationalError:
+            logger.info("SQLite بدون دعم JSON، سيتم حفظ الأعضاء المعدلين كاملين.")
+            return False
+
+    def load_members(self):
+        """Returns all stored members in list order, marked clean."""
+        with self._lock:
+            rows = self._conn.execute("SELECT member_id, data FROM members ORDER BY position").fetchall()
+        members = []
+        for member_id, data in rows:
+            try:
+                member = Member.from_dict(json.loads(data))
+            except (ValueError, KeyError, TypeError) as e:
+                # Left in the database untouched: sync_members must not delete a row just
+                # because it could not be read.
+                logger.error(f"تعذر قراءة العضو {member_id} من {self.db_path}، تم تجاوزه: {e}")
+                with self._lock:
+                    self._stored_ids.discard(member_id)
+                continue
+            member.is_processing = False
+            member.mark_clean()
+            members.append(member)
+        return members
+
+    def save_member(self, member):
+        self.sync_members([member], remove_missing=False)
+
+    def sync_members(self, members, remove_missing=True):
+        """
+        Writes the changed fields of changed members and, with remove_missing, deletes stored
+        members that are no longer in the list. Returns (written_count, deleted_count).
+        """
+        rows = []
+        patches = {} # sorted field names -> parameter rows for _patch_sql
+        taken = [] # (member, changed fields), given back if the write fails
+        current_ids = set()
+        try:
+            for member in list(members):
+                current_ids.add(member.member_id)
+                # Taken before serializing: a change made meanwhile by a worker thread is
+                # recorded again and picked up by the next sync.
+                changed = member.take_changed_fields()
+                if not changed:
+                    continue
+                taken.append((member, changed))
+                if self._can_patch and len(changed) <= _PATCH_MAX_FIELDS and member.member_id in self._stored_ids:
+                    field_names = tuple(sorted(changed))
+                    values = [json.dumps(member.persisted_value(name), ensure_ascii=False) for name in field_names]
+                    patches.setdefault(field_names, []).append(values + [member.member_id])
+                else:
+                    rows.append((member.member_id, json.dumps(member.to_dict(), ensure_ascii=False)))
+        except Exception:
+            _restore_changes(taken) # e.g. a value json cannot serialize
+            raise
+        with self._lock:
+            removed_ids = (self._stored_ids - current_ids) if remove_missing else set()
+            if not rows and not patches and not removed_ids:
+                return 0, 0
+            try:
+                with self._conn:
+                    if rows:
+                        self._conn.executemany(_UPSERT_SQL, rows)
+                    for field_names, parameter_rows in patches.items():
+                        self._conn.executemany(_patch_sql(field_names), parameter_rows)
+                    if removed_ids:
+                        self._conn.executemany("DELETE FROM members WHERE member_id = ?", [(member_id,) for member_id in removed_ids])
+            except Exception:
+                _restore_changes(taken) # Rolled back: the next sync writes these members again
+                raise
+            self._stored_ids.update(member_id for member_id, _ in rows)
+            self._stored_ids -= removed_ids
+        written_count = len(rows) + sum(len(parameter_rows) for parameter_rows in patches.values())
+        logger.debug(f"مخزن الأعضاء: حفظ {written_count} عضو ({len(rows)} كاملًا) وحذف {len(removed_ids)}.")
+        return written_count, len(removed_ids)
+
+    def member_count(self):
+        with self._lock:
+            return len(self._stored_ids)
+
+    def migrate_from_json(self, json_path):
+        """
+        One-shot import of the legacy members JSON file. Runs only while the store is empty
+        and has never imported before; the JSON file itself is left untouched.
+        Returns the number of imported members.
+        """
+        with self._lock:
+            already_migrated = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if already_migrated or self._stored_ids or not os.path.exists(json_path):
+            return 0
+        with open(json_path, 'r', encoding='utf-8') as f:
+            members = [Member.from_dict(data) for data in json.load(f)]
+        written, _ = self.sync_members(members, remove_missing=False)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,))
+        logger.info(f"تم ترحيل {written} عضو من {json_path} إلى {self.db_path}")
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
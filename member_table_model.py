@@ -0,0 +1,173 @@
+# member_table_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QStyle
+
+from utils import QColorConstants, format_poll_interval, format_next_due, format_last_transition
+
+
+def status_background_color(status_info):
+    """Row color for a statuses.StatusInfo, or None to keep the table's (alternating) base color."""
+    if status_info.color_name is None:
+        return None
+    return getattr(QColorConstants, status_info.color_name)
+
+
+class MemberTableModel(QAbstractTableModel):
+    """
+    The members grid. Cells are read from the Member objects when the view asks for them,
+    so only visible rows are ever formatted, and a member update repaints just its row
+    through dataChanged instead of rebuilding table items.
+    """
+    COL_ICON, COL_FULL_NAME_AR, COL_NIN, COL_WASSIT, COL_CCP, COL_PHONE_NUMBER, COL_STATUS, COL_RDV_DATE, COL_POLL_INTERVAL, COL_DETAILS = range(10)
+    HEADERS = [
+        "أيقونة", "الاسم الكامل", "رقم التعريف", "رقم الوسيط",
+        "الحساب البريدي", "رقم الهاتف", "الحالة", "تاريخ الموعد", "فترة الفحص", "آخر تحديث/خطأ"
+    ]
+    _CENTERED_COLUMNS = (COL_ICON, COL_RDV_DATE, COL_POLL_INTERVAL)
+    # Member field -> columns that display it. A status change recolors the whole row.
+    _FIELD_COLUMNS = {
+        'nom_ar': (COL_FULL_NAME_AR,), 'prenom_ar': (COL_FULL_NAME_AR,),
+        'nin': (COL_NIN,), 'wassit_no': (COL_WASSIT,), 'ccp': (COL_CCP,), 'phone_number': (COL_PHONE_NUMBER,),
+        'status': tuple(range(len(HEADERS))),
+        'rdv_date': (COL_RDV_DATE,), 'rdv_source': (COL_RDV_DATE,),
+        'poll_interval_seconds': (COL_POLL_INTERVAL,), 'next_due_at': (COL_POLL_INTERVAL,),
+        'last_activity_detail': (COL_DETAILS,), 'full_last_activity_detail': (COL_DETAILS,)
+    }
+
+    def __init__(self, style, journal, parent=None):
+        super().__init__(parent)
+        self._members = []
+        self._style = style
+        self._journal = journal
+        self._icons = {} # QStyle pixmap name -> QIcon
+        self._spinner_member_id = None
+        self._spinner_char = ""
+
+    def set_members(self, members):
+        self.beginResetModel()
+        self._members = list(members)
+        self.endResetModel()
+
+    def member_at(self, row):
+        return self._members[row]
+
+    def append_member(self, member):
+        return self.insert_member(len(self._members), member)
+
+    def insert_member(self, row, member):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._members.insert(row, member)
+        self.endInsertRows()
+        return row
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._members[row]
+        self.endRemoveRows()
+
+    def refresh_row(self, row):
+        if 0 <= row < len(self._members):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.COL_DETAILS))
+
+    def refresh_fields(self, row, field_names):
+        """Repaints only the cells showing the given member fields (see Member.take_unshown_fields)."""
+        columns = [column for name in field_names for column in self._FIELD_COLUMNS.get(name, ())]
+        if columns and 0 <= row < len(self._members):
+            self.dataChanged.emit(self.index(row, min(columns)), self.index(row, max(columns)))
+
+    def set_spinner(self, row, member_id, char=""):
+        """Shows char in the icon cell of the processing member; member_id None clears it."""
+        self._spinner_member_id = member_id
+        self._spinner_char = char
+        if 0 <= row < len(self._members):
+            icon_index = self.index(row, self.COL_ICON)
+            self.dataChanged.emit(icon_index, icon_index)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._members)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._members):
+            return None
+        member = self._members[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            return self._display_text(member, column)
+        if role == Qt.DecorationRole:
+            if column == self.COL_ICON and not self._shows_spinner(member):
+                return self._icon(member.status_info.icon_name)
+            return None
+        if role == Qt.ToolTipRole:
+            if column == self.COL_STATUS:
+                return format_last_transition(self._journal.latest(member.member_id))
+            if column == self.COL_POLL_INTERVAL:
+                return format_next_due(member.next_due_at)
+            if column == self.COL_DETAILS:
+                return member.full_last_activity_detail
+            return None
+        if role == Qt.TextAlignmentRole:
+            if column in self._CENTERED_COLUMNS:
+                return Qt.AlignCenter
+            return Qt.AlignRight | Qt.AlignVCenter
+        if role == Qt.BackgroundRole:
+            if member.is_processing:
+                return QColorConstants.PROCESSING_ROW_DARK_THEME
+            return status_background_color(member.status_info)
+        if role == Qt.ForegroundRole:
+            if member.is_processing:
+                return QColor(Qt.white)
+            return None
+        return None
+
+    def _shows_spinner(self, member):
+        return member.is_processing and member.member_id == self._spinner_member_id
+
+    def _display_text(self, member, column):
+        if column == self.COL_ICON:
+            return self._spinner_char if self._shows_spinner(member) else ""
+        if column == self.COL_FULL_NAME_AR:
+            return member.get_full_name_ar()
+        if column == self.COL_NIN:
+            return member.nin
+        if column == self.COL_WASSIT:
+            return member.wassit_no
+        if column == self.COL_CCP:
+            if len(member.ccp) == 12:
+                return f"{member.ccp[:10]} {member.ccp[10:]}"
+            return member.ccp
+        if column == self.COL_PHONE_NUMBER:
+            return member.phone_number or ""
+        if column == self.COL_STATUS:
+            return member.status
+        if column == self.COL_RDV_DATE:
+            if not member.rdv_date:
+                return ""
+            if member.rdv_source == "system":
+                return member.rdv_date + " (نظام)"
+            if member.rdv_source == "discovered":
+                return member.rdv_date + " (مكتشف)"
+            return member.rdv_date
+        if column == self.COL_POLL_INTERVAL:
+            return format_poll_interval(member.poll_interval_seconds)
+        if column == self.COL_DETAILS:
+            return member.last_activity_detail
+        return None
+
+    def _icon(self, icon_name):
+        icon = self._icons.get(icon_name)
+        if icon is None:
+            icon = self._style.standardIcon(getattr(QStyle, icon_name, QStyle.SP_CustomBase))
+            self._icons[icon_name] = icon
+        return icon
@@ -0,0 +1,1030 @@
+# monitoring_engine.py
+import time
+import random
+import logging
+import os 
+import base64 
+import json
+import threading
+
+from api_client import AnemAPIClient, get_current_request_rate, get_connection_stats, get_seconds_since_last_request, take_last_call_info 
+from slot_watcher import StructureSlotWatcher
+from booking_strategy import BookingDateStrategy
+from member_scheduler import MemberPriorityScheduler, is_bookable
+from monitoring_pipeline import StagePipeline, MemberJob
+from statuses import get_icon_name_for_status, is_transient_status 
+from config import (
+    SETTING_MIN_MEMBER_DELAY, SETTING_MAX_MEMBER_DELAY,
+    SETTING_MONITORING_INTERVAL, SETTING_BACKOFF_429,
+    SETTING_BACKOFF_GENERAL, SETTING_REQUEST_TIMEOUT, SETTING_MAX_POLL_INTERVAL, DEFAULT_SETTINGS,
+    KEEPALIVE_INTERVAL_SECONDS, PIPELINE_STAGE_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _translate_api_error(error_string, operation_name="العملية"):
+    if not error_string:
+        return f"حدث خطأ غير محدد أثناء {operation_name}."
+
+    error_lower = str(error_string).lower()
+
+    if "timeout" in error_lower or "timed out" in error_lower:
+        if "connect" in error_lower:
+            return f"انتهت مهلة الاتصال بالخادم أثناء {operation_name}. يرجى التحقق من اتصالك بالإنترنت."
+        else:
+            return f"انتهت مهلة الاستجابة من الخادم أثناء {operation_name}. قد يكون الخادم بطيئًا أو هناك مشكلة في الشبكة."
+    elif "connectionerror" in error_lower or "could not connect" in error_lower or "failed to establish a new connection" in error_lower:
+        return f"فشل الاتصال بالخادم أثناء {operation_name}. يرجى التحقق من اتصالك بالإنترنت وحالة الخادم."
+    elif "sslerror" in error_lower or "certificate_verify_failed" in error_lower:
+        return f"حدث خطأ في شهادة الأمان (SSL) أثناء {operation_name}. قد يكون الاتصال غير آمن."
+    elif "429" in error_lower or "طلبات كثيرة جدًا" in error_lower:
+        return f"الخادم مشغول حاليًا (طلبات كثيرة جدًا) أثناء {operation_name}. يرجى المحاولة لاحقًا."
+    elif "404" in error_lower or "not found" in error_lower:
+        return f"تعذر العثور على المورد المطلوب على الخادم (404) أثناء {operation_name}."
+    elif "500" in error_lower or "internal server error" in error_lower:
+        return f"حدث خطأ داخلي في الخادم (500) أثناء {operation_name}. يرجى المحاولة لاحقًا."
+    elif "jsondecodeerror" in error_lower or "خطأ في تحليل البيانات" in error_lower:
+        return f"تم استلام استجابة غير صالحة (ليست JSON) من الخادم أثناء {operation_name}."
+    elif "eligible:false" in error_lower or "نعتذر منكم" in error_string: 
+        if "نعتذر منكم! لا يمكنكم حجز موعد" in error_string:
+            return error_string
+        if operation_name == "حجز الموعد" and "\"Eligible\":false" in error_string and "\"serviceUp\":true" in error_string :
+             return "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+        return f"المستخدم غير مؤهل لـ {operation_name} حسب شروط المنصة."
+    
+    max_len = 70
+    snippet = error_string[:max_len] + "..." if len(error_string) > max_len else error_string
+    return f"فشل في {operation_name}: {snippet}"
+
+
+class MonitoringEngineListener:
+    """
+    Receives the engine's events. Every method is a no-op here; the Qt thread turns them
+    into signals and the command-line runner logs them. Methods are called from the
+    engine's worker threads. Members are identified by member_id, never by list position.
+    """
+
+    def member_updated(self, member_id, status, detail, icon_name):
+        pass
+
+    def member_name_fetched(self, member_id, nom_ar, prenom_ar):
+        pass
+
+    def global_log(self, message, is_general, member_obj):
+        pass
+
+    def member_processing(self, member_id, is_processing):
+        pass
+
+    def countdown(self, text):
+        pass
+
+    def request_rate(self, requests_per_second):
+        pass
+
+
+class MonitoringEngine:
+    """The monitoring cycle without any Qt dependency; run() blocks until stop() is called."""
+
+    SITE_CHECK_INTERVAL_SECONDS = 60 
+    MAX_CONSECUTIVE_MEMBER_FAILURES = 5 
+    CONSECUTIVE_NETWORK_ERROR_THRESHOLD = 3 
+    STAGE_VALIDATION = "validation"
+    STAGE_INFO = "info"
+    STAGE_BOOKING = "booking"
+    STAGE_PDF = "pdf"
+    STAGE_LABELS = {STAGE_VALIDATION: "التحقق", STAGE_INFO: "جلب الاسم", STAGE_BOOKING: "المواعيد والحجز", STAGE_PDF: "تحميل PDF"}
+
+    def __init__(self, members_list_ref, settings, listener=None, output_base_dir=None, journal=None):
+        self.members_list_ref = members_list_ref 
+        self.listener = listener or MonitoringEngineListener()
+        self.journal = journal # Optional TransitionJournal recording every status change
+        # Root folder for downloaded PDFs; the GUI passes the Qt documents location.
+        self.output_base_dir = output_base_dir or os.path.join(os.path.expanduser("~"), "Documents")
+        self.settings = settings.copy() 
+        self._apply_settings() 
+
+        self.is_running = True 
+        self.is_connection_lost_mode = False 
+        self.consecutive_network_error_trigger_count = 0 
+        self.initial_scan_completed = False 
+        self.last_reported_request_rate = None 
+        self._booking_claims = set() 
+        self.scheduler = MemberPriorityScheduler(self.MAX_CONSECUTIVE_MEMBER_FAILURES)
+        self._wake_event = threading.Event()
+        self._accounting_lock = threading.Lock()
+        self._members_in_flight = set() # member_ids currently owned by a pipeline job
+        self._members_in_handler = set() # member_ids some thread is working on right now (stage handler or fan-out)
+        self._handler_released = threading.Condition(self._accounting_lock)
+        self._status_before_step = {} # member_id -> settled status a "جاري ..." step started from, for the journal
+        self._removed_member_ids = set() 
+        self.pipeline = None 
+
+    def _apply_settings(self):
+        self.interval_ms = self.settings.get(SETTING_MONITORING_INTERVAL, DEFAULT_SETTINGS[SETTING_MONITORING_INTERVAL]) * 60 * 1000
+        self.min_member_delay = self.settings.get(SETTING_MIN_MEMBER_DELAY, DEFAULT_SETTINGS[SETTING_MIN_MEMBER_DELAY])
+        self.max_member_delay = self.settings.get(SETTING_MAX_MEMBER_DELAY, DEFAULT_SETTINGS[SETTING_MAX_MEMBER_DELAY])
+        self.max_poll_interval_seconds = self.settings.get(SETTING_MAX_POLL_INTERVAL, DEFAULT_SETTINGS[SETTING_MAX_POLL_INTERVAL]) * 60
+        
+        self.api_client = AnemAPIClient(
+            initial_backoff_general=self.settings.get(SETTING_BACKOFF_GENERAL, DEFAULT_SETTINGS[SETTING_BACKOFF_GENERAL]),
+            initial_backoff_429=self.settings.get(SETTING_BACKOFF_429, DEFAULT_SETTINGS[SETTING_BACKOFF_429]),
+            request_timeout=self.settings.get(SETTING_REQUEST_TIMEOUT, DEFAULT_SETTINGS[SETTING_REQUEST_TIMEOUT])
+        )
+        self.slot_watcher = StructureSlotWatcher(self.api_client)
+        self.booking_strategy = BookingDateStrategy.from_settings(self.settings)
+        logger.info(f"MonitoringEngine settings applied: Interval={self.interval_ms/60000:.1f}min, MemberDelay=[{self.min_member_delay}-{self.max_member_delay}]s")
+
+    def _emit_global_log(self, message, is_general=True, member_obj=None):
+        self.listener.global_log(message, is_general, member_obj)
+
+    def _member_display_name(self, member_obj):
+        name_part = member_obj.get_full_name_ar()
+        if not name_part or name_part.isspace():
+            return member_obj.nin 
+        return f"{name_part} ({member_obj.nin})"
+
+    def update_thread_settings(self, new_settings):
+        logger.info("MonitoringEngine: استلام طلب تحديث الإعدادات.")
+        self.settings = new_settings.copy()
+        self._apply_settings()
+
+    def _wait_with_countdown(self, total_seconds, countdown_prefix=""):
+        keep_warm = any(is_bookable(m) for m in self.members_list_ref)
+        for i in range(total_seconds, 0, -1):
+            if not self.is_running: break
+            minutes, seconds = divmod(i, 60)
+            hours, minutes = divmod(minutes, 60)
+            time_str = f"{countdown_prefix}{hours:02d}:{minutes:02d}:{seconds:02d}"
+            self.listener.countdown(time_str)
+            if keep_warm:
+                self._keep_connection_warm()
+            time.sleep(1)
+        if self.is_running: 
+            self.listener.countdown("")
+
+
+    def _schedule_next_visit(self, member):
+        # The monitoring interval is the floor of the adaptive per-member interval.
+        self.scheduler.schedule_next_visit(member, self.interval_ms / 1000, self.max_poll_interval_seconds)
+
+    def wake(self):
+        """Cuts the sleep until the next due member short, e.g. after a member was added or edited."""
+        self._wake_event.set()
+
+    def member_removed(self, member_id):
+        """The member was deleted while monitoring runs: drop it from queued work and fan-outs."""
+        self._removed_member_ids.add(member_id)
+
+    def _sleep_until_next_due(self):
+        # Sleeps exactly until the earliest member is due instead of ticking through a
+        # fixed interval. Waking up early (wake(), keep-alive) just re-evaluates.
+        while self.is_running:
+            delay = self.scheduler.seconds_until_next_due(self.members_list_ref)
+            if delay is not None and delay <= 0:
+                break
+            if delay is None:
+                delay = self.interval_ms / 1000
+                self.listener.countdown("لا يوجد أعضاء مجدولون للفحص")
+            else:
+                self.listener.countdown(f"الفحص التالي عند: {time.strftime('%H:%M:%S', time.localtime(time.time() + delay))}")
+            keep_warm = any(is_bookable(m) for m in self.members_list_ref)
+            if keep_warm:
+                delay = min(delay, KEEPALIVE_INTERVAL_SECONDS)
+            if self._wake_event.wait(delay):
+                self._wake_event.clear()
+            elif keep_warm and self.is_running:
+                self._keep_connection_warm()
+        if self.is_running:
+            self.listener.countdown("")
+
+    def _prewarm_connection(self):
+        # Pay DNS/TCP/TLS setup once up front instead of on the first validation request.
+        if self.api_client.warm_up("تسخين الاتصال قبل بدء المراقبة"):
+            logger.info("تم تسخين الاتصال بالخادم قبل بدء المراقبة.")
+
+    def _keep_connection_warm(self):
+        # Keeps a pooled connection alive while bookable members wait, so create_rendezvous
+        # right after a slot shows up does not pay for a fresh TLS handshake.
+        idle_seconds = get_seconds_since_last_request()
+        if idle_seconds is None or idle_seconds >= KEEPALIVE_INTERVAL_SECONDS:
+            self.api_client.warm_up("إبقاء الاتصال نشطًا")
+
+    def _report_request_rate(self):
+        current_rate = get_current_request_rate()
+        if self.last_reported_request_rate is None or abs(current_rate - self.last_reported_request_rate) >= 0.01:
+            self.last_reported_request_rate = current_rate
+            self.listener.request_rate(current_rate)
+
+    def _wait_between_members(self, log_prefix):
+        self._report_request_rate()
+        # Request pacing is enforced by the shared rate governor in AnemAPIClient;
+        # the member delay is only an optional extra spacing on top of it.
+        if self.max_member_delay <= 0:
+            return
+        member_delay = random.uniform(self.min_member_delay, self.max_member_delay)
+        logger.info(f"{log_prefix}: تأخير {member_delay:.2f} ثانية قبل العضو التالي.")
+        self._wait_with_countdown(int(member_delay))
+        if self.is_running:
+            time.sleep(member_delay - int(member_delay))
+
+    def run(self):
+        self.last_reported_request_rate = None
+        self._report_request_rate()
+        self._prewarm_connection()
+        self.pipeline = StagePipeline(
+            [
+                (self.STAGE_VALIDATION, PIPELINE_STAGE_WORKERS[self.STAGE_VALIDATION], self._exclusive(self._stage_validation)),
+                (self.STAGE_INFO, PIPELINE_STAGE_WORKERS[self.STAGE_INFO], self._exclusive(self._stage_info)),
+                (self.STAGE_BOOKING, PIPELINE_STAGE_WORKERS[self.STAGE_BOOKING], self._exclusive(self._stage_booking)),
+                (self.STAGE_PDF, PIPELINE_STAGE_WORKERS[self.STAGE_PDF], self._exclusive(self._stage_pdf)),
+            ],
+            on_job_done=self._finish_job,
+            on_job_cancelled=self._cancel_job
+        )
+        self.pipeline.start()
+        
+        try:
+            while self.is_running:
+                if self.is_connection_lost_mode:
+                    self._emit_global_log(f"الاتصال بالخادم مفقود. جاري فحص توفر الموقع...")
+                    site_available, site_check_error = self.api_client.check_main_site_availability() 
+                    if not self.is_running: break
+
+                    if site_available:
+                        logger.info("تم استعادة الاتصال بالخادم الرئيسي. استئناف المراقبة.")
+                        self._emit_global_log("تم استعادة الاتصال بالخادم. استئناف المراقبة.")
+                        self.is_connection_lost_mode = False
+                        self.consecutive_network_error_trigger_count = 0 
+                        logger.info("إعادة تعيين عداد الفشل المتتالي لجميع الأعضاء بعد استعادة الاتصال.")
+                        for member_to_reset in self.members_list_ref:
+                            member_to_reset.consecutive_failures = 0
+                        continue 
+                    else:
+                        user_friendly_site_check_error = _translate_api_error(site_check_error, "فحص توفر الموقع")
+                        logger.info(f"الموقع الرئيسي لا يزال غير متاح: {user_friendly_site_check_error}. الفحص التالي بعد {self.SITE_CHECK_INTERVAL_SECONDS} ثانية.")
+                        self._emit_global_log(f"الموقع لا يزال غير متاح ({user_friendly_site_check_error}).")
+                        self._wait_with_countdown(self.SITE_CHECK_INTERVAL_SECONDS, "فحص الموقع بعد: ")
+                        if not self.is_running: break
+                        continue 
+                
+                if not self.initial_scan_completed:
+                    logger.info("بدء الفحص الأولي لجميع الأعضاء عند بدء المراقبة...")
+                    self._emit_global_log("جاري الفحص الأولي لجميع الأعضاء...")
+                    initial_scan_members_list = list(self.members_list_ref) 
+                    if not initial_scan_members_list:
+                        logger.info("الفحص الأولي: لا يوجد أعضاء للفحص.")
+                        self._emit_global_log("الفحص الأولي: لا يوجد أعضاء.")
+                    else:
+                        # Everyone the scheduler would ever visit, regardless of next_due_at.
+                        initial_indices = [idx for idx, m in enumerate(initial_scan_members_list) if self.scheduler.classify(m) is not None]
+                        self._run_pass(initial_scan_members_list, initial_indices, "الفحص الأولي")
+                        if not self.is_running: break
+                        if self.is_connection_lost_mode: continue 
+
+                    self.initial_scan_completed = True
+                    logger.info("اكتمل الفحص الأولي لجميع الأعضاء.")
+                    self._emit_global_log("اكتمل الفحص الأولي. بدء المراقبة الدورية...")
+
+                current_members_snapshot = list(self.members_list_ref)
+
+                if not current_members_snapshot: 
+                    logger.info("المراقبة الدورية: لا يوجد أعضاء للمراقبة.")
+                    self._emit_global_log("لا يوجد أعضاء للمراقبة الدورية. الانتظار...")
+                    self._wait_with_countdown(int(min(self.interval_ms / 1000, 30)), "الدورة التالية بعد: ")
+                    if not self.is_running: break
+                    continue 
+
+                # Only members whose next_due_at has passed, bookable ones first; terminal
+                # members are left out entirely (see MemberPriorityScheduler).
+                scheduled_indices = self.scheduler.due_members(current_members_snapshot)
+                if not scheduled_indices:
+                    self._sleep_until_next_due()
+                    continue
+
+                logger.info(f"بدء دورة مراقبة دورية... {len(scheduled_indices)} من أصل {len(current_members_snapshot)} عضو مستحق للفحص حسب الأولوية.")
+                self._emit_global_log(f"بدء دورة مراقبة دورية... ({time.strftime('%H:%M:%S')})")
+
+                processed_in_this_cycle = self._run_pass(current_members_snapshot, scheduled_indices, "المراقبة الدورية")
+
+                if not self.is_running: break 
+                if self.is_connection_lost_mode: continue 
+
+                connection_stats = get_connection_stats()
+                logger.info(f"إحصائيات الاتصال: {connection_stats['connections_opened']} اتصال جديد، {connection_stats['connections_reused']} طلب عبر اتصال مُعاد استخدامه من أصل {connection_stats['requests_sent']}.")
+
+                if processed_in_this_cycle:
+                    logger.info(f"إكمال دورة مراقبة دورية. الانتظار حتى موعد الفحص التالي.")
+                    self._emit_global_log(f"انتهاء دورة المراقبة الدورية.")
+                else: 
+                    logger.info(f"المراقبة الدورية: لم يتم فحص أي أعضاء. الانتظار حتى موعد الفحص التالي.")
+                    self._emit_global_log("المراقبة الدورية: لم يتم فحص أي أعضاء مؤهلين. الانتظار...")
+                
+                self._sleep_until_next_due()
+                if not self.is_running: break
+        finally:
+            self.pipeline.shutdown()
+        
+        logger.info("خيط المراقبة يتوقف.")
+        self._emit_global_log("تم إيقاف خيط المراقبة.")
+
+    def _run_pass(self, members_snapshot, indices, log_prefix):
+        """Feeds the given members into the stage pipeline and waits until all of them are done."""
+        self._booking_claims.clear()
+        submitted = 0
+        for snapshot_idx in indices:
+            if not self.is_running or self.is_connection_lost_mode: break
+            member_to_process = members_snapshot[snapshot_idx]
+            member_display_name = self._member_display_name(member_to_process)
+            if member_to_process.member_id in self._removed_member_ids:
+                logger.info(f"{log_prefix}: تجاوز العضو {member_display_name} لأنه حُذف.")
+                continue
+
+            if member_to_process.is_processing or member_to_process.member_id in self._members_in_flight: 
+                logger.debug(f"{log_prefix}: تجاوز العضو {member_display_name} لأنه قيد المعالجة.")
+                continue
+
+            if member_to_process.consecutive_failures >= self.MAX_CONSECUTIVE_MEMBER_FAILURES:
+                if "فشل بشكل متكرر" not in member_to_process.status : 
+                    logger.warning(f"{log_prefix}: تجاوز العضو {member_display_name} بسبب {member_to_process.consecutive_failures} محاولات فاشلة.")
+                    self._update_member_and_emit(member_to_process, "فشل بشكل متكرر",
+                                                 f"تم تجاوز العضو بسبب {member_to_process.consecutive_failures} محاولات فاشلة متتالية.",
+                                                 get_icon_name_for_status("فشل بشكل متكرر"))
+                continue 
+
+            self._members_in_flight.add(member_to_process.member_id)
+            self.listener.member_processing(member_to_process.member_id, True) 
+            logger.info(f"{log_prefix}: فحص العضو {member_display_name} - الحالة: {member_to_process.status}")
+            self._emit_global_log(f"جاري فحص دوري...", is_general=False, member_obj=member_to_process)
+
+            job = MemberJob(member_to_process, log_prefix)
+            if member_to_process.status_info.is_pdf_only:
+                logger.info(f"{log_prefix}: العضو {member_display_name} ({member_to_process.status})، فحص PDF فقط.")
+                self.pipeline.submit(self.STAGE_PDF, job)
+            else:
+                self.pipeline.submit(self.STAGE_VALIDATION, job)
+            submitted += 1
+
+        while not self.pipeline.wait_idle(timeout=1):
+            if not self.is_running or self.is_connection_lost_mode:
+                self.pipeline.cancel_pending()
+            self._report_request_rate()
+
+        stage_stats = self.pipeline.stats()
+        logger.info(f"{log_prefix}: إحصائيات مراحل المعالجة: " + "، ".join(
+            f"{self.STAGE_LABELS[name]}: {s['completed']} منجز ({s['per_minute']:.1f}/د، {s['avg_seconds']:.1f} ث/عضو، {s['queued']} في الانتظار)"
+            for name, s in stage_stats.items()))
+        return submitted > 0
+
+    # --- Pipeline stages. Each returns the next stage for the job, or None when the member is done. ---
+
+    def _job_active(self, job):
+        return self.is_running and job.member.member_id not in self._removed_member_ids
+
+    def _next_stage_for_pdf(self, job):
+        pdf_attempt_worthy_statuses_after_processing = ["تم الحجز", "مكتمل", "فشل تحميل PDF", "لديه موعد مسبق"]
+        if job.member.status in pdf_attempt_worthy_statuses_after_processing and job.member.pre_inscription_id:
+            logger.info(f"{job.log_prefix}: العضو {self._member_display_name(job.member)} ({job.member.status}) يستدعي محاولة تحميل PDF.")
+            return self.STAGE_PDF
+        return None
+
+    def _next_stage_after_info(self, job):
+        if is_bookable(job.member):
+            return self.STAGE_BOOKING
+        return self._next_stage_for_pdf(job)
+
+    def _exclusive(self, handler):
+        # A stage handler never runs while the structure fan-out is booking the same member;
+        # the fan-out in turn skips members whose handler is running (_try_enter_member).
+        def run_exclusively(job):
+            member_id = job.member.member_id
+            with self._handler_released:
+                self._handler_released.wait_for(lambda: member_id not in self._members_in_handler)
+                self._members_in_handler.add(member_id)
+            try:
+                return handler(job)
+            finally:
+                self._leave_member(member_id)
+        return run_exclusively
+
+    def _try_enter_member(self, member_id):
+        with self._accounting_lock:
+            if member_id in self._members_in_handler:
+                return False
+            self._members_in_handler.add(member_id)
+            return True
+
+    def _leave_member(self, member_id):
+        with self._handler_released:
+            self._members_in_handler.discard(member_id)
+            self._handler_released.notify_all()
+
+    def _stage_validation(self, job):
+        if not self._job_active(job): return None
+        member_to_process = job.member
+        try:
+            validation_success, api_error_occurred_validation = self.process_validation(member_to_process)
+            if api_error_occurred_validation: job.had_api_error = True
+            if not self.is_running: return None
+
+            is_in_stop_state_after_validation = member_to_process.status in [
+                "مستفيد حاليًا من المنحة", "غير مؤهل مبدئيًا", "بيانات الإدخال خاطئة", 
+                "لديه موعد مسبق", "غير مؤهل للحجز", "فشل التحقق"
+            ]
+            if is_in_stop_state_after_validation or not validation_success:
+                return self._next_stage_for_pdf(job)
+            if member_to_process.pre_inscription_id and not (member_to_process.nom_ar and member_to_process.prenom_ar):
+                return self.STAGE_INFO
+            return self._next_stage_after_info(job)
+        except Exception as e:
+            self._handle_stage_exception(job, e)
+            return None
+        finally:
+            self._wait_between_members(job.log_prefix)
+
+    def _stage_info(self, job):
+        if not self._job_active(job): return None
+        try:
+            _, api_error_occurred_info = self.process_pre_inscription_info(job.member)
+            if api_error_occurred_info: job.had_api_error = True
+            return self._next_stage_after_info(job)
+        except Exception as e:
+            self._handle_stage_exception(job, e)
+            return None
+
+    def _stage_booking(self, job):
+        if not self._job_active(job): return None
+        try:
+            _, api_error_occurred_booking = self._book_with_structure_fan_out(job.member)
+            if api_error_occurred_booking: job.had_api_error = True
+            return self._next_stage_for_pdf(job)
+        except Exception as e:
+            self._handle_stage_exception(job, e)
+            return None
+
+    def _stage_pdf(self, job):
+        if not self._job_active(job): return None
+        member_to_process = job.member
+        try:
+            if member_to_process.pre_inscription_id: 
+                _, api_error_occurred_pdf = self.process_pdf_download(member_to_process)
+                if api_error_occurred_pdf: job.had_api_error = True
+            else:
+                member_to_process.set_activity_detail(f"{job.log_prefix}: لا يمكن تحميل PDF، ID التسجيل مفقود.", is_error=True)
+        except Exception as e:
+            self._handle_stage_exception(job, e)
+        return None
+
+    def _handle_stage_exception(self, job, e):
+        member_display_name = self._member_display_name(job.member)
+        logger.exception(f"{job.log_prefix}: خطأ غير متوقع للعضو {member_display_name}: {e}")
+        job.had_api_error = True
+        self._update_member_and_emit(job.member, "خطأ في المعالجة", f"خطأ عام أثناء {job.log_prefix}: {str(e)}", "SP_MessageBoxCritical")
+
+    def _finish_job(self, job):
+        member_to_process = job.member
+        with self._accounting_lock:
+            if job.had_api_error:
+                member_to_process.consecutive_failures += 1
+                self.consecutive_network_error_trigger_count += 1 
+            else: 
+                member_to_process.consecutive_failures = 0
+                self.consecutive_network_error_trigger_count = 0 
+            if self.consecutive_network_error_trigger_count >= self.CONSECUTIVE_NETWORK_ERROR_THRESHOLD and not self.is_connection_lost_mode:
+                logger.warning(f"{job.log_prefix}: {self.consecutive_network_error_trigger_count} أعضاء متتاليين واجهوا أخطاء شبكة. الدخول في وضع فحص الاتصال.")
+                self._emit_global_log("أخطاء شبكة متتالية. إيقاف مؤقت للمراقبة الدورية.")
+                self.is_connection_lost_mode = True
+        self._schedule_next_visit(member_to_process)
+        self._release_job(job)
+
+    def _cancel_job(self, job):
+        # Not finished this pass; leave it due so it is picked up first next time.
+        self._release_job(job)
+
+    def _release_job(self, job):
+        self._members_in_flight.discard(job.member.member_id)
+        if self.is_running:
+            self.listener.member_processing(job.member.member_id, False) 
+            self.listener.member_updated(job.member.member_id, job.member.status, job.member.last_activity_detail, job.member.status_info.icon_name)
+
+    def _update_member_and_emit(self, member_obj_being_updated, new_status, detail_text, icon_name):
+        old_status = member_obj_being_updated.status
+        # Taken on every update so an old call is never attributed to a later transition.
+        endpoint, latency_seconds = take_last_call_info()
+        if self.journal:
+            self._journal_transition(member_obj_being_updated.member_id, old_status, new_status, endpoint, latency_seconds)
+        member_obj_being_updated.status = new_status
+        member_obj_being_updated.set_activity_detail(detail_text, is_error=member_obj_being_updated.status_info.is_error)
+        member_display_name = self._member_display_name(member_obj_being_updated)
+        logger.info(f"تحديث حالة العضو {member_display_name}: {new_status} - التفاصيل: {member_obj_being_updated.last_activity_detail}")
+        if self.is_running: 
+            self.listener.member_updated(member_obj_being_updated.member_id, member_obj_being_updated.status, member_obj_being_updated.last_activity_detail, icon_name)
+
+    def _journal_transition(self, member_id, old_status, new_status, endpoint, latency_seconds):
+        # Only outcomes are journaled: "جاري ..." steps are skipped, and a step's outcome is
+        # recorded against the status the member had before the step, so a visit that ends
+        # where it started leaves no record.
+        if is_transient_status(new_status):
+            if not is_transient_status(old_status):
+                self._status_before_step[member_id] = old_status
+            return
+        if is_transient_status(old_status):
+            old_status = self._status_before_step.pop(member_id, old_status)
+        if new_status != old_status:
+            self.journal.record(member_id, old_status, new_status, endpoint, latency_seconds)
+
+    def process_validation(self, member_obj): 
+        if not self.is_running: return False, False
+        operation_name = "التحقق من البيانات (دوري)"
+        member_display_name = self._member_display_name(member_obj)
+        self._update_member_and_emit(member_obj, "جاري التحقق (دورة)...", f"إعادة التحقق للعضو {member_display_name}", get_icon_name_for_status("جاري التحقق (دورة)..."))
+        data, error = self.api_client.validate_candidate(member_obj.wassit_no, member_obj.nin)
+        if not self.is_running: return False, False
+        
+        new_status = member_obj.status 
+        validation_can_progress = False 
+        api_error_occurred = False 
+        detail_text_for_gui = member_obj.last_activity_detail 
+
+        if error:
+            new_status = "فشل التحقق"
+            detail_text_for_gui = _translate_api_error(error, operation_name)
+            api_error_occurred = True
+            self._emit_global_log(f"فشل التحقق الدوري: {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+        elif data:
+            member_obj.have_allocation = data.get("haveAllocation", False)
+            member_obj.allocation_details = data.get("detailsAllocation", {})
+
+            if member_obj.have_allocation and member_obj.allocation_details:
+                new_status = "مستفيد حاليًا من المنحة"
+                nom_ar = member_obj.allocation_details.get("nomAr", member_obj.nom_ar) 
+                prenom_ar = member_obj.allocation_details.get("prenomAr", member_obj.prenom_ar)
+                nom_fr = member_obj.allocation_details.get("nomFr", member_obj.nom_fr)
+                prenom_fr = member_obj.allocation_details.get("prenomFr", member_obj.prenom_fr)
+                date_debut = member_obj.allocation_details.get("dateDebut", "غير محدد")
+                if date_debut and "T" in date_debut: date_debut = date_debut.split("T")[0]
+
+                if nom_ar != member_obj.nom_ar or prenom_ar != member_obj.prenom_ar: 
+                    member_obj.nom_ar = nom_ar
+                    member_obj.prenom_ar = prenom_ar
+                    member_obj.nom_fr = nom_fr
+                    member_obj.prenom_fr = prenom_fr
+                    if self.is_running: self.listener.member_name_fetched(member_obj.member_id, nom_ar, prenom_ar) 
+                
+                detail_text_for_gui = f"مستفيد حاليًا. تاريخ بدء الاستفادة: {date_debut}."
+                self._emit_global_log(f"مستفيد حاليًا.", is_general=False, member_obj=member_obj)
+                validation_can_progress = False 
+            else: 
+                member_obj.has_actual_pre_inscription = data.get("havePreInscription", False)
+                member_obj.already_has_rdv = data.get("haveRendezVous", False)
+                valid_input = data.get("validInput", True)
+                member_obj.pre_inscription_id = data.get("preInscriptionId")
+                member_obj.demandeur_id = data.get("demandeurId")
+                member_obj.structure_id = data.get("structureId")
+                member_obj.rdv_id = data.get("rendezVousId") 
+
+                if member_obj.already_has_rdv and member_obj.rdv_source != "system": # Don't overwrite if system booked it
+                    member_obj.rdv_source = "discovered"
+
+                if not valid_input:
+                    controls = data.get("controls", [])
+                    error_msg_from_controls = "البيانات المدخلة غير متطابقة أو غير صالحة."
+                    for control in controls:
+                        if control.get("result") is False and control.get("name") == "matchIdentity" and control.get("message"):
+                            error_msg_from_controls = control.get("message")
+                            break
+                    new_status = "بيانات الإدخال خاطئة"
+                    detail_text_for_gui = error_msg_from_controls
+                    self._emit_global_log(f"خطأ في بيانات الإدخال (دوري): {error_msg_from_controls}", is_general=False, member_obj=member_obj)
+                elif member_obj.already_has_rdv:
+                    new_status = "لديه موعد مسبق"
+                    detail_text_for_gui = f"لديه موعد محجوز بالفعل (ID: {member_obj.rdv_id or 'N/A'})."
+                    self._emit_global_log(f"لديه موعد مسبق.", is_general=False, member_obj=member_obj)
+                    if member_obj.pre_inscription_id and not (member_obj.nom_ar and member_obj.prenom_ar):
+                        validation_can_progress = True 
+                    else:
+                        validation_can_progress = False 
+                elif data.get("eligible", False) and member_obj.has_actual_pre_inscription:
+                    new_status = "تم التحقق" 
+                    detail_text_for_gui = "مؤهل ولديه تسجيل مسبق (دورة)."
+                    validation_can_progress = True
+                elif data.get("eligible", False) and not member_obj.has_actual_pre_inscription:
+                    new_status = "يتطلب تسجيل مسبق" 
+                    detail_text_for_gui = "مؤهل ولكن لا يوجد تسجيل مسبق بعد (بانتظار توفر موعد)."
+                    validation_can_progress = True 
+                elif not data.get("eligible", False): 
+                    new_status = "غير مؤهل للحجز" 
+                    detail_text_for_gui = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+                    if isinstance(data, dict) and "message" in data and data["message"]:
+                         detail_text_for_gui = data["message"] 
+                    elif isinstance(data, dict) and data.get("Eligible") is False and data.get("serviceUp") is True: 
+                         detail_text_for_gui = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+
+                    self._emit_global_log(f"غير مؤهل للحجز (دوري): {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+                else: 
+                    new_status = "فشل التحقق" 
+                    detail_text_for_gui = "حالة غير معروفة بعد التحقق من البيانات (دوري)."
+                    api_error_occurred = True
+                    self._emit_global_log(f"فشل التحقق الدوري: حالة غير معروفة.", is_general=False, member_obj=member_obj)
+        else: 
+            new_status = "فشل التحقق"
+            detail_text_for_gui = "استجابة فارغة من الخادم عند التحقق من البيانات (دوري)."
+            api_error_occurred = True
+            self._emit_global_log(f"فشل التحقق الدوري: استجابة فارغة.", is_general=False, member_obj=member_obj)
+        
+        icon = get_icon_name_for_status(new_status) 
+        self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, icon)
+        return validation_can_progress, api_error_occurred
+
+    def process_pre_inscription_info(self, member_obj): 
+        if not self.is_running: return False, False
+        operation_name = "جلب معلومات الاسم"
+        member_display_name = self._member_display_name(member_obj)
+        if not member_obj.pre_inscription_id:
+            detail_text = "ID التسجيل المسبق غير متوفر لجلب الاسم."
+            self._update_member_and_emit(member_obj, member_obj.status, detail_text, member_obj.status_info.icon_name)
+            return False, False 
+        
+        self._update_member_and_emit(member_obj, "جاري جلب الاسم...", f"محاولة جلب الاسم واللقب للعضو {member_display_name}", get_icon_name_for_status("جاري جلب الاسم..."))
+        data, error = self.api_client.get_pre_inscription_info(member_obj.pre_inscription_id)
+        if not self.is_running: return False, False
+        
+        new_status = member_obj.status 
+        icon = get_icon_name_for_status(new_status)
+        info_fetched_successfully = False
+        api_error_occurred = False
+        detail_text_for_gui = member_obj.last_activity_detail
+
+        if error:
+            if "جاري جلب الاسم..." in new_status : new_status = "فشل جلب المعلومات" 
+            detail_text_for_gui = _translate_api_error(error, operation_name)
+            api_error_occurred = True
+            self._emit_global_log(f"فشل جلب اسم العضو: {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+        elif data:
+            member_obj.nom_fr = data.get("nomDemandeurFr", "")
+            member_obj.prenom_fr = data.get("prenomDemandeurFr", "")
+            member_obj.nom_ar = data.get("nomDemandeurAr", "")
+            member_obj.prenom_ar = data.get("prenomDemandeurAr", "")
+            
+            current_activity = member_obj.last_activity_detail.replace(" جاري جلب الاسم...", "").strip() 
+            
+            if "جاري جلب الاسم..." in new_status or new_status == "تم التحقق": 
+                if member_obj.already_has_rdv: 
+                    new_status = "لديه موعد مسبق" 
+                    detail_text_for_gui = f"لديه موعد محجوز بالفعل. الاسم: {member_obj.get_full_name_ar()}"
+                else: 
+                    new_status = "تم جلب المعلومات" 
+                    detail_text_for_gui = f"تم جلب الاسم: {member_obj.get_full_name_ar()}. {current_activity}"
+            elif member_obj.status == "لديه موعد مسبق": 
+                 detail_text_for_gui = f"لديه موعد محجوز بالفعل. الاسم: {member_obj.get_full_name_ar()}"
+            else: 
+                 new_status = "تم جلب المعلومات"
+                 detail_text_for_gui = f"تم جلب الاسم: {member_obj.get_full_name_ar()}. {current_activity}"
+            
+            detail_text_for_gui = detail_text_for_gui.strip()
+            if self.is_running: self.listener.member_name_fetched(member_obj.member_id, member_obj.nom_ar, member_obj.prenom_ar) 
+            self._emit_global_log(f"تم جلب اسم العضو.", is_general=False, member_obj=member_obj)
+            info_fetched_successfully = True
+        else: 
+            if "جاري جلب الاسم..." in new_status : new_status = "فشل جلب المعلومات"
+            detail_text_for_gui = "استجابة فارغة عند جلب معلومات الاسم."
+            api_error_occurred = True 
+            self._emit_global_log(f"فشل جلب اسم العضو: استجابة فارغة.", is_general=False, member_obj=member_obj)
+        
+        icon = get_icon_name_for_status(new_status)
+        self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, icon)
+        return info_fetched_successfully, api_error_occurred
+
+
+    def process_available_dates_and_book(self, member_obj): 
+        if not self.is_running: return False, False
+        operation_name_dates = "البحث عن مواعيد متاحة"
+        operation_name_book = "حجز الموعد"
+        member_display_name = self._member_display_name(member_obj)
+
+        if not (member_obj.structure_id and member_obj.pre_inscription_id and member_obj.demandeur_id and member_obj.has_actual_pre_inscription):
+            detail_text = "معلومات ناقصة أو التسجيل المسبق غير مؤكد لمحاولة الحجز."
+            self._update_member_and_emit(member_obj, member_obj.status, detail_text, member_obj.status_info.icon_name)
+            return False, False 
+        
+        self._update_member_and_emit(member_obj, "جاري البحث عن مواعيد...", f"البحث عن مواعيد للعضو {member_display_name}", get_icon_name_for_status("جاري البحث عن مواعيد..."))
+        self._emit_global_log(f"جاري البحث عن مواعيد...", is_general=False, member_obj=member_obj)
+        data, error = self.slot_watcher.get_available_dates(member_obj.structure_id, member_obj.pre_inscription_id)
+        if not self.is_running: return False, False
+        
+        new_status = member_obj.status
+        icon = get_icon_name_for_status(new_status)
+        booking_successful = False
+        api_error_occurred_this_stage = False 
+        detail_text_for_gui = member_obj.last_activity_detail
+
+        if error:
+            new_status = "فشل جلب التواريخ"
+            detail_text_for_gui = _translate_api_error(error, operation_name_dates)
+            api_error_occurred_this_stage = True
+            self._emit_global_log(f"فشل جلب التواريخ: {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+        elif data and "dates" in data:
+            available_dates = data["dates"]
+            if available_dates:
+                candidate_dates, invalid_dates = self.booking_strategy.candidate_dates(available_dates)
+                if not candidate_dates and invalid_dates:
+                    new_status = "خطأ في تنسيق التاريخ"
+                    detail_text_for_gui = f"تنسيق تاريخ غير صالح من الخادم: {invalid_dates[0]}"
+                    api_error_occurred_this_stage = True 
+                    self._emit_global_log(f"خطأ في تنسيق التاريخ من الخادم: {invalid_dates[0]}", is_general=False, member_obj=member_obj)
+                    self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, get_icon_name_for_status(new_status))
+                    return False, api_error_occurred_this_stage
+                if not candidate_dates:
+                    new_status = "لا توجد مواعيد"
+                    detail_text_for_gui = f"المواعيد المتاحة ({len(available_dates)}) لا تقع في أيام الأسبوع المسموح بها."
+                    self._emit_global_log(f"تم تجاهل {len(available_dates)} موعد متاح لأنها خارج أيام الأسبوع المسموح بها.", is_general=False, member_obj=member_obj)
+                    self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, get_icon_name_for_status(new_status))
+                    return False, False
+
+                if not (member_obj.ccp and member_obj.nom_fr and member_obj.prenom_fr):
+                    new_status = "فشل الحجز"
+                    detail_text_for_gui = "معلومات CCP أو الاسم الفرنسي مفقودة للحجز."
+                    self._emit_global_log(f"فشل حجز الموعد: معلومات ناقصة (CCP أو الاسم الفرنسي).", is_general=False, member_obj=member_obj)
+                    self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, get_icon_name_for_status(new_status))
+                    return False, False 
+
+                # Walk the offered dates: a date that filled up between GetAvailableDates and
+                # Create (or a server error) moves straight on to the next one instead of
+                # waiting a whole monitoring interval.
+                for attempt_number, formatted_date in enumerate(candidate_dates, 1):
+                    attempt_label = f"(المحاولة {attempt_number} من {len(candidate_dates)})"
+                    self._update_member_and_emit(member_obj, "جاري حجز الموعد...", f"محاولة الحجز في {formatted_date} {attempt_label}", get_icon_name_for_status("جاري حجز الموعد..."))
+                    self._emit_global_log(f"جاري حجز موعد في تاريخ {formatted_date} {attempt_label}", is_general=False, member_obj=member_obj)
+                    
+                    if not self.is_running: return False, api_error_occurred_this_stage 
+                    book_data, book_error = self.api_client.create_rendezvous(
+                        member_obj.pre_inscription_id, member_obj.ccp, member_obj.nom_fr, member_obj.prenom_fr,
+                        formatted_date, member_obj.demandeur_id
+                    )
+                    if not self.is_running: return False, api_error_occurred_this_stage 
+
+                    try_next_date = False
+                    if book_error: 
+                        new_status = "فشل الحجز"
+                        detail_text_for_gui = _translate_api_error(book_error, operation_name_book)
+                        api_error_occurred_this_stage = True
+                        try_next_date = True
+                        self._emit_global_log(f"فشل حجز الموعد في {formatted_date}: {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+                    elif book_data: 
+                        if isinstance(book_data, dict) and book_data.get("Eligible") is False and book_data.get("serviceUp") is True:
+                            new_status = "غير مؤهل للحجز"
+                            api_message = book_data.get("message") 
+                            if not api_message or not isinstance(api_message, str) or api_message.strip() == "":
+                                 api_message = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة."
+                            detail_text_for_gui = api_message
+                            self._emit_global_log(f"غير مؤهل للحجز: {api_message}", is_general=False, member_obj=member_obj)
+                            logger.warning(f"العضو {member_display_name} غير مؤهل للحجز (Eligible:false, serviceUp:true): {book_data}")
+                            api_error_occurred_this_stage = False 
+                        elif isinstance(book_data, dict) and book_data.get("Eligible") is False : 
+                            new_status = "غير مؤهل للحجز"
+                            api_message = book_data.get("message", "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة.")
+                            detail_text_for_gui = api_message
+                            self._emit_global_log(f"غير مؤهل للحجز: {api_message}", is_general=False, member_obj=member_obj)
+                            logger.warning(f"العضو {member_display_name} غير مؤهل للحجز حسب استجابة الخادم: {book_data}")
+                            api_error_occurred_this_stage = False 
+                        elif isinstance(book_data, dict) and book_data.get("code") == 0 and book_data.get("rendezVousId"): 
+                            member_obj.rdv_id = book_data.get("rendezVousId")
+                            member_obj.rdv_date = formatted_date 
+                            member_obj.rdv_source = "system" # Set source to system
+                            new_status = "تم الحجز"
+                            detail_text_for_gui = f"تم الحجز بنجاح في: {formatted_date}, ID: {member_obj.rdv_id} {attempt_label}"
+                            self._emit_global_log(f"تم حجز موعد بنجاح في {formatted_date} {attempt_label}", is_general=False, member_obj=member_obj)
+                            logger.info(f"العضو {member_display_name}: نجح الحجز في {formatted_date} {attempt_label}.")
+                            booking_successful = True
+                            api_error_occurred_this_stage = False
+                        else: 
+                            new_status = "فشل الحجز"
+                            err_msg_detail = str(book_data.get("message", "خطأ غير معروف من الخادم عند الحجز")) if isinstance(book_data, dict) else str(book_data)
+                            
+                            if isinstance(book_data, dict) and "raw_text" in book_data and "\"Eligible\":false" in book_data["raw_text"].lower(): 
+                                 new_status = "غير مؤهل للحجز"
+                                 raw_text_message = "نعتذر منكم! لا يمكنكم حجز موعد للاستفادة من منحة البطالة لعدم استيفائك لأحد شروط الأهلية اللازمة. (استجابة نصية)"
+                                 try:
+                                     parsed_raw = json.loads(book_data["raw_text"])
+                                     if "message" in parsed_raw: raw_text_message = parsed_raw["message"]
+                                 except: pass 
+
+                                 detail_text_for_gui = raw_text_message
+                                 self._emit_global_log(f"غير مؤهل للحجز (استجابة نصية): {raw_text_message}", is_general=False, member_obj=member_obj)
+                                 logger.warning(f"العضو {member_display_name} غير مؤهل للحجز (استجابة نصية): {book_data['raw_text'][:200]}")
+                                 api_error_occurred_this_stage = False
+                            else:
+                                detail_text_for_gui = f"فشل الحجز: {err_msg_detail}"
+                                api_error_occurred_this_stage = True 
+                                try_next_date = True
+                                self._emit_global_log(f"فشل حجز الموعد في {formatted_date}: {detail_text_for_gui}", is_general=False, member_obj=member_obj)
+                    else: 
+                        new_status = "فشل الحجز"
+                        detail_text_for_gui = "استجابة غير متوقعة أو فارغة عند محاولة الحجز."
+                        api_error_occurred_this_stage = True
+                        try_next_date = True
+                        self._emit_global_log(f"فشل حجز الموعد في {formatted_date}: استجابة غير متوقعة.", is_general=False, member_obj=member_obj)
+
+                    if not try_next_date: break
+                    if attempt_number < len(candidate_dates):
+                        logger.info(f"العضو {member_display_name}: فشل الحجز في {formatted_date}، الانتقال فورًا إلى التاريخ التالي.")
+            else: 
+                new_status = "لا توجد مواعيد"
+                detail_text_for_gui = "لا توجد مواعيد متاحة حاليًا للحجز."
+                self._emit_global_log(f"لا توجد مواعيد متاحة.", is_general=False, member_obj=member_obj)
+                if not member_obj.has_actual_pre_inscription: 
+                    new_status = "يتطلب تسجيل مسبق"
+                    detail_text_for_gui = "مؤهل ولكن لا يوجد تسجيل مسبق بعد (لا مواعيد متاحة حاليًا)."
+        else: 
+            new_status = "فشل جلب التواريخ"
+            detail_text_for_gui = "لم يتم العثور على تواريخ أو استجابة غير صالحة من الخادم."
+            api_error_occurred_this_stage = True
+            self._emit_global_log(f"فشل جلب التواريخ: استجابة غير صالحة.", is_general=False, member_obj=member_obj)
+        
+        icon = get_icon_name_for_status(new_status)
+        self._update_member_and_emit(member_obj, new_status, detail_text_for_gui, icon)
+        return booking_successful, api_error_occurred_this_stage
+
+    def _claim_booking(self, member_obj):
+        # Booking workers and the structure fan-out can reach the same member in one pass;
+        # only the first claim books it.
+        with self._accounting_lock:
+            if member_obj.member_id in self._booking_claims:
+                return False
+            self._booking_claims.add(member_obj.member_id)
+            return True
+
+    def _book_with_structure_fan_out(self, member_obj):
+        if not self._claim_booking(member_obj):
+            logger.debug(f"تخطي البحث عن مواعيد للعضو {self._member_display_name(member_obj)}: تمت محاولة حجزه مع هيكله في هذه الدورة.")
+            return False, False
+        result = self.process_available_dates_and_book(member_obj)
+        if self.is_running and self.slot_watcher.claim_fan_out(member_obj.structure_id):
+            self._fan_out_structure_booking(member_obj.structure_id, member_obj)
+        return result
+
+    def _fan_out_structure_booking(self, structure_id, trigger_member):
+        # Dates just appeared at this structure: book every other eligible member there
+        # now, in the scheduler's visit order, instead of waiting for each one's turn in
+        # the pipeline; with few dates left the longest-waiting members get them first.
+        # Members already queued in this pass are included; their own booking stage
+        # then finds them claimed and skips the date check. Members a stage handler is
+        # working on right now are left to that handler.
+        candidates = self.scheduler.in_visit_order([
+            m for m in list(self.members_list_ref)
+            if m is not trigger_member and m.structure_id == structure_id and is_bookable(m)
+            and m.member_id not in self._removed_member_ids
+            and (m.member_id in self._members_in_flight or not m.is_processing)
+            and m.consecutive_failures < self.MAX_CONSECUTIVE_MEMBER_FAILURES
+        ])
+        if not candidates: return
+        logger.info(f"مواعيد متاحة في الهيكل {structure_id}: محاولة حجز {len(candidates)} عضو آخر فورًا.")
+        self._emit_global_log(f"مواعيد متاحة في الهيكل {structure_id}. جاري حجز {len(candidates)} عضو آخر من نفس الهيكل...")
+        for member in candidates:
+            if not self.is_running: break
+            if not self._try_enter_member(member.member_id): continue
+            try:
+                if not self._claim_booking(member): continue
+                self._book_for_structure(member)
+            finally:
+                self._leave_member(member.member_id)
+
+    def _book_for_structure(self, member):
+        owned_by_pass = member.member_id in self._members_in_flight
+        if not owned_by_pass:
+            self.listener.member_processing(member.member_id, True)
+        try:
+            _, api_error_occurred_booking = self.process_available_dates_and_book(member)
+            if api_error_occurred_booking and not owned_by_pass:
+                with self._accounting_lock:
+                    member.consecutive_failures += 1
+        except Exception as e:
+            logger.exception(f"خطأ غير متوقع أثناء حجز العضو {self._member_display_name(member)} مع هيكله: {e}")
+        finally:
+            if not owned_by_pass:
+                self._schedule_next_visit(member)
+                if self.is_running:
+                    self.listener.member_processing(member.member_id, False)
+
+    def _download_single_pdf_for_monitoring(self, member_obj, report_type, filename_suffix_base, member_specific_dir):
+        if not self.is_running: return None, False, "", ""
+        operation_name = f"تحميل شهادة {filename_suffix_base}"
+        member_display_name = self._member_display_name(member_obj)
+        file_path = None
+        success = False
+        error_msg_for_toast = ""
+        status_msg_for_gui_cell = f"جاري تحميل {filename_suffix_base}..."
+        
+        current_path_attr = 'pdf_honneur_path' if report_type == "HonneurEngagementReport" else 'pdf_rdv_path'
+        
+        current_pdf_path_value = getattr(member_obj, current_path_attr)
+        if current_pdf_path_value and os.path.exists(current_pdf_path_value):
+            logger.info(f"ملف {report_type} موجود بالفعل للعضو {member_display_name} في {current_pdf_path_value}. تخطي التحميل.")
+            return current_pdf_path_value, True, "", f"شهادة {filename_suffix_base} موجودة بالفعل."
+
+        self._update_member_and_emit(member_obj, status_msg_for_gui_cell, f"بدء تحميل {report_type}", get_icon_name_for_status(status_msg_for_gui_cell))
+        self._emit_global_log(f"جاري تحميل شهادة {filename_suffix_base}...", is_general=False, member_obj=member_obj)
+        if not self.is_running: return None, False, "", "" 
+        response_data, api_err = self.api_client.download_pdf(report_type, member_obj.pre_inscription_id)
+        if not self.is_running: return None, False, "", "" 
+
+        if api_err:
+            error_msg_for_toast = _translate_api_error(api_err, operation_name)
+            self._emit_global_log(f"فشل تحميل شهادة {filename_suffix_base}: {error_msg_for_toast}", is_general=False, member_obj=member_obj)
+        elif response_data and (isinstance(response_data, str) or (isinstance(response_data, dict) and "base64Pdf" in response_data)):
+            pdf_b64 = response_data if isinstance(response_data, str) else response_data.get("base64Pdf")
+            try:
+                pdf_content = base64.b64decode(pdf_b64)
+                safe_member_name_part = "".join(c for c in (member_obj.get_full_name_ar() or member_obj.nin) if c.isalnum() or c in (' ', '_', '-')).rstrip().replace(" ","_")
+                if not safe_member_name_part: safe_member_name_part = member_obj.nin 
+                final_filename = f"{filename_suffix_base}_{safe_member_name_part}.pdf" 
+                file_path = os.path.join(member_specific_dir, final_filename)
+                with open(file_path, 'wb') as f:
+                    f.write(pdf_content)
+                setattr(member_obj, current_path_attr, file_path) 
+                success = True
+                status_msg_for_gui_cell = f"تم تحميل {final_filename} بنجاح."
+                self._emit_global_log(f"تم تحميل شهادة {filename_suffix_base} بنجاح.", is_general=False, member_obj=member_obj)
+            except Exception as e_save:
+                error_msg_for_toast = f"خطأ في حفظ ملف {report_type}: {str(e_save)}"
+                self._emit_global_log(f"خطأ في حفظ شهادة {filename_suffix_base}: {e_save}", is_general=False, member_obj=member_obj)
+        else:
+            error_msg_for_toast = f"استجابة غير متوقعة من الخادم لـ {operation_name}."
+            self._emit_global_log(f"فشل تحميل شهادة {filename_suffix_base}: استجابة غير متوقعة.", is_general=False, member_obj=member_obj)
+        
+        if not success:
+            status_msg_for_gui_cell = f"فشل تحميل {filename_suffix_base}: {error_msg_for_toast.split(':')[0]}" 
+        
+        return file_path, success, error_msg_for_toast, status_msg_for_gui_cell
+
+    def process_pdf_download(self, member_obj): 
+        if not self.is_running: return False, False
+        member_display_name = self._member_display_name(member_obj)
+        if not member_obj.pre_inscription_id:
+            detail_text = "ID التسجيل مفقود لتحميل PDF."
+            self._update_member_and_emit(member_obj, member_obj.status, detail_text, member_obj.status_info.icon_name)
+            return False, False 
+        
+        documents_location = self.output_base_dir
+        base_app_dir_name = "ملفات_المنحة_البرنامج"
+        member_name_for_folder = member_obj.get_full_name_ar()
+        if not member_name_for_folder or member_name_for_folder.isspace(): 
+            member_name_for_folder = member_obj.nin 
+        
+        safe_folder_name_part = "".join(c for c in member_name_for_folder if c.isalnum() or c in (' ', '_', '-')).rstrip().replace(" ", "_")
+        if not safe_folder_name_part: safe_folder_name_part = member_obj.nin 
+        
+        member_specific_output_dir = os.path.join(documents_location, base_app_dir_name, safe_folder_name_part)
+        
+        try:
+            os.makedirs(member_specific_output_dir, exist_ok=True) 
+        except Exception as e_mkdir:
+            logger.error(f"فشل إنشاء مجلد للعضو {member_display_name} في process_pdf_download: {e_mkdir}")
+            user_friendly_mkdir_error = f"فشل إنشاء مجلد لحفظ الملفات: {e_mkdir}"
+            self._update_member_and_emit(member_obj, "فشل تحميل PDF", user_friendly_mkdir_error, get_icon_name_for_status("فشل تحميل PDF"))
+            self._emit_global_log(f"فشل إنشاء مجلد: {e_mkdir}", is_general=False, member_obj=member_obj)
+            return False, False 
+        
+        all_relevant_pdfs_downloaded_successfully = True
+        any_api_error_this_pdf_stage = False
+        download_details_agg = [] 
+
+        if not self.is_running: return False, any_api_error_this_pdf_stage 
+        fp_h, s_h, err_h, stat_h = self._download_single_pdf_for_monitoring(member_obj, "HonneurEngagementReport", "التزام", member_specific_output_dir)
+        download_details_agg.append(stat_h)
+        if not s_h: all_relevant_pdfs_downloaded_successfully = False
+        if err_h: any_api_error_this_pdf_stage = True 
+        
+        if self.is_running and (member_obj.already_has_rdv or member_obj.rdv_id): 
+            fp_r, s_r, err_r, stat_r = self._download_single_pdf_for_monitoring(member_obj, "RdvReport", "موعد", member_specific_output_dir)
+            download_details_agg.append(stat_r)
+            if not s_r: all_relevant_pdfs_downloaded_successfully = False
+            if err_r: any_api_error_this_pdf_stage = True
+        elif self.is_running: 
+            msg_skip_rdv = "شهادة الموعد غير مطلوبة (لا يوجد موعد مسجل)."
+            logger.info(msg_skip_rdv + f" للعضو {member_display_name}")
+            download_details_agg.append(msg_skip_rdv)
+        
+        final_status_after_pdfs = member_obj.status
+        if all_relevant_pdfs_downloaded_successfully:
+            if member_obj.status != "مستفيد حاليًا من المنحة": 
+                 final_status_after_pdfs = "مكتمل"
+        else:
+            if "فشل تحميل PDF" not in final_status_after_pdfs and member_obj.status != "مستفيد حاليًا من المنحة": 
+                final_status_after_pdfs = "فشل تحميل PDF" 
+            
+        final_detail_message = "; ".join(msg for msg in download_details_agg if msg) 
+        self._update_member_and_emit(member_obj, final_status_after_pdfs, final_detail_message, get_icon_name_for_status(final_status_after_pdfs))
+        
+        return all_relevant_pdfs_downloaded_successfully, any_api_error_this_pdf_stage
+
+    def stop(self): 
+        logger.info("طلب إيقاف المراقبة...")
+        self.is_running = False
+        self._wake_event.set()
+
+    def join_workers(self, timeout):
+        """Stops the stage pipeline's workers; True once none is left running."""
+        pipeline = self.pipeline
+        return pipeline is None or pipeline.shutdown(timeout)
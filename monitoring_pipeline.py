@@ -0,0 +1,158 @@
+# monitoring_pipeline.py
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MemberJob:
+    """One member travelling through the pipeline during a monitoring pass."""
+
+    def __init__(self, member, log_prefix):
+        self.member = member
+        self.log_prefix = log_prefix
+        self.had_api_error = False
+        self.submitted_at = time.monotonic()
+
+
+class _StageStats:
+    def __init__(self):
+        self.completed = 0
+        self.active = 0
+        self.busy_seconds = 0.0
+
+
+class StagePipeline:
+    """
+    Runs jobs through named stages, each with its own queue and bounded set of worker
+    threads. A stage handler returns the name of the next stage (or None when the job
+    is done), so a slow stage only holds up its own queue: booking workers never wait
+    behind a PDF download.
+    """
+
+    def __init__(self, stages, on_job_done, on_job_cancelled=None):
+        # stages: list of (name, worker_count, handler); handler(job) -> next stage name or None
+        self._stages = stages
+        self._on_job_done = on_job_done
+        self._on_job_cancelled = on_job_cancelled or on_job_done
+        self._queues = {name: queue.Queue() for name, _, _ in stages}
+        self._stats = {name: _StageStats() for name, _, _ in stages}
+        self._workers = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending_jobs = 0
+        self._cancelled = False
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for name, worker_count, handler in self._stages:
+            for worker_number in range(max(1, worker_count)):
+                worker = threading.Thread(target=self._worker_loop, args=(name, handler),
+                                          name=f"pipeline-{name}-{worker_number + 1}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, stage_name, job):
+        with self._lock:
+            if self._pending_jobs == 0:
+                self._cancelled = False # A cancel that found nothing left to drop must not stop the next pass
+            self._pending_jobs += 1
+        self._queues[stage_name].put(job)
+
+    def pending_jobs(self):
+        with self._lock:
+            return self._pending_jobs
+
+    def wait_idle(self, timeout=None):
+        """Blocks until every submitted job is done (True) or the timeout expires (False)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending_jobs == 0, timeout)
+
+    def cancel_pending(self):
+        """Drops queued jobs; jobs already inside a handler finish their stage and then stop."""
+        with self._lock:
+            if self._pending_jobs == 0:
+                return # Everything finished meanwhile; _finish only clears the flag on the way to idle
+            self._cancelled = True
+        for q in self._queues.values():
+            while True:
+                try:
+                    job = q.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    q.put(_STOP)
+                    break
+                self._finish(job, self._on_job_cancelled)
+
+    def shutdown(self, timeout=5):
+        """
+        Drops queued jobs and stops the workers, waiting up to timeout seconds in total.
+        Returns True once every worker has exited; may be called again to keep waiting.
+        """
+        self.cancel_pending()
+        for name, worker_count, _ in self._stages:
+            for _ in range(max(1, worker_count)):
+                self._queues[name].put(_STOP)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        return not self._workers
+
+    def stats(self):
+        """Per stage: queued, active, completed, average seconds per job and jobs per minute."""
+        elapsed_minutes = max((time.monotonic() - (self._started_at or time.monotonic())) / 60, 1e-9)
+        result = {}
+        with self._lock:
+            for name, _, _ in self._stages:
+                stage_stats = self._stats[name]
+                result[name] = {
+                    "queued": self._queues[name].qsize(),
+                    "active": stage_stats.active,
+                    "completed": stage_stats.completed,
+                    "avg_seconds": stage_stats.busy_seconds / stage_stats.completed if stage_stats.completed else 0.0,
+                    "per_minute": stage_stats.completed / elapsed_minutes
+                }
+        return result
+
+    def _worker_loop(self, stage_name, handler):
+        stage_stats = self._stats[stage_name]
+        stage_queue = self._queues[stage_name]
+        while True:
+            job = stage_queue.get()
+            if job is _STOP:
+                break
+            with self._lock:
+                stage_stats.active += 1
+            started_at = time.monotonic()
+            next_stage = None
+            try:
+                next_stage = handler(job)
+            except Exception as e:
+                logger.exception(f"خطأ غير متوقع في مرحلة '{stage_name}': {e}")
+            with self._lock:
+                stage_stats.active -= 1
+                stage_stats.completed += 1
+                stage_stats.busy_seconds += time.monotonic() - started_at
+                cancelled = self._cancelled
+            if next_stage and not cancelled:
+                self._queues[next_stage].put(job)
+            else:
+                self._finish(job, self._on_job_cancelled if next_stage else self._on_job_done)
+
+    def _finish(self, job, callback):
+        try:
+            callback(job)
+        except Exception as e:
+            logger.exception(f"خطأ أثناء إنهاء مهمة العضو في خط المعالجة: {e}")
+        with self._idle:
+            self._pending_jobs -= 1
+            if self._pending_jobs == 0:
+                self._cancelled = False
+                self._idle.notify_all()
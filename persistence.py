@@ -0,0 +1,88 @@
+# persistence.py
+import os
+import json
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_json(path, data):
+    """
+    Writes JSON to a temp file in the same folder, fsyncs it and renames it over path,
+    so a crash leaves either the old file or the new one, never a truncated mix.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"): # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class WriteBehindWorker:
+    """
+    Runs save_callback on a background thread. request_save() only flags that something
+    changed; requests arriving within debounce_seconds of each other share one save, so
+    a burst of edits costs a single write and the caller never blocks on disk I/O.
+    """
+
+    def __init__(self, save_callback, debounce_seconds, on_error=None, name="persistence-worker"):
+        self._save_callback = save_callback
+        self._on_error = on_error # Called with the exception, from whichever thread saved
+        self._debounce_seconds = debounce_seconds
+        self._requested = threading.Event()
+        self._stopping = threading.Event()
+        self._save_lock = threading.Lock() # The worker and flush() never save concurrently
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def request_save(self):
+        self._requested.set()
+
+    def flush(self, timeout=5):
+        """Stops the worker and runs a final save on the calling thread; used on shutdown."""
+        self._stopping.set()
+        self._requested.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return self._save_now()
+
+    def _run(self):
+        while True:
+            self._requested.wait()
+            if self._stopping.is_set():
+                break
+            # Let the burst settle; flush() cuts the wait short and does the final save itself.
+            if self._stopping.wait(self._debounce_seconds):
+                break
+            self._requested.clear() # Cleared before saving: a change during the save triggers another one
+            self._save_now()
+
+    def _save_now(self):
+        with self._save_lock:
+            try:
+                self._save_callback()
+                return True
+            except Exception as e:
+                logger.exception(f"خطأ أثناء الحفظ في الخلفية: {e}")
+                if self._on_error:
+                    self._on_error(e)
+                return False
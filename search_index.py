@@ -0,0 +1,120 @@
+# search_index.py
+import re
+import unicodedata
+
+# Latin accents and Arabic harakat/hamza marks, as left by NFKD decomposition.
+_COMBINING_MARKS = re.compile("[\u0300-\u036f\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_LETTER_FOLDS = {"\u0671": "ا", "ة": "ه", "ى": "ي", "\u0640": None} # alef wasla, ta marbuta, alef maqsura, tatweel
+_LETTER_FOLDS.update({chr(0x0660 + digit): str(digit) for digit in range(10)}) # Arabic-Indic digits
+_LETTER_FOLDS.update({chr(0x06F0 + digit): str(digit) for digit in range(10)}) # Extended (Persian) digits
+_FOLD_TABLE = str.maketrans(_LETTER_FOLDS)
+
+GRAM_SIZE = 3
+
+# Member fields that make up the search key; changes to any other field leave the index as is.
+SEARCHABLE_FIELDS = frozenset(['nin', 'wassit_no', 'nom_ar', 'prenom_ar', 'nom_fr', 'prenom_fr', 'phone_number', 'ccp'])
+
+
+def normalize_search_text(text):
+    """
+    Folds text for matching: casefolded, accents and harakat dropped, hamza forms of alef,
+    waw and ya reduced to the bare letter, ta marbuta to ha, alef maqsura to ya, tatweel
+    removed and Arabic digits turned into ASCII ones.
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return _COMBINING_MARKS.sub("", decomposed).translate(_FOLD_TABLE)
+
+
+def _grams(key):
+    return {word[start:start + GRAM_SIZE] for word in key.split() for start in range(len(word) - GRAM_SIZE + 1)}
+
+
+class MemberSearchIndex:
+    """
+    Trigram index over the normalized searchable fields of each member (Arabic and French
+    names, NIN, wassit number, CCP, phone). A query word matches anywhere inside a field
+    word; the trigram postings narrow the candidates and the stored normalized key
+    confirms each one, so a lookup never scans the whole member list.
+    """
+
+    def __init__(self):
+        self._members = {} # member_id -> member
+        self._keys = {} # member_id -> normalized search key as indexed
+        self._postings = {} # trigram -> set of member_ids
+
+    @staticmethod
+    def search_key(member):
+        # Newline-separated so a query word cannot match across two fields.
+        return normalize_search_text("\n".join((
+            member.nin or "", member.wassit_no or "", member.nom_ar or "", member.prenom_ar or "",
+            member.nom_fr or "", member.prenom_fr or "", member.phone_number or "", member.ccp or ""
+        )))
+
+    def rebuild(self, members):
+        self._members.clear()
+        self._keys.clear()
+        self._postings.clear()
+        for member in members:
+            self.update(member)
+
+    def update(self, member):
+        """Indexes a new member or re-indexes one whose searchable fields may have changed."""
+        member_id = member.member_id
+        self._members[member_id] = member
+        key = self.search_key(member)
+        old_key = self._keys.get(member_id)
+        if key == old_key:
+            return
+        if old_key is not None:
+            self._unpost(member_id, old_key)
+        self._keys[member_id] = key
+        postings_by_gram = self._postings
+        for gram in _grams(key):
+            postings = postings_by_gram.get(gram)
+            if postings is None:
+                postings_by_gram[gram] = {member_id}
+            else:
+                postings.add(member_id)
+
+    def remove(self, member):
+        member_id = member.member_id
+        self._members.pop(member_id, None)
+        old_key = self._keys.pop(member_id, None)
+        if old_key is not None:
+            self._unpost(member_id, old_key)
+
+    def contains(self, member):
+        return self._members.get(member.member_id) is member
+
+    def matches(self, member, query_words):
+        """True when every (normalized) query word occurs in the member's indexed fields."""
+        if not self.contains(member):
+            self.update(member)
+        key = self._keys[member.member_id]
+        return all(word in key for word in query_words)
+
+    def search(self, query_words):
+        """Indexed members matching every (normalized) query word, in no particular order."""
+        candidate_ids = None
+        for word in query_words:
+            if len(word) < GRAM_SIZE:
+                continue # Too short for a trigram; checked against the keys below
+            for postings in sorted((self._postings.get(gram, ()) for gram in _grams(word)), key=len):
+                candidate_ids = set(postings) if candidate_ids is None else candidate_ids.intersection(postings)
+                if not candidate_ids:
+                    return []
+        if candidate_ids is None:
+            candidate_ids = self._keys.keys()
+        keys = self._keys
+        return [self._members[member_id] for member_id in candidate_ids
+                if all(word in keys[member_id] for word in query_words)]
+
+    def _unpost(self, member_id, key):
+        for gram in _grams(key):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(member_id)
+                if not postings:
+                    del self._postings[gram]
@@ -0,0 +1,65 @@
+# slot_watcher.py
+import time
+import logging
+import threading
+
+from config import STRUCTURE_POLL_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class StructureSlotWatcher:
+    """
+    Shares GetAvailableDates results between members of the same structure.
+    Dates are per structure, so polling once with a representative pre-inscription
+    is enough; every other member at that structure reuses the cached result until
+    it is older than poll_interval_seconds.
+    """
+
+    def __init__(self, api_client, poll_interval_seconds=STRUCTURE_POLL_INTERVAL_SECONDS):
+        self.api_client = api_client
+        self.poll_interval_seconds = poll_interval_seconds
+        self._lock = threading.Lock()
+        self._results = {}      # structure_id -> (polled_at, (data, error))
+        self._fanned_out = {}   # structure_id -> polled_at of the poll that was already fanned out
+        self._structure_locks = {}
+
+    def get_available_dates(self, structure_id, pre_inscription_id):
+        with self._lock:
+            structure_lock = self._structure_locks.setdefault(structure_id, threading.Lock())
+        # One poll per structure at a time: concurrent callers wait for it and reuse the result.
+        with structure_lock:
+            with self._lock:
+                cached = self._results.get(structure_id)
+                if cached and time.monotonic() - cached[0] < self.poll_interval_seconds:
+                    logger.debug(f"مواعيد الهيكل {structure_id}: استخدام نتيجة الفحص السابقة.")
+                    return cached[1]
+
+            result = self.api_client.get_available_dates(structure_id, pre_inscription_id)
+            data, error = result
+            if not error:
+                # Errors are not cached so the next member at the structure retries the poll.
+                with self._lock:
+                    self._results[structure_id] = (time.monotonic(), result)
+            return result
+
+    def claim_fan_out(self, structure_id):
+        """Returns True once per poll that found dates, for the caller that should book the whole structure."""
+        with self._lock:
+            cached = self._results.get(structure_id)
+            if not cached or self._fanned_out.get(structure_id) == cached[0]:
+                return False
+            data, error = cached[1]
+            if error or not (isinstance(data, dict) and data.get("dates")):
+                return False
+            self._fanned_out[structure_id] = cached[0]
+            return True
+
+    def invalidate(self, structure_id=None):
+        with self._lock:
+            if structure_id is None:
+                self._results.clear()
+                self._fanned_out.clear()
+            else:
+                self._results.pop(structure_id, None)
+                self._fanned_out.pop(structure_id, None)
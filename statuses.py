@@ -0,0 +1,174 @@
+# statuses.py
+# Member status helpers that do not depend on Qt, shared by the GUI and the headless engine.
+import functools
+
+# Status codes. A member refers to the shared StatusInfo of its status instead of keeping
+# its own copy of the text; STATUS_TEXTS[code] is the Arabic text shown in the GUI and
+# persisted. Texts outside the catalog (built at runtime, e.g. "جاري تحميل ...") all share
+# STATUS_OTHER and keep their own text.
+STATUS_NEW = 0
+STATUS_VALIDATED = 1
+STATUS_NEEDS_PRE_INSCRIPTION = 2
+STATUS_INFO_FETCHED = 3
+STATUS_HAS_RDV = 4
+STATUS_BOOKED = 5
+STATUS_COMPLETED = 6
+STATUS_BENEFICIARY = 7
+STATUS_NO_DATES = 8
+STATUS_INITIALLY_INELIGIBLE = 9
+STATUS_BOOKING_INELIGIBLE = 10
+STATUS_INVALID_INPUT = 11
+STATUS_VALIDATION_FAILED = 12
+STATUS_INITIAL_VALIDATION_FAILED = 13
+STATUS_INFO_FETCH_FAILED = 14
+STATUS_DATES_FETCH_FAILED = 15
+STATUS_DATE_FORMAT_ERROR = 16
+STATUS_BOOKING_FAILED = 17
+STATUS_PDF_FAILED = 18
+STATUS_REPEATED_FAILURE = 19
+STATUS_PROCESSING_ERROR = 20
+STATUS_SINGLE_CHECK_ERROR = 21
+STATUS_INITIAL_FETCH_ERROR = 22
+STATUS_OTHER = 23
+
+STATUS_TEXTS = [
+    "جديد",
+    "تم التحقق",
+    "يتطلب تسجيل مسبق",
+    "تم جلب المعلومات",
+    "لديه موعد مسبق",
+    "تم الحجز",
+    "مكتمل",
+    "مستفيد حاليًا من المنحة",
+    "لا توجد مواعيد",
+    "غير مؤهل مبدئيًا",
+    "غير مؤهل للحجز",
+    "بيانات الإدخال خاطئة",
+    "فشل التحقق",
+    "فشل التحقق الأولي",
+    "فشل جلب المعلومات",
+    "فشل جلب التواريخ",
+    "خطأ في تنسيق التاريخ",
+    "فشل الحجز",
+    "فشل تحميل PDF",
+    "فشل بشكل متكرر",
+    "خطأ في المعالجة",
+    "خطأ في الفحص الفوري",
+    "خطأ في الجلب الأولي",
+    "", # STATUS_OTHER: the member's own text is shown instead
+]
+
+# Categories used by the scheduler.
+BOOKABLE_STATUSES = ["تم جلب المعلومات", "تم التحقق", "لا توجد مواعيد", "فشل جلب التواريخ", "يتطلب تسجيل مسبق"]
+PDF_ONLY_STATUSES = ["مكتمل", "لديه موعد مسبق"]
+TERMINAL_STATUSES = ["مستفيد حاليًا من المنحة", "غير مؤهل للحجز"]
+SUCCESS_STATUSES = ["مكتمل", "مستفيد حاليًا من المنحة", "تم الحجز"]
+
+
+class StatusInfo:
+    """
+    What the GUI, threads and scheduler need to know about one status, worked out once
+    per status code instead of by substring tests on every update. color_name is a
+    utils.QColorConstants attribute (or None for the default row color), so this module
+    stays free of Qt.
+    """
+    __slots__ = ('code', 'text', 'icon_name', 'color_name', 'is_terminal', 'is_bookable', 'is_pdf_only', 'is_error', 'is_success', 'is_transient')
+
+    def __init__(self, code, text):
+        self.code = code
+        self.text = text
+        self.icon_name = _icon_name_rule(text)
+        self.color_name = _color_name_rule(text)
+        self.is_terminal = text in TERMINAL_STATUSES
+        self.is_bookable = text in BOOKABLE_STATUSES
+        self.is_pdf_only = text in PDF_ONLY_STATUSES
+        self.is_error = "فشل" in text or "خطأ" in text or "غير مؤهل" in text or "خاطئة" in text
+        self.is_success = text in SUCCESS_STATUSES
+        self.is_transient = is_transient_status(text)
+
+
+def is_transient_status(status_text):
+    """True for the "جاري ..." texts shown while a step is in progress; they are not outcomes."""
+    return status_text.startswith("جاري")
+
+
+_codes_by_text = {text: code for code, text in enumerate(STATUS_TEXTS) if code != STATUS_OTHER}
+OTHER_STATUS_INFO_CACHE_SIZE = 256 # Runtime texts whose StatusInfo is kept for reuse; members hold their own anyway
+
+
+def status_code(status_text):
+    """Code for a status text; STATUS_OTHER for any text outside the catalog."""
+    return _codes_by_text.get(status_text, STATUS_OTHER)
+
+
+def status_text(code):
+    return STATUS_TEXTS[code]
+
+
+def status_info(code):
+    return STATUS_INFOS[code]
+
+
+def status_info_for_text(status_text):
+    """
+    StatusInfo for any status text: the shared catalog entry, or for a runtime text a
+    STATUS_OTHER entry carrying that text. Nothing is added to the catalog.
+    """
+    code = _codes_by_text.get(status_text)
+    if code is not None:
+        return STATUS_INFOS[code]
+    return _other_status_info(status_text)
+
+
+@functools.lru_cache(maxsize=OTHER_STATUS_INFO_CACHE_SIZE)
+def _other_status_info(status_text):
+    return StatusInfo(STATUS_OTHER, status_text)
+
+
+def get_icon_name_for_status(status_text):
+    """
+    Determines the QStyle standard pixmap name string based on member status.
+    Returns a string like "SP_DialogYesButton".
+    """
+    return status_info_for_text(status_text).icon_name
+
+
+def _icon_name_rule(status_text):
+    # Order matters: more specific checks should come before general ones.
+    
+    if status_text == "مستفيد حاليًا من المنحة": return "SP_ FEATURE_खुशी" # Using a "happy" or "star" like icon if available, SP_DialogApplyButton as fallback
+    if status_text == "مكتمل": return "SP_DialogYesButton"
+    if status_text == "تم الحجز": return "SP_DialogSaveButton" 
+    if status_text == "تم جلب المعلومات": return "SP_DialogApplyButton" 
+    if status_text == "تم التحقق": return "SP_DialogApplyButton"
+    if status_text == "تم التحقق (فوري)": return "SP_DialogApplyButton"
+    if status_text == "تم جلب المعلومات (فوري)": return "SP_DialogApplyButton"
+
+
+    if "فشل" in status_text or "خاطئة" in status_text or "خطأ" in status_text: return "SP_MessageBoxCritical"
+    if "غير مؤهل" in status_text : return "SP_MessageBoxCritical" 
+    
+    if "لديه موعد مسبق" in status_text: return "SP_MessageBoxInformation" 
+    if "يتطلب تسجيل مسبق" in status_text: return "SP_MessageBoxWarning"
+    if "لا توجد مواعيد" in status_text: return "SP_MessageBoxInformation"
+    if status_text == "فشل بشكل متكرر": return "SP_MessageBoxWarning" 
+
+    if "جاري" in status_text or "البحث" in status_text or "محاولة" in status_text : return "SP_ArrowRight" 
+    
+    if status_text == "جديد": return "SP_CustomBase" 
+    
+    return "SP_CustomBase" 
+
+
+def _color_name_rule(status_text):
+    if status_text == "مستفيد حاليًا من المنحة": return "BENEFITING_GREEN_DARK_THEME"
+    if status_text == "بيانات الإدخال خاطئة": return "PINK_DARK_THEME"
+    if status_text == "لديه موعد مسبق": return "LIGHT_BLUE_DARK_THEME"
+    if status_text == "غير مؤهل للحجز": return "ORANGE_RED_DARK_THEME"
+    if status_text == "مكتمل": return "LIGHT_GREEN_DARK_THEME"
+    if "فشل" in status_text or "غير مؤهل" in status_text or "خطأ" in status_text: return "LIGHT_PINK_DARK_THEME"
+    if "يتطلب تسجيل مسبق" in status_text: return "LIGHT_YELLOW_DARK_THEME"
+    return None
+
+
+STATUS_INFOS = [StatusInfo(code, text) for code, text in enumerate(STATUS_TEXTS)]
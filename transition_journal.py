@@ -0,0 +1,135 @@
+# transition_journal.py
+import os
+import json
+import time
+import logging
+import threading
+
+from persistence import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+def _segment_first_seq(segment_name):
+    # "<date>-<time>-<first seq>-<last seq>.jsonl"; seqs only grow, so this orders segments by age.
+    try:
+        return int(segment_name[:-len(".jsonl")].split("-")[2])
+    except (IndexError, ValueError):
+        return None # Not a segment this journal wrote; left alone
+
+
+class TransitionJournal:
+    """
+    Append-only JSONL log of member status transitions: one line per change with the
+    member id, timestamp, old and new status, and the API endpoint and latency that led
+    to it. Appends are sequential writes.
+
+    After compact_after_records appends, the latest record per member is written to the
+    snapshot file and the journal is rotated into archive_dir, so the live journal stays
+    short. Only the newest archive_keep_segments archived segments are kept. On startup
+    the snapshot is loaded and only the journal tail is replayed.
+    """
+
+    def __init__(self, journal_path, snapshot_path, archive_dir, compact_after_records, archive_keep_segments):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.archive_dir = archive_dir
+        self.compact_after_records = compact_after_records
+        self.archive_keep_segments = archive_keep_segments
+        self._lock = threading.Lock()
+        self._latest = {} # member_id -> last transition record
+        self._snapshot_seq = 0
+        self._seq = 0
+        self._records_since_compaction = 0
+        self._load()
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                self._latest = snapshot.get("members", {})
+                self._snapshot_seq = self._seq = snapshot.get("last_seq", 0)
+            except (ValueError, OSError) as e:
+                logger.error(f"تعذر قراءة لقطة سجل الحالات {self.snapshot_path}: {e}")
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # A line cut short by a crash
+                if record.get("seq", 0) <= self._snapshot_seq:
+                    continue # Already folded into the snapshot before a rotation was interrupted
+                self._latest[record["member_id"]] = record
+                self._seq = max(self._seq, record["seq"])
+                self._records_since_compaction += 1
+        logger.info(f"سجل الحالات: {len(self._latest)} عضو، {self._records_since_compaction} سجل بعد آخر ضغط.")
+
+    def record(self, member_id, old_status, new_status, endpoint=None, latency_seconds=None):
+        with self._lock:
+            if self._file.closed:
+                return None # Late transitions from a worker still finishing during shutdown
+            self._seq += 1
+            record = {
+                "seq": self._seq,
+                "member_id": member_id,
+                "ts": time.time(),
+                "old_status": old_status,
+                "new_status": new_status,
+                "endpoint": endpoint,
+                "latency_ms": round(latency_seconds * 1000) if latency_seconds is not None else None
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._latest[member_id] = record
+            self._records_since_compaction += 1
+            if self._records_since_compaction >= self.compact_after_records:
+                self._compact_locked()
+        return record
+
+    def latest(self, member_id):
+        """Last recorded transition for the member, or None."""
+        with self._lock:
+            return self._latest.get(member_id)
+
+    def compact(self):
+        with self._lock:
+            if not self._file.closed:
+                self._compact_locked()
+
+    def _compact_locked(self):
+        try:
+            # Snapshot first: if the rotation below is interrupted, the next load skips the
+            # journal records the snapshot already covers.
+            atomic_write_json(self.snapshot_path, {"last_seq": self._seq, "compacted_at": time.time(), "members": self._latest})
+            self._file.close()
+            os.makedirs(self.archive_dir, exist_ok=True)
+            segment_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._snapshot_seq + 1}-{self._seq}.jsonl"
+            os.replace(self.journal_path, os.path.join(self.archive_dir, segment_name))
+            self._snapshot_seq = self._seq
+            self._records_since_compaction = 0
+            logger.info(f"تم ضغط سجل الحالات إلى {self.snapshot_path} ونقل السجلات السابقة إلى {segment_name}.")
+            self._prune_archive_locked()
+        except OSError as e:
+            logger.error(f"فشل ضغط سجل الحالات: {e}")
+            self._records_since_compaction = 0 # Retry after another batch rather than on every record
+        finally:
+            if self._file.closed:
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _prune_archive_locked(self):
+        segments = [(_segment_first_seq(name), name) for name in os.listdir(self.archive_dir) if name.endswith(".jsonl")]
+        segments = [name for first_seq, name in sorted(segment for segment in segments if segment[0] is not None)]
+        for name in segments[:max(0, len(segments) - self.archive_keep_segments)]:
+            try:
+                os.remove(os.path.join(self.archive_dir, name))
+            except OSError as e:
+                logger.warning(f"تعذر حذف مقطع سجل الحالات القديم {name}: {e}")
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -1,6 +1,8 @@
 # utils.py
+import time
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QApplication, QStyle 
+from statuses import get_icon_name_for_status # re-exported for existing imports
 
 class QColorConstants: # Dark Theme Specific Colors
     PINK_DARK_THEME = QColor(176, 56, 73)
@@ -12,32 +14,28 @@ class QColorConstants: # Dark Theme Specific Colors
     PROCESSING_ROW_DARK_THEME = QColor(80, 80, 110) 
     BENEFITING_GREEN_DARK_THEME = QColor(30, 100, 50) # New color for "مستفيد حاليًا"
 
-def get_icon_name_for_status(status_text):
-    """
-    Determines the QStyle standard pixmap name string based on member status.
-    Returns a string like "SP_DialogYesButton".
-    """
-    # Order matters: more specific checks should come before general ones.
-    
-    if status_text == "مستفيد حاليًا من المنحة": return "SP_ FEATURE_खुशी" # Using a "happy" or "star" like icon if available, SP_DialogApplyButton as fallback
-    if status_text == "مكتمل": return "SP_DialogYesButton"
-    if status_text == "تم الحجز": return "SP_DialogSaveButton" 
-    if status_text == "تم جلب المعلومات": return "SP_DialogApplyButton" 
-    if status_text == "تم التحقق": return "SP_DialogApplyButton"
-    if status_text == "تم التحقق (فوري)": return "SP_DialogApplyButton"
-    if status_text == "تم جلب المعلومات (فوري)": return "SP_DialogApplyButton"
+def format_poll_interval(seconds):
+    """Short Arabic label for a member's recheck period, e.g. 'كل 4 د'."""
+    if not seconds:
+        return ""
+    if seconds < 60:
+        return f"كل {int(seconds)} ث"
+    if seconds < 3600:
+        return f"كل {int(round(seconds / 60))} د"
+    if seconds < 86400:
+        return f"كل {seconds / 3600:.1f} س".replace(".0 ", " ")
+    return f"كل {seconds / 86400:.1f} يوم".replace(".0 ", " ")
 
+def format_next_due(next_due_at):
+    if not next_due_at:
+        return "مستحق للفحص الآن"
+    return "الفحص التالي: " + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(next_due_at))
 
-    if "فشل" in status_text or "خاطئة" in status_text or "خطأ" in status_text: return "SP_MessageBoxCritical"
-    if "غير مؤهل" in status_text : return "SP_MessageBoxCritical" 
-    
-    if "لديه موعد مسبق" in status_text: return "SP_MessageBoxInformation" 
-    if "يتطلب تسجيل مسبق" in status_text: return "SP_MessageBoxWarning"
-    if "لا توجد مواعيد" in status_text: return "SP_MessageBoxInformation"
-    if status_text == "فشل بشكل متكرر": return "SP_MessageBoxWarning" 
-
-    if "جاري" in status_text or "البحث" in status_text or "محاولة" in status_text : return "SP_ArrowRight" 
-    
-    if status_text == "جديد": return "SP_CustomBase" 
-    
-    return "SP_CustomBase" 
+def format_last_transition(record):
+    """Tooltip text for the status cell from the member's last journal record."""
+    if not record:
+        return ""
+    text = f"منذ {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['ts']))} (السابقة: {record['old_status']})"
+    if record.get("latency_ms") is not None:
+        text += f" - {record['endpoint']} في {record['latency_ms']} مللي ثانية"
+    return text